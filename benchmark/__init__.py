@@ -0,0 +1 @@
+# Benchmark prestazioni sistema taxi
@@ -0,0 +1,58 @@
+# Benchmark strategie di accoppiamento: greedy contro abbinamento ottimo
+# Uso: python -m benchmark.bench_abbinamento
+import time
+
+from sistema_taxi.algoritmi.ottimizzazione import (
+    trova_coppie_clienti, distanza_manhattan_stazione
+)
+from sistema_taxi.algoritmi.ricerca_percorso import distanza_manhattan
+from sistema_taxi.configurazione.costanti import (
+    STRATEGIA_ACCOPPIAMENTO_GREEDY, STRATEGIA_ACCOPPIAMENTO_OTTIMA
+)
+from .scenari import genera_clienti
+
+NUMERI_CLIENTI = [20, 100, 500, 1000, 2500, 5000, 10000]
+RAGGIO = 2
+
+
+def costo_totale(coppie, clienti_singoli, clienti):
+    # Passi totali: andata e ritorno per i singoli, giro condiviso per le coppie
+    costo = 0
+    for cliente in clienti_singoli:
+        costo += 2 * distanza_manhattan_stazione(clienti[cliente])
+    for cliente_a, cliente_b in coppie:
+        costo += (distanza_manhattan_stazione(clienti[cliente_a]) +
+                  distanza_manhattan(clienti[cliente_a], clienti[cliente_b]) +
+                  distanza_manhattan_stazione(clienti[cliente_b]))
+    return costo
+
+
+def esegui_strategia(clienti, strategia):
+    inizio = time.perf_counter()
+    coppie, clienti_singoli = trova_coppie_clienti(clienti, RAGGIO, strategia=strategia)
+    durata = (time.perf_counter() - inizio) * 1000
+    return durata, costo_totale(coppie, clienti_singoli, clienti), len(coppie)
+
+
+def esegui_benchmark():
+    print(f"{'clienti':>8} {'greedy ms':>10} {'ottimo ms':>10} "
+          f"{'costo greedy':>13} {'costo ottimo':>13} {'risparmio %':>12}")
+
+    for numero in NUMERI_CLIENTI:
+        # Densità costante (circa 0.25 clienti per cella)
+        lato = max(10, int((numero * 4) ** 0.5))
+        clienti = genera_clienti(numero, lato, lato, seed=numero)
+
+        tempo_greedy, costo_greedy, _ = esegui_strategia(clienti, STRATEGIA_ACCOPPIAMENTO_GREEDY)
+        tempo_ottimo, costo_ottimo, _ = esegui_strategia(clienti, STRATEGIA_ACCOPPIAMENTO_OTTIMA)
+
+        if costo_ottimo > costo_greedy:
+            raise AssertionError(f"Abbinamento ottimo peggiore del greedy con {numero} clienti")
+
+        risparmio = 100.0 * (costo_greedy - costo_ottimo) / costo_greedy if costo_greedy else 0.0
+        print(f"{numero:>8} {tempo_greedy:>10.1f} {tempo_ottimo:>10.1f} "
+              f"{costo_greedy:>13} {costo_ottimo:>13} {risparmio:>12.2f}")
+
+
+if __name__ == "__main__":
+    esegui_benchmark()
@@ -0,0 +1,51 @@
+# Benchmark accoppiamento: confronto diretto O(n²) contro indice spaziale
+# Uso: python -m benchmark.bench_accoppiamento
+import time
+
+from sistema_taxi.algoritmi.ottimizzazione import (
+    trova_coppie_vicine_forza_bruta, trova_coppie_vicine_indice_spaziale
+)
+from .scenari import genera_clienti
+
+NUMERI_CLIENTI = [8, 16, 32, 64, 128, 256, 512, 1024, 2048, 4096]
+RAGGIO = 2
+
+
+def misura(funzione, *argomenti, ripetizioni=3):
+    # Tempo migliore su più ripetizioni (in millisecondi)
+    migliore = float('inf')
+    risultato = None
+    for _ in range(ripetizioni):
+        inizio = time.perf_counter()
+        risultato = funzione(*argomenti)
+        migliore = min(migliore, time.perf_counter() - inizio)
+    return migliore * 1000, risultato
+
+
+def esegui_benchmark():
+    print(f"{'clienti':>8} {'forza bruta ms':>15} {'indice ms':>10} {'coppie':>8}")
+    incrocio = None
+
+    for numero in NUMERI_CLIENTI:
+        # Densità costante: la città cresce insieme al numero di clienti
+        lato = max(10, int((numero * 4) ** 0.5))
+        clienti = genera_clienti(numero, lato, lato, seed=numero)
+        lista_clienti = sorted(clienti.keys())
+
+        tempo_bruto, coppie_bruto = misura(trova_coppie_vicine_forza_bruta,
+                                           clienti, lista_clienti, RAGGIO)
+        tempo_indice, coppie_indice = misura(trova_coppie_vicine_indice_spaziale,
+                                             clienti, lista_clienti, RAGGIO)
+
+        if coppie_bruto != coppie_indice:
+            raise AssertionError(f"Risultati diversi con {numero} clienti")
+        if incrocio is None and tempo_indice < tempo_bruto:
+            incrocio = numero
+
+        print(f"{numero:>8} {tempo_bruto:>15.2f} {tempo_indice:>10.2f} {len(coppie_indice):>8}")
+
+    print(f"Punto di incrocio: indice spaziale più veloce da {incrocio} clienti")
+
+
+if __name__ == "__main__":
+    esegui_benchmark()
@@ -0,0 +1,83 @@
+# Benchmark oracolo distanze: etichette hub contro A* e tabella BFS
+# Uso: python -m benchmark.bench_etichette_hub
+import random
+import tempfile
+import time
+from pathlib import Path
+
+from sistema_taxi.algoritmi.griglia import Griglia
+from sistema_taxi.algoritmi.ricerca_percorso import percorso_astar
+from sistema_taxi.algoritmi.etichette_hub import EtichetteHub, carica_etichette_hub
+from .scenari import genera_ostacoli, genera_isolati
+
+LATO = 80
+NUMERO_QUERY = 2000
+NUMERO_QUERY_ASTAR = 100
+
+
+def genera_mappe():
+    return [
+        ("aperta", set()),
+        ("ostacoli 25%", genera_ostacoli(LATO, LATO, 0.25, seed=2)),
+        ("isolati", genera_isolati(LATO, LATO)),
+    ]
+
+
+def genera_query(griglia, numero, seed=0):
+    # Coppie partenza/arrivo percorribili e collegate
+    generatore = random.Random(seed)
+    query = []
+    while len(query) < numero:
+        start = (generatore.randrange(LATO), generatore.randrange(LATO))
+        end = (generatore.randrange(LATO), generatore.randrange(LATO))
+        if griglia.raggiungibile(start, end):
+            query.append((start, end))
+    return query
+
+
+def esegui_benchmark():
+    print(f"Mappe {LATO}x{LATO}, {NUMERO_QUERY} query di distanza per mappa")
+    print(f"{'mappa':>14} {'prep. s':>8} {'carica ms':>10} {'voci/cella':>11} "
+          f"{'hub µs':>8} {'percorso µs':>12} {'A* µs':>10}")
+
+    for nome, ostacoli in genera_mappe():
+        griglia = Griglia(LATO, LATO, ostacoli)
+        query = genera_query(griglia, NUMERO_QUERY)
+
+        inizio = time.perf_counter()
+        etichette = EtichetteHub(griglia)
+        tempo_preparazione = time.perf_counter() - inizio
+
+        # Caricamento da disco: il costo pagato dopo il primo avvio
+        with tempfile.TemporaryDirectory() as cartella:
+            percorso_file = Path(cartella) / "mappa.hub"
+            etichette.salva(percorso_file)
+            inizio = time.perf_counter()
+            carica_etichette_hub(percorso_file, griglia)
+            tempo_caricamento = (time.perf_counter() - inizio) * 1000
+
+        celle_libere = griglia.numero_celle - sum(griglia.bloccate)
+        voci = sum(len(etichetta) for etichetta in etichette.distanze if etichetta)
+
+        inizio = time.perf_counter()
+        distanze = [etichette.distanza(start, end) for start, end in query]
+        tempo_hub = (time.perf_counter() - inizio) / NUMERO_QUERY * 1e6
+
+        inizio = time.perf_counter()
+        for start, end in query:
+            etichette.percorso(start, end)
+        tempo_percorso = (time.perf_counter() - inizio) / NUMERO_QUERY * 1e6
+
+        inizio = time.perf_counter()
+        for (start, end), distanza in zip(query[:NUMERO_QUERY_ASTAR], distanze):
+            percorso = percorso_astar(start, end, griglia)
+            if start != end and len(percorso) + 1 != distanza:
+                raise AssertionError(f"Distanza hub errata sulla mappa {nome}: {start} -> {end}")
+        tempo_astar = (time.perf_counter() - inizio) / NUMERO_QUERY_ASTAR * 1e6
+
+        print(f"{nome:>14} {tempo_preparazione:>8.2f} {tempo_caricamento:>10.1f} "
+              f"{voci / celle_libere:>11.1f} {tempo_hub:>8.1f} {tempo_percorso:>12.1f} {tempo_astar:>10.0f}")
+
+
+if __name__ == "__main__":
+    esegui_benchmark()
@@ -0,0 +1,74 @@
+# Benchmark ricerca percorso: A* classico contro Jump Point Search 4-connesso
+# Uso: python -m benchmark.bench_jps
+import random
+import time
+
+from sistema_taxi.algoritmi.griglia import Griglia
+from sistema_taxi.algoritmi.ricerca_percorso import percorso_astar
+from sistema_taxi.algoritmi.salti_jps import ottieni_tabelle_salto
+from sistema_taxi.configurazione.costanti import MODALITA_RICERCA_ASTAR, MODALITA_RICERCA_JPS
+from .scenari import genera_ostacoli, genera_isolati
+
+LATO = 500
+NUMERO_QUERY = 20
+
+
+def genera_mappe():
+    return [
+        ("aperta", set()),
+        ("ostacoli 10%", genera_ostacoli(LATO, LATO, 0.10, seed=1)),
+        ("ostacoli 25%", genera_ostacoli(LATO, LATO, 0.25, seed=2)),
+        ("isolati", genera_isolati(LATO, LATO)),
+    ]
+
+
+def genera_query(griglia, numero, seed=0):
+    # Coppie partenza/arrivo percorribili e collegate, lontane tra loro
+    generatore = random.Random(seed)
+    query = []
+    while len(query) < numero:
+        start = (generatore.randrange(LATO), generatore.randrange(LATO))
+        end = (generatore.randrange(LATO), generatore.randrange(LATO))
+        if griglia.raggiungibile(start, end) and abs(start[0] - end[0]) + abs(start[1] - end[1]) > LATO // 2:
+            query.append((start, end))
+    return query
+
+
+def misura(griglia, query, modalita):
+    # Tempo totale (ms), nodi espansi totali e lunghezze dei percorsi
+    nodi_espansi = 0
+    lunghezze = []
+    inizio = time.perf_counter()
+    for start, end in query:
+        statistiche = {}
+        lunghezze.append(len(percorso_astar(start, end, griglia, modalita, statistiche)))
+        nodi_espansi += statistiche['nodi_espansi']
+    return (time.perf_counter() - inizio) * 1000, nodi_espansi, lunghezze
+
+
+def esegui_benchmark():
+    print(f"Mappe {LATO}x{LATO}, {NUMERO_QUERY} query per mappa")
+    print(f"{'mappa':>14} {'A* ms':>10} {'A* nodi':>10} {'JPS ms':>10} {'JPS nodi':>10} "
+          f"{'speedup':>8} {'prep. JPS ms':>13}")
+
+    for nome, ostacoli in genera_mappe():
+        griglia = Griglia(LATO, LATO, ostacoli)
+        query = genera_query(griglia, NUMERO_QUERY)
+
+        # Le tabelle di salto si calcolano una volta per mappa: tempo riportato a parte
+        inizio = time.perf_counter()
+        ottieni_tabelle_salto(griglia)
+        tempo_preparazione = (time.perf_counter() - inizio) * 1000
+
+        tempo_astar, nodi_astar, lunghezze_astar = misura(griglia, query, MODALITA_RICERCA_ASTAR)
+        tempo_jps, nodi_jps, lunghezze_jps = misura(griglia, query, MODALITA_RICERCA_JPS)
+
+        if lunghezze_astar != lunghezze_jps:
+            raise AssertionError(f"Lunghezze dei percorsi diverse sulla mappa {nome}")
+
+        print(f"{nome:>14} {tempo_astar:>10.1f} {nodi_astar:>10} {tempo_jps:>10.1f} {nodi_jps:>10} "
+              f"{tempo_astar / tempo_jps:>7.1f}x {tempo_preparazione:>13.0f}")
+
+
+if __name__ == "__main__":
+    esegui_benchmark()
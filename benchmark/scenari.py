@@ -0,0 +1,40 @@
+# Generatori di scenari riproducibili per i benchmark
+import random
+
+
+def genera_clienti(numero_clienti, larghezza, altezza, seed=0, ostacoli=()):
+    # Genera clienti in celle casuali (ammesse più persone nella stessa cella)
+    # Etichette P1..Pn come nei file PDDL
+    generatore = random.Random(seed)
+    ostacoli = set(ostacoli)
+    clienti = {}
+
+    numero = 1
+    while len(clienti) < numero_clienti:
+        pos = (generatore.randrange(larghezza), generatore.randrange(altezza))
+        if pos in ostacoli:
+            continue
+        clienti[f"P{numero}"] = pos
+        numero += 1
+
+    return clienti
+
+
+def genera_ostacoli(larghezza, altezza, densita, seed=0):
+    # Ostacoli sparsi uniformemente: densita = frazione di celle bloccate
+    generatore = random.Random(seed)
+    numero_ostacoli = int(larghezza * altezza * densita)
+    return {
+        (generatore.randrange(larghezza), generatore.randrange(altezza))
+        for _ in range(numero_ostacoli)
+    }
+
+
+def genera_isolati(larghezza, altezza, lato_isolato=8, larghezza_strada=2):
+    # Città a isolati: blocchi pieni separati da strade (mappa aperta ma con muri lunghi)
+    passo = lato_isolato + larghezza_strada
+    return {
+        (x, y)
+        for x in range(larghezza) for y in range(altezza)
+        if x % passo >= larghezza_strada and y % passo >= larghezza_strada
+    }
@@ -0,0 +1,363 @@
+# Suite di benchmark: ricerca percorso, accoppiamento e costruzione piani su scenari seminati
+# Uso:
+#   python -m benchmark.suite                                  tutti gli scenari, tabella a video
+#   python -m benchmark.suite --output risultati.json          salva i tempi in JSON
+#   python -m benchmark.suite --confronta baseline.json        confronto con una baseline salvata
+#   python -m benchmark.suite --scenari piccolo medio --ripetizioni 3
+# Con --confronta il codice di uscita è 1 se uno stadio rallenta oltre la banda di rumore
+# o se cambia un risultato di controllo (coppie, passi, costi): utilizzabile come gate di rilascio
+import argparse
+import gc
+import json
+import platform
+import random
+import statistics
+import sys
+import time
+from contextlib import contextmanager
+
+from sistema_taxi.configurazione import costanti
+from sistema_taxi.configurazione.costanti import STAZIONE, MODALITA_RICERCA_ASTAR, MODALITA_RICERCA_JPS
+from sistema_taxi.algoritmi import griglia as modulo_griglia
+from sistema_taxi.algoritmi import tabella_percorsi as modulo_tabella
+from sistema_taxi.algoritmi.griglia import ottieni_griglia, segnala_modifica_ostacoli
+from sistema_taxi.algoritmi.ricerca_percorso import percorso_astar
+from sistema_taxi.algoritmi.tabella_percorsi import ottieni_tabella_percorsi
+from sistema_taxi.algoritmi.ottimizzazione import trova_coppie_clienti
+from sistema_taxi.algoritmi.distanze_vettoriali import NUMPY_DISPONIBILE
+from sistema_taxi.pianificazione.gestore_taxi import costruisci_piani_taxi_singolo_e_condiviso
+from sistema_taxi.pianificazione.pianificatore_flotta import costruisci_piani_flotta
+from sistema_taxi.simulazione.motore import MotoreSimulazione
+from .scenari import genera_clienti, genera_ostacoli
+
+VERSIONE_FORMATO = 2
+RIPETIZIONI_DEFAULT = 5
+RISCALDAMENTO = 1          # Esecuzioni iniziali scartate (cache, allocatore, bytecode)
+NUMERO_QUERY_PERCORSO = 50
+TOLLERANZA_DEFAULT = 0.25  # Rallentamento relativo minimo prima di segnalare una regressione
+FATTORE_RUMORE = 2.0       # Banda di rumore: multipli della dispersione misurata dello stadio
+ITERAZIONI_CALIBRAZIONE = 20000
+CAMPIONI_CALIBRAZIONE = 3
+DURATA_MINIMA_CAMPIONE_MS = 5.0  # Gli stadi più brevi vengono ripetuti dentro lo stesso campione
+
+# (nome, larghezza, altezza, densità ostacoli, clienti, raggio coppia, seed)
+# L'altezza minima è 10: la stazione (0, 9) deve stare nella griglia
+SCENARI = [
+    ("piccolo", 15, 10, 0.10, 8, 2, 1),
+    ("medio", 60, 40, 0.15, 200, 2, 2),
+    ("grande", 150, 100, 0.20, 1000, 3, 3),
+    ("denso", 100, 100, 0.35, 500, 2, 4),
+]
+
+
+class Scenario:
+    def __init__(self, nome, larghezza, altezza, densita, numero_clienti, raggio, seed):
+        self.nome = nome
+        self.larghezza = larghezza
+        self.altezza = altezza
+        self.densita = densita
+        self.numero_clienti = numero_clienti
+        self.raggio = raggio
+        self.seed = seed
+
+        # La stazione resta sempre percorribile
+        self.ostacoli = genera_ostacoli(larghezza, altezza, densita, seed) - {STAZIONE}
+
+    def parametri(self):
+        return {
+            "larghezza": self.larghezza,
+            "altezza": self.altezza,
+            "densita": self.densita,
+            "clienti": self.numero_clienti,
+            "raggio": self.raggio,
+            "seed": self.seed,
+        }
+
+
+@contextmanager
+def scenario_attivo(scenario):
+    # Le funzioni di pianificazione leggono griglia e ostacoli dalle costanti:
+    # si sostituiscono per la durata dello scenario e poi si ripristinano
+    originali = (costanti.GRIGLIA_LARGHEZZA, costanti.GRIGLIA_ALTEZZA, list(costanti.OSTACOLI))
+    costanti.GRIGLIA_LARGHEZZA = scenario.larghezza
+    costanti.GRIGLIA_ALTEZZA = scenario.altezza
+    costanti.OSTACOLI[:] = sorted(scenario.ostacoli)
+    segnala_modifica_ostacoli()
+    try:
+        yield
+    finally:
+        costanti.GRIGLIA_LARGHEZZA, costanti.GRIGLIA_ALTEZZA, costanti.OSTACOLI[:] = originali
+        segnala_modifica_ostacoli()
+        svuota_strutture_condivise()
+
+
+def svuota_strutture_condivise():
+    # Partenza a freddo: griglia e tabella vengono ricostruite alla prima richiesta
+    modulo_griglia._griglia_corrente = None
+    modulo_tabella._tabella_corrente = None
+
+
+def clienti_raggiungibili(scenario):
+    # Clienti seminati nella componente della stazione: nessun avviso durante le misure
+    griglia = ottieni_griglia()
+    clienti = genera_clienti(scenario.numero_clienti * 2, scenario.larghezza, scenario.altezza,
+                             seed=scenario.seed, ostacoli=scenario.ostacoli)
+    raggiungibili = [(cliente, pos) for cliente, pos in clienti.items()
+                     if griglia.raggiungibile(STAZIONE, pos)]
+    return dict(raggiungibili[:scenario.numero_clienti])
+
+
+def query_percorso(griglia, numero, seed):
+    # Coppie partenza/arrivo percorribili e collegate
+    generatore = random.Random(seed)
+    query = []
+    while len(query) < numero:
+        start = (generatore.randrange(griglia.larghezza), generatore.randrange(griglia.altezza))
+        end = (generatore.randrange(griglia.larghezza), generatore.randrange(griglia.altezza))
+        if griglia.raggiungibile(start, end):
+            query.append((start, end))
+    return query
+
+
+def carico_calibrazione():
+    # Carico fisso in Python puro (dizionari e interi, come gli algoritmi misurati)
+    totale = 0
+    celle = {}
+    for i in range(ITERAZIONI_CALIBRAZIONE):
+        celle[i & 1023] = celle.get(i & 1023, 0) + i
+        totale += i % 7
+    return totale
+
+
+def calibrazione(campioni=CAMPIONI_CALIBRAZIONE):
+    # Velocità della macchina in questo momento: migliore di pochi campioni brevi, in ms
+    migliore = float('inf')
+    for _ in range(campioni):
+        inizio = time.perf_counter()
+        carico_calibrazione()
+        migliore = min(migliore, (time.perf_counter() - inizio) * 1000)
+    return migliore
+
+
+def esecuzione_misurata(funzione, preparazione):
+    # Una chiamata cronometrata, con preparazione esclusa e garbage collector sospeso
+    if preparazione is not None:
+        preparazione()
+    gc_attivo = gc.isenabled()
+    gc.disable()
+    try:
+        inizio = time.perf_counter()
+        risultato = funzione()
+        durata = (time.perf_counter() - inizio) * 1000
+    finally:
+        if gc_attivo:
+            gc.enable()
+    return durata, risultato
+
+
+def misura(funzione, ripetizioni, preparazione=None):
+    # Tempi in millisecondi per chiamata su più campioni, dopo RISCALDAMENTO campioni scartati
+    # Un campione ripete lo stadio finché non dura almeno DURATA_MINIMA_CAMPIONE_MS
+    # CALIBRAZIONE ALTERNATA: il carico di riferimento viene misurato prima e dopo ogni
+    # campione e il campione viene espresso in unità di calibrazione (media delle due), così un
+    # cambio di velocità della macchina durante la suite pesa allo stesso modo su entrambi
+    # normalizzato: mediana dei campioni normalizzati, robusta sia ai campioni fortunati
+    # sia a quelli disturbati
+    # dispersione: scarto relativo tra mediana e migliore normalizzati (0.1 = 10%)
+    tempi = []
+    normalizzati = []
+    risultato = None
+
+    for giro in range(RISCALDAMENTO + max(1, ripetizioni)):
+        prima = calibrazione()
+        totale, chiamate = 0.0, 0
+        while chiamate == 0 or totale < DURATA_MINIMA_CAMPIONE_MS:
+            durata, risultato = esecuzione_misurata(funzione, preparazione)
+            totale += durata
+            chiamate += 1
+        riferimento = (prima + calibrazione()) / 2
+
+        if giro >= RISCALDAMENTO:
+            tempi.append(totale / chiamate)
+            normalizzati.append(totale / chiamate / riferimento)
+
+    mediana_normalizzata = statistics.median(normalizzati)
+    return {
+        "migliore": min(tempi),
+        "mediana": statistics.median(tempi),
+        "normalizzato": mediana_normalizzata,
+        "dispersione": 1 - min(normalizzati) / mediana_normalizzata if mediana_normalizzata > 0 else 0.0,
+    }, risultato
+
+
+def esegui_scenario(scenario, ripetizioni):
+    # Ogni stadio misurato da solo, poi la catena completa a freddo
+    tempi = {}
+    controlli = {}
+
+    with scenario_attivo(scenario):
+        tempi["griglia"], griglia = misura(ottieni_griglia, ripetizioni, svuota_strutture_condivise)
+        clienti = clienti_raggiungibili(scenario)
+        posizioni = {f"loc_{cliente}": pos for cliente, pos in clienti.items()}
+        mappa_pickup = {cliente: f"loc_{cliente}" for cliente in clienti}
+
+        query = query_percorso(griglia, NUMERO_QUERY_PERCORSO, scenario.seed)
+        for modalita in (MODALITA_RICERCA_ASTAR, MODALITA_RICERCA_JPS):
+            tempi[f"percorso_{modalita}"], lunghezze = misura(
+                lambda: [len(percorso_astar(start, end, griglia, modalita)) for start, end in query],
+                ripetizioni
+            )
+            controlli[f"passi_{modalita}"] = sum(lunghezze)
+
+        tempi["campo_stazione"], _ = misura(
+            lambda: ottieni_tabella_percorsi().campo(STAZIONE), ripetizioni,
+            lambda: setattr(modulo_tabella, "_tabella_corrente", None)
+        )
+
+        tempi["accoppiamento"], (coppie, singoli) = misura(
+            lambda: trova_coppie_clienti(clienti, scenario.raggio), ripetizioni
+        )
+        controlli["coppie"] = len(coppie)
+        controlli["singoli"] = len(singoli)
+
+        tempi["piani_singolo_condiviso"], piani = misura(
+            lambda: costruisci_piani_taxi_singolo_e_condiviso(mappa_pickup, posizioni, scenario.raggio),
+            ripetizioni, svuota_strutture_condivise
+        )
+        controlli["passi_piani"] = sum(len(piano.percorso) - 1 for piano in piani.piani.values())
+
+        tempi["piani_flotta"], piani_flotta = misura(
+            lambda: costruisci_piani_flotta(mappa_pickup, posizioni, raggio_coppia=scenario.raggio),
+            ripetizioni, svuota_strutture_condivise
+        )
+        controlli["makespan_flotta"] = max(len(piano.percorso) - 1 for piano in piani_flotta.piani.values())
+
+        tempi["simulazione"], risultato = misura(lambda: MotoreSimulazione(piani).esegui(), ripetizioni)
+        controlli["costo_totale"] = round(sum(risultato.costi_clienti.values()), 6)
+
+        def catena_completa():
+            piani_completi = costruisci_piani_taxi_singolo_e_condiviso(mappa_pickup, posizioni, scenario.raggio)
+            return MotoreSimulazione(piani_completi).esegui()
+
+        tempi["end_to_end"], _ = misura(catena_completa, ripetizioni, svuota_strutture_condivise)
+
+    return {"parametri": scenario.parametri(), "tempi_ms": tempi, "controlli": controlli}
+
+
+def esegui_suite(nomi_scenari=None, ripetizioni=RIPETIZIONI_DEFAULT):
+    risultati = {
+        "versione": VERSIONE_FORMATO,
+        "python": platform.python_version(),
+        "piattaforma": platform.platform(),
+        "numpy": NUMPY_DISPONIBILE,
+        "ripetizioni": ripetizioni,
+        "calibrazione_ms": calibrazione(),
+        "scenari": {},
+    }
+
+    for definizione in SCENARI:
+        if nomi_scenari and definizione[0] not in nomi_scenari:
+            continue
+        scenario = Scenario(*definizione)
+        risultati["scenari"][scenario.nome] = esegui_scenario(scenario, ripetizioni)
+        stampa_scenario(scenario.nome, risultati["scenari"][scenario.nome])
+
+    return risultati
+
+
+def stampa_scenario(nome, risultato):
+    parametri = risultato["parametri"]
+    print(f"\n[{nome}] {parametri['larghezza']}x{parametri['altezza']}, ostacoli {parametri['densita']:.0%}, "
+          f"{parametri['clienti']} clienti, raggio {parametri['raggio']}")
+    for stadio, tempo in risultato["tempi_ms"].items():
+        print(f"  {stadio:>24} {tempo['migliore']:>10.2f} ms (mediana {tempo['mediana']:.2f})")
+
+
+def banda_rumore(precedente, attuale, tolleranza):
+    # Rallentamento relativo ammesso: almeno la tolleranza, allargata fino a
+    # FATTORE_RUMORE volte la dispersione più ampia tra baseline e misura attuale
+    dispersione = max(precedente["dispersione"], attuale["dispersione"])
+    return max(tolleranza, FATTORE_RUMORE * dispersione)
+
+
+def confronta_con_baseline(risultati, baseline, tolleranza=TOLLERANZA_DEFAULT):
+    # Regressioni: stadi più lenti oltre la banda di rumore e controlli diversi
+    # Si confrontano le mediane normalizzate sulla calibrazione misurata accanto a ogni
+    # campione: il confronto regge cambi di carico durante la suite e baseline di altre macchine
+    # Restituisce la lista dei problemi trovati, vuota se la suite è in linea con la baseline
+    if baseline.get("versione") != VERSIONE_FORMATO:
+        return [f"Baseline in formato {baseline.get('versione')}, attuale {VERSIONE_FORMATO}: "
+                f"rigenerarla con --output"]
+
+    problemi = []
+    print(f"\nConfronto con la baseline (tolleranza minima {tolleranza:.0%}, "
+          f"banda di rumore {FATTORE_RUMORE:g}x la dispersione)")
+    print(f"{'scenario':>10} {'stadio':>24} {'baseline ms':>12} {'attuale ms':>11} {'rapporto':>9} {'banda':>7}")
+
+    for nome, risultato in risultati["scenari"].items():
+        riferimento = baseline.get("scenari", {}).get(nome)
+        if riferimento is None:
+            print(f"{nome:>10} assente nella baseline")
+            continue
+        if riferimento["parametri"] != risultato["parametri"]:
+            problemi.append(f"{nome}: parametri dello scenario diversi dalla baseline")
+            continue
+
+        for stadio, tempo in risultato["tempi_ms"].items():
+            tempo_riferimento = riferimento["tempi_ms"].get(stadio)
+            if tempo_riferimento is None:
+                continue
+            precedente, attuale = tempo_riferimento["normalizzato"], tempo["normalizzato"]
+            banda = banda_rumore(tempo_riferimento, tempo, tolleranza)
+            rapporto = attuale / precedente if precedente > 0 else float('inf')
+            regressione = rapporto > 1 + banda
+            segnale = "  REGRESSIONE" if regressione else ""
+            print(f"{nome:>10} {stadio:>24} {tempo_riferimento['migliore']:>12.2f} {tempo['migliore']:>11.2f} "
+                  f"{rapporto:>8.2f}x {banda:>6.0%}{segnale}")
+            if regressione:
+                problemi.append(f"{nome}/{stadio}: {rapporto:.2f}x più lento a parità di calibrazione "
+                                f"({tempo_riferimento['migliore']:.3g} ms -> {tempo['migliore']:.3g} ms, "
+                                f"banda {banda:.0%})")
+
+        for controllo, valore in risultato["controlli"].items():
+            valore_riferimento = riferimento["controlli"].get(controllo)
+            if valore_riferimento is not None and valore_riferimento != valore:
+                problemi.append(f"{nome}/{controllo}: risultato cambiato ({valore_riferimento} -> {valore})")
+
+    return problemi
+
+
+def main(argomenti=None):
+    parser = argparse.ArgumentParser(description="Benchmark del sistema taxi")
+    parser.add_argument("--output", help="File JSON in cui salvare i risultati")
+    parser.add_argument("--confronta", help="Baseline JSON con cui confrontare i risultati")
+    parser.add_argument("--tolleranza", type=float, default=TOLLERANZA_DEFAULT,
+                        help="Rallentamento relativo minimo per una regressione (default 0.25 = 25%%)")
+    parser.add_argument("--ripetizioni", type=int, default=RIPETIZIONI_DEFAULT)
+    parser.add_argument("--scenari", nargs="*", choices=[definizione[0] for definizione in SCENARI],
+                        help="Sottoinsieme di scenari da eseguire")
+    opzioni = parser.parse_args(argomenti)
+
+    risultati = esegui_suite(opzioni.scenari, opzioni.ripetizioni)
+
+    if opzioni.output:
+        with open(opzioni.output, "w", encoding="utf-8") as file:
+            json.dump(risultati, file, indent=2)
+        print(f"\nRisultati salvati in {opzioni.output}")
+
+    if opzioni.confronta:
+        with open(opzioni.confronta, "r", encoding="utf-8") as file:
+            baseline = json.load(file)
+        problemi = confronta_con_baseline(risultati, baseline, opzioni.tolleranza)
+        if problemi:
+            print("\nRegressioni rilevate:")
+            for problema in problemi:
+                print(f"  - {problema}")
+            return 1
+        print("\nNessuna regressione rispetto alla baseline")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,3 +1,9 @@
 # Modulo algoritmi sistema taxi
+from .griglia import *
+from .salti_jps import *
+from .distanze_vettoriali import *
+from .etichette_hub import *
 from .ricerca_percorso import *
 from .ottimizzazione import *
+from .tabella_percorsi import *
+from .abbinamento_pesato import *
@@ -0,0 +1,441 @@
+# Abbinamento di peso massimo su grafi generali (algoritmo blossom di Edmonds)
+# Versione primale-duale O(n³) con pesi interi, sul modello classico di Galil
+# "Efficient algorithms for finding maximum matching in graphs" (1986)
+
+
+def abbinamento_peso_massimo(archi, massima_cardinalita=False):
+    # ABBINAMENTO DI PESO MASSIMO: archi = [(i, j, peso)] con vertici interi 0..n-1
+    # Restituisce compagno[v] = vertice abbinato a v, oppure -1 se v resta libero
+    # Con pesi interi tutte le variabili duali restano intere (niente errori float)
+    if not archi:
+        return []
+
+    numero_archi = len(archi)
+    numero_vertici = 0
+    for i, j, _ in archi:
+        if i < 0 or j < 0 or i == j:
+            raise ValueError(f"Arco non valido: {(i, j)}")
+        numero_vertici = max(numero_vertici, i + 1, j + 1)
+
+    peso_massimo = max(0, max(peso for _, _, peso in archi))
+
+    # Estremi: l'arco k ha estremi 2k (vertice i) e 2k+1 (vertice j)
+    estremo = [archi[p // 2][p % 2] for p in range(2 * numero_archi)]
+
+    # estremi_vicini[v] = estremi "remoti" degli archi incidenti a v
+    estremi_vicini = [[] for _ in range(numero_vertici)]
+    for k, (i, j, _) in enumerate(archi):
+        estremi_vicini[i].append(2 * k + 1)
+        estremi_vicini[j].append(2 * k)
+
+    # compagno[v] = estremo remoto dell'arco abbinato (convertito in vertice alla fine)
+    compagno = [-1] * numero_vertici
+
+    # Blossom di primo livello: etichetta 0 = libero, 1 = S (esterno), 2 = T (interno)
+    # Indici 0..n-1 sono vertici singoli, n..2n-1 blossom non banali
+    etichetta = [0] * (2 * numero_vertici)
+    fine_etichetta = [-1] * (2 * numero_vertici)
+    in_blossom = list(range(numero_vertici))
+    padre_blossom = [-1] * (2 * numero_vertici)
+    figli_blossom = [None] * (2 * numero_vertici)
+    base_blossom = list(range(numero_vertici)) + [-1] * numero_vertici
+    estremi_blossom = [None] * (2 * numero_vertici)
+    arco_migliore = [-1] * (2 * numero_vertici)
+    archi_migliori_blossom = [None] * (2 * numero_vertici)
+    blossom_liberi = list(range(numero_vertici, 2 * numero_vertici))
+
+    # Variabili duali: u(v) per i vertici, z(b) per i blossom
+    duale = [peso_massimo] * numero_vertici + [0] * numero_vertici
+    arco_ammesso = [False] * numero_archi
+    coda = []
+
+    def scarto(k):
+        # Scarto ridotto dell'arco k (0 = arco stretto)
+        i, j, peso = archi[k]
+        return duale[i] + duale[j] - 2 * peso
+
+    def foglie_blossom(b):
+        # Vertici contenuti (anche a più livelli) nel blossom b
+        if b < numero_vertici:
+            yield b
+        else:
+            for figlio in figli_blossom[b]:
+                if figlio < numero_vertici:
+                    yield figlio
+                else:
+                    yield from foglie_blossom(figlio)
+
+    def assegna_etichetta(w, tipo, p):
+        # Etichetta il vertice w (e il suo blossom) come S o T, raggiunto tramite p
+        b = in_blossom[w]
+        etichetta[w] = etichetta[b] = tipo
+        fine_etichetta[w] = fine_etichetta[b] = p
+        arco_migliore[w] = arco_migliore[b] = -1
+        if tipo == 1:
+            # Nuovo blossom S: i suoi vertici vanno scansionati
+            coda.extend(foglie_blossom(b))
+        elif tipo == 2:
+            # Blossom T: il compagno della sua base diventa S
+            base = base_blossom[b]
+            assegna_etichetta(estremo[compagno[base]], 1, compagno[base] ^ 1)
+
+    def cerca_blossom(v, w):
+        # Risale dai due vertici S verso le radici: restituisce la base del
+        # nuovo blossom oppure -1 se è stato trovato un cammino aumentante
+        percorso = []
+        base = -1
+        while v != -1 or w != -1:
+            b = in_blossom[v]
+            if etichetta[b] & 4:
+                base = base_blossom[b]
+                break
+            percorso.append(b)
+            etichetta[b] = 5
+            if fine_etichetta[b] == -1:
+                # Raggiunta la radice di un albero alternante
+                v = -1
+            else:
+                v = estremo[fine_etichetta[b]]
+                b = in_blossom[v]
+                v = estremo[fine_etichetta[b]]
+            # Alterna tra i due rami
+            if w != -1:
+                v, w = w, v
+        for b in percorso:
+            etichetta[b] = 1
+        return base
+
+    def aggiungi_blossom(base, k):
+        # Contrae il ciclo dispari chiuso dall'arco k in un nuovo blossom
+        v, w, _ = archi[k]
+        bb = in_blossom[base]
+        bv = in_blossom[v]
+        bw = in_blossom[w]
+        b = blossom_liberi.pop()
+        base_blossom[b] = base
+        padre_blossom[b] = -1
+        padre_blossom[bb] = b
+        figli_blossom[b] = figli = []
+        estremi_blossom[b] = estremi = []
+
+        # Ramo da v fino alla base
+        while bv != bb:
+            padre_blossom[bv] = b
+            figli.append(bv)
+            estremi.append(fine_etichetta[bv])
+            v = estremo[fine_etichetta[bv]]
+            bv = in_blossom[v]
+        figli.append(bb)
+        figli.reverse()
+        estremi.reverse()
+        estremi.append(2 * k)
+
+        # Ramo da w fino alla base
+        while bw != bb:
+            padre_blossom[bw] = b
+            figli.append(bw)
+            estremi.append(fine_etichetta[bw] ^ 1)
+            w = estremo[fine_etichetta[bw]]
+            bw = in_blossom[w]
+
+        etichetta[b] = 1
+        fine_etichetta[b] = fine_etichetta[bb]
+        duale[b] = 0
+
+        for v in foglie_blossom(b):
+            if etichetta[in_blossom[v]] == 2:
+                # Vertici prima T ora diventano S: vanno scansionati
+                coda.append(v)
+            in_blossom[v] = b
+
+        # Archi migliori verso altri blossom S (per il calcolo del delta)
+        arco_migliore_verso = [-1] * (2 * numero_vertici)
+        for bv in figli:
+            if archi_migliori_blossom[bv] is None:
+                liste_archi = [[p // 2 for p in estremi_vicini[v]]
+                               for v in foglie_blossom(bv)]
+            else:
+                liste_archi = [archi_migliori_blossom[bv]]
+            for lista_archi in liste_archi:
+                for k in lista_archi:
+                    i, j, _ = archi[k]
+                    if in_blossom[j] == b:
+                        i, j = j, i
+                    bj = in_blossom[j]
+                    if (bj != b and etichetta[bj] == 1 and
+                            (arco_migliore_verso[bj] == -1 or
+                             scarto(k) < scarto(arco_migliore_verso[bj]))):
+                        arco_migliore_verso[bj] = k
+            archi_migliori_blossom[bv] = None
+            arco_migliore[bv] = -1
+
+        archi_migliori_blossom[b] = [k for k in arco_migliore_verso if k != -1]
+        arco_migliore[b] = -1
+        for k in archi_migliori_blossom[b]:
+            if arco_migliore[b] == -1 or scarto(k) < scarto(arco_migliore[b]):
+                arco_migliore[b] = k
+
+    def espandi_blossom(b, fine_fase):
+        # Scioglie il blossom b riportando i figli al primo livello
+        for figlio in figli_blossom[b]:
+            padre_blossom[figlio] = -1
+            if figlio < numero_vertici:
+                in_blossom[figlio] = figlio
+            elif fine_fase and duale[figlio] == 0:
+                espandi_blossom(figlio, fine_fase)
+            else:
+                for v in foglie_blossom(figlio):
+                    in_blossom[v] = figlio
+
+        if not fine_fase and etichetta[b] == 2:
+            # Blossom T espanso durante la fase: rietichetta il ramo pari
+            # dal figlio d'ingresso fino alla base
+            figlio_ingresso = in_blossom[estremo[fine_etichetta[b] ^ 1]]
+            j = figli_blossom[b].index(figlio_ingresso)
+            if j & 1:
+                j -= len(figli_blossom[b])
+                passo = 1
+                trucco_estremo = 0
+            else:
+                passo = -1
+                trucco_estremo = 1
+
+            p = fine_etichetta[b]
+            while j != 0:
+                etichetta[estremo[p ^ 1]] = 0
+                etichetta[estremo[estremi_blossom[b][j - trucco_estremo] ^ trucco_estremo ^ 1]] = 0
+                assegna_etichetta(estremo[p ^ 1], 2, p)
+                arco_ammesso[estremi_blossom[b][j - trucco_estremo] // 2] = True
+                j += passo
+                p = estremi_blossom[b][j - trucco_estremo] ^ trucco_estremo
+                arco_ammesso[p // 2] = True
+                j += passo
+
+            # La base del blossom diventa T senza etichettare il compagno
+            bv = figli_blossom[b][j]
+            etichetta[estremo[p ^ 1]] = etichetta[bv] = 2
+            fine_etichetta[estremo[p ^ 1]] = fine_etichetta[bv] = p
+            arco_migliore[bv] = -1
+
+            # I figli del ramo dispari restano liberi salvo vertici già raggiunti
+            j += passo
+            while figli_blossom[b][j] != figlio_ingresso:
+                bv = figli_blossom[b][j]
+                if etichetta[bv] == 1:
+                    j += passo
+                    continue
+                raggiunto = None
+                for v in foglie_blossom(bv):
+                    if etichetta[v] != 0:
+                        raggiunto = v
+                        break
+                if raggiunto is not None:
+                    etichetta[raggiunto] = 0
+                    etichetta[estremo[compagno[base_blossom[bv]]]] = 0
+                    assegna_etichetta(raggiunto, 2, fine_etichetta[raggiunto])
+                j += passo
+
+        etichetta[b] = fine_etichetta[b] = -1
+        figli_blossom[b] = estremi_blossom[b] = None
+        base_blossom[b] = -1
+        archi_migliori_blossom[b] = None
+        arco_migliore[b] = -1
+        blossom_liberi.append(b)
+
+    def aumenta_blossom(b, v):
+        # Scambia archi abbinati/liberi lungo il cammino pari da v alla base di b
+        t = v
+        while padre_blossom[t] != b:
+            t = padre_blossom[t]
+        if t >= numero_vertici:
+            aumenta_blossom(t, v)
+
+        i = j = figli_blossom[b].index(t)
+        if i & 1:
+            j -= len(figli_blossom[b])
+            passo = 1
+            trucco_estremo = 0
+        else:
+            passo = -1
+            trucco_estremo = 1
+
+        while j != 0:
+            j += passo
+            t = figli_blossom[b][j]
+            p = estremi_blossom[b][j - trucco_estremo] ^ trucco_estremo
+            if t >= numero_vertici:
+                aumenta_blossom(t, estremo[p])
+            j += passo
+            t = figli_blossom[b][j]
+            if t >= numero_vertici:
+                aumenta_blossom(t, estremo[p ^ 1])
+            compagno[estremo[p]] = p ^ 1
+            compagno[estremo[p ^ 1]] = p
+
+        # v diventa la nuova base del blossom
+        figli_blossom[b] = figli_blossom[b][i:] + figli_blossom[b][:i]
+        estremi_blossom[b] = estremi_blossom[b][i:] + estremi_blossom[b][:i]
+        base_blossom[b] = base_blossom[figli_blossom[b][0]]
+
+    def aumenta_abbinamento(k):
+        # Cammino aumentante attraverso l'arco k: scambia abbinati e liberi
+        v, w, _ = archi[k]
+        for s, p in ((v, 2 * k + 1), (w, 2 * k)):
+            while True:
+                bs = in_blossom[s]
+                if bs >= numero_vertici:
+                    aumenta_blossom(bs, s)
+                compagno[s] = p
+                if fine_etichetta[bs] == -1:
+                    # Raggiunto un vertice libero (radice dell'albero)
+                    break
+                t = estremo[fine_etichetta[bs]]
+                bt = in_blossom[t]
+                s = estremo[fine_etichetta[bt]]
+                j = estremo[fine_etichetta[bt] ^ 1]
+                if bt >= numero_vertici:
+                    aumenta_blossom(bt, j)
+                compagno[j] = fine_etichetta[bt]
+                p = fine_etichetta[bt] ^ 1
+
+    # CICLO PRINCIPALE: ogni fase cerca un cammino aumentante
+    for _ in range(numero_vertici):
+        etichetta[:] = [0] * (2 * numero_vertici)
+        arco_migliore[:] = [-1] * (2 * numero_vertici)
+        archi_migliori_blossom[numero_vertici:] = [None] * numero_vertici
+        arco_ammesso[:] = [False] * numero_archi
+        coda[:] = []
+
+        # Tutti i vertici liberi sono radici di alberi alternanti (etichetta S)
+        for v in range(numero_vertici):
+            if compagno[v] == -1 and etichetta[in_blossom[v]] == 0:
+                assegna_etichetta(v, 1, -1)
+
+        aumentato = False
+        while True:
+            # Espansione degli alberi lungo gli archi stretti
+            while coda and not aumentato:
+                v = coda.pop()
+
+                for p in estremi_vicini[v]:
+                    k = p // 2
+                    w = estremo[p]
+                    if in_blossom[v] == in_blossom[w]:
+                        continue
+
+                    if not arco_ammesso[k]:
+                        scarto_k = scarto(k)
+                        if scarto_k <= 0:
+                            arco_ammesso[k] = True
+
+                    if arco_ammesso[k]:
+                        if etichetta[in_blossom[w]] == 0:
+                            # w libero: diventa T e il suo compagno S
+                            assegna_etichetta(w, 2, p ^ 1)
+                        elif etichetta[in_blossom[w]] == 1:
+                            # Arco S-S: nuovo blossom o cammino aumentante
+                            base = cerca_blossom(v, w)
+                            if base >= 0:
+                                aggiungi_blossom(base, k)
+                            else:
+                                aumenta_abbinamento(k)
+                                aumentato = True
+                                break
+                        elif etichetta[w] == 0:
+                            # w dentro un blossom T ma non ancora raggiunto
+                            etichetta[w] = 2
+                            fine_etichetta[w] = p ^ 1
+                    elif etichetta[in_blossom[w]] == 1:
+                        b = in_blossom[v]
+                        if arco_migliore[b] == -1 or scarto_k < scarto(arco_migliore[b]):
+                            arco_migliore[b] = k
+                    elif etichetta[w] == 0:
+                        if arco_migliore[w] == -1 or scarto_k < scarto(arco_migliore[w]):
+                            arco_migliore[w] = k
+
+            if aumentato:
+                break
+
+            # AGGIORNAMENTO DUALE: calcola il delta massimo ammissibile
+            tipo_delta = -1
+            delta = arco_delta = blossom_delta = None
+
+            if not massima_cardinalita:
+                # Tipo 1: una variabile duale di vertice arriva a zero
+                tipo_delta = 1
+                delta = min(duale[:numero_vertici])
+
+            for v in range(numero_vertici):
+                # Tipo 2: arco stretto tra vertice S e vertice libero
+                if etichetta[in_blossom[v]] == 0 and arco_migliore[v] != -1:
+                    d = scarto(arco_migliore[v])
+                    if tipo_delta == -1 or d < delta:
+                        delta = d
+                        tipo_delta = 2
+                        arco_delta = arco_migliore[v]
+
+            for b in range(2 * numero_vertici):
+                # Tipo 3: arco stretto tra due blossom S
+                if padre_blossom[b] == -1 and etichetta[b] == 1 and arco_migliore[b] != -1:
+                    d = scarto(arco_migliore[b]) // 2
+                    if tipo_delta == -1 or d < delta:
+                        delta = d
+                        tipo_delta = 3
+                        arco_delta = arco_migliore[b]
+
+            for b in range(numero_vertici, 2 * numero_vertici):
+                # Tipo 4: la duale di un blossom T arriva a zero
+                if (base_blossom[b] >= 0 and padre_blossom[b] == -1 and etichetta[b] == 2 and
+                        (tipo_delta == -1 or duale[b] < delta)):
+                    delta = duale[b]
+                    tipo_delta = 4
+                    blossom_delta = b
+
+            if tipo_delta == -1:
+                # Nessun progresso possibile: ultimo aggiornamento e fine
+                tipo_delta = 1
+                delta = max(0, min(duale[:numero_vertici]))
+
+            for v in range(numero_vertici):
+                if etichetta[in_blossom[v]] == 1:
+                    duale[v] -= delta
+                elif etichetta[in_blossom[v]] == 2:
+                    duale[v] += delta
+            for b in range(numero_vertici, 2 * numero_vertici):
+                if base_blossom[b] >= 0 and padre_blossom[b] == -1:
+                    if etichetta[b] == 1:
+                        duale[b] += delta
+                    elif etichetta[b] == 2:
+                        duale[b] -= delta
+
+            if tipo_delta == 1:
+                # Ottimo raggiunto
+                break
+            elif tipo_delta == 2:
+                arco_ammesso[arco_delta] = True
+                i, j, _ = archi[arco_delta]
+                if etichetta[in_blossom[i]] == 0:
+                    i, j = j, i
+                coda.append(i)
+            elif tipo_delta == 3:
+                arco_ammesso[arco_delta] = True
+                i, _, _ = archi[arco_delta]
+                coda.append(i)
+            elif tipo_delta == 4:
+                espandi_blossom(blossom_delta, False)
+
+        if not aumentato:
+            break
+
+        # Fine fase: espande i blossom S con duale nulla
+        for b in range(numero_vertici, 2 * numero_vertici):
+            if (padre_blossom[b] == -1 and base_blossom[b] >= 0 and
+                    etichetta[b] == 1 and duale[b] == 0):
+                espandi_blossom(b, True)
+
+    # Converte gli estremi in indici di vertice
+    for v in range(numero_vertici):
+        if compagno[v] >= 0:
+            compagno[v] = estremo[compagno[v]]
+
+    return compagno
@@ -0,0 +1,77 @@
+# Backend NumPy opzionale per le distanze Manhattan tra molti clienti
+# Senza NumPy installato tutte le funzioni chiamanti restano sul percorso Python puro
+from ..configurazione.costanti import STAZIONE, SOGLIA_BACKEND_NUMPY
+
+try:
+    import numpy as np
+    NUMPY_DISPONIBILE = True
+except ImportError:
+    np = None
+    NUMPY_DISPONIBILE = False
+
+
+def usa_backend_numpy(numero_elementi):
+    # Sotto soglia il costo di conversione supera il guadagno del calcolo vettoriale
+    return NUMPY_DISPONIBILE and numero_elementi >= SOGLIA_BACKEND_NUMPY
+
+
+def coordinate_clienti(clienti, lista_clienti):
+    # Matrice (N, 2) di interi: una riga (x, y) per cliente, nell'ordine di lista_clienti
+    return np.array([clienti[cliente] for cliente in lista_clienti], dtype=np.int64).reshape(-1, 2)
+
+
+def distanze_stazione_vettoriali(posizioni):
+    # Distanza Manhattan dalla stazione per ogni posizione, come lista di int Python
+    coordinate = np.array(posizioni, dtype=np.int64).reshape(-1, 2)
+    stazione = np.array(STAZIONE, dtype=np.int64)
+    return np.abs(coordinate - stazione).sum(axis=1).tolist()
+
+
+def coppie_entro_raggio_vettoriale(clienti, lista_clienti, raggio_max):
+    # SWEEP VETTORIALE: clienti ordinati per x, poi confronto di ogni cliente con quello
+    # k posizioni più avanti (k = 1, 2, ...) su tutto l'array in una sola operazione
+    # Un cliente esce dal confronto appena il k-esimo successivo dista più del raggio in x:
+    # il lavoro è proporzionale alle coppie nella striscia |dx| <= raggio, non a N²
+    # Stesso risultato e stesso ordine (i, j crescenti) del confronto diretto
+    numero_clienti = len(lista_clienti)
+    if numero_clienti < 2 or raggio_max < 0:
+        return []
+
+    coordinate = coordinate_clienti(clienti, lista_clienti)
+    ordine = np.argsort(coordinate[:, 0], kind='stable')
+    xs = coordinate[ordine, 0]
+    ys = coordinate[ordine, 1]
+
+    blocchi_i, blocchi_j, blocchi_distanze = [], [], []
+    attivi = np.arange(numero_clienti - 1)
+    scarto = 1
+    while attivi.size:
+        successivi = attivi + scarto
+        dx = xs[successivi] - xs[attivi]
+        nella_striscia = dx <= raggio_max
+        attivi, successivi, dx = attivi[nella_striscia], successivi[nella_striscia], dx[nella_striscia]
+
+        distanze = dx + np.abs(ys[successivi] - ys[attivi])
+        entro_raggio = distanze <= raggio_max
+        blocchi_i.append(ordine[attivi[entro_raggio]])
+        blocchi_j.append(ordine[successivi[entro_raggio]])
+        blocchi_distanze.append(distanze[entro_raggio])
+
+        # Chi non ha più un successivo a distanza scarto + 1 ha finito
+        scarto += 1
+        attivi = attivi[attivi + scarto < numero_clienti]
+
+    indici_a = np.concatenate(blocchi_i)
+    indici_b = np.concatenate(blocchi_j)
+    distanze = np.concatenate(blocchi_distanze)
+
+    # Indici riportati all'ordine di lista_clienti, con i < j come nel confronto diretto
+    indici_i = np.minimum(indici_a, indici_b)
+    indici_j = np.maximum(indici_a, indici_b)
+    ordinamento = np.lexsort((indici_j, indici_i))
+
+    return [
+        (dist, lista_clienti[i], lista_clienti[j])
+        for i, j, dist in zip(indici_i[ordinamento].tolist(), indici_j[ordinamento].tolist(),
+                              distanze[ordinamento].tolist())
+    ]
@@ -0,0 +1,271 @@
+import hashlib
+import os
+import zlib
+from array import array
+from collections import deque
+from pathlib import Path
+from .griglia import ottieni_griglia
+from ..configurazione.costanti import STAZIONE, CARTELLA_ETICHETTE_HUB
+
+# Etichette condivise, ricostruite (o ricaricate da disco) solo quando cambia la griglia
+_etichette_correnti = None
+
+ESTENSIONE_ETICHETTE = ".hub"
+
+
+def ottieni_etichette_hub(cartella=CARTELLA_ETICHETTE_HUB):
+    # Etichette per la griglia corrente: da disco se già calcolate, altrimenti
+    # preprocessing completo e salvataggio per i caricamenti successivi
+    global _etichette_correnti
+
+    griglia = ottieni_griglia()
+    if (_etichette_correnti is not None and _etichette_correnti.griglia is griglia and
+            _etichette_correnti.versione == griglia.versione):
+        return _etichette_correnti
+
+    percorso_file = None
+    if cartella is not None:
+        percorso_file = Path(cartella) / f"{nome_file_etichette(griglia)}{ESTENSIONE_ETICHETTE}"
+        etichette = carica_etichette_hub(percorso_file, griglia)
+        if etichette is not None:
+            _etichette_correnti = etichette
+            return etichette
+
+    _etichette_correnti = EtichetteHub(griglia)
+    if percorso_file is not None:
+        _etichette_correnti.salva(percorso_file)
+
+    return _etichette_correnti
+
+
+def distanza_hub(start, end):
+    # Distanza stradale esatta tramite etichette (alternativa a distanza_manhattan)
+    return ottieni_etichette_hub().distanza(start, end)
+
+
+def distanza_hub_stazione(pos):
+    # Metrica per gli ordinamenti: distanza stradale esatta dalla stazione
+    return ottieni_etichette_hub().distanza(pos, STAZIONE)
+
+
+def nome_file_etichette(griglia):
+    # Il nome del file dipende da dimensioni e celle bloccate: mappe diverse non si confondono
+    firma = hashlib.sha256(repr((griglia.larghezza, griglia.altezza)).encode("utf-8"))
+    firma.update(griglia.bloccate)
+    return firma.hexdigest()
+
+
+def ordine_per_dissezione(griglia):
+    # ORDINAMENTO PER DISSEZIONE: i separatori (righe/colonne centrali) dei rettangoli
+    # più grandi vengono per primi; ogni percorso che attraversa un separatore
+    # passa da una sua cella, che diventa un hub condiviso da molte etichette
+    ordine = []
+    regioni = deque([(0, griglia.larghezza, 0, griglia.altezza)])
+
+    while regioni:
+        x0, x1, y0, y1 = regioni.popleft()
+        if x0 >= x1 or y0 >= y1:
+            continue
+
+        if x1 - x0 >= y1 - y0:
+            centro = (x0 + x1) // 2
+            separatore = [(centro, y) for y in range(y0, y1)]
+            regioni.append((x0, centro, y0, y1))
+            regioni.append((centro + 1, x1, y0, y1))
+        else:
+            centro = (y0 + y1) // 2
+            separatore = [(x, centro) for x in range(x0, x1)]
+            regioni.append((x0, x1, y0, centro))
+            regioni.append((x0, x1, centro + 1, y1))
+
+        for pos in separatore:
+            id_cella = griglia.id_cella(pos)
+            if not griglia.bloccate[id_cella]:
+                ordine.append(id_cella)
+
+    return ordine
+
+
+class EtichetteHub:
+    # PRUNED LANDMARK LABELING (etichette a 2 hop) sulla griglia
+    # Ogni cella v ha un'etichetta {hub: distanza}; per ogni coppia (u, v) esiste un hub
+    # comune sul percorso minimo, quindi d(u, v) = min(d(u, h) + d(h, v)) sugli hub comuni
+    # Per ogni voce si conserva anche il prossimo passo verso l'hub: il percorso
+    # si ricostruisce seguendo i puntatori, senza alcuna ricerca
+
+    def __init__(self, griglia, calcola=True):
+        self.griglia = griglia
+        self.versione = griglia.versione
+        self.distanze = [None] * griglia.numero_celle  # {rango hub: distanza}
+        self.prossimi = [None] * griglia.numero_celle  # {rango hub: id cella successiva}
+        self.ordine = []
+        if calcola:
+            self.calcola()
+
+    def calcola(self):
+        # Una BFS per vertice nell'ordine di dissezione, potata appena l'etichetta
+        # già costruita dimostra una distanza non peggiore
+        griglia = self.griglia
+        tabella_vicini = griglia.vicini
+        self.ordine = ordine_per_dissezione(griglia)
+        for id_cella in self.ordine:
+            self.distanze[id_cella] = {}
+            self.prossimi[id_cella] = {}
+
+        distanze_bfs = array('i', [-1]) * griglia.numero_celle
+        distanze_da_hub = {}
+
+        for rango, hub in enumerate(self.ordine):
+            # Etichetta dell'hub indicizzata per rango: query di potatura in O(|etichetta|)
+            distanze_da_hub = self.distanze[hub]
+
+            distanze_bfs[hub] = 0
+            visitati = [hub]
+            coda = deque([(hub, hub)])
+
+            while coda:
+                nodo, precedente = coda.popleft()
+                distanza = distanze_bfs[nodo]
+
+                etichetta = self.distanze[nodo]
+                potato = False
+                for rango_comune, distanza_comune in etichetta.items():
+                    distanza_hub = distanze_da_hub.get(rango_comune)
+                    if distanza_hub is not None and distanza_hub + distanza_comune <= distanza:
+                        potato = True
+                        break
+                if potato:
+                    continue
+
+                etichetta[rango] = distanza
+                self.prossimi[nodo][rango] = precedente
+
+                for vicino in tabella_vicini[nodo]:
+                    if distanze_bfs[vicino] < 0:
+                        distanze_bfs[vicino] = distanza + 1
+                        visitati.append(vicino)
+                        coda.append((vicino, nodo))
+
+            for nodo in visitati:
+                distanze_bfs[nodo] = -1
+
+    def hub_migliore(self, id_start, id_end):
+        # (distanza, rango hub) minimi sugli hub comuni, (inf, -1) se non collegate
+        etichetta_start = self.distanze[id_start]
+        etichetta_end = self.distanze[id_end]
+        if etichetta_start is None or etichetta_end is None:
+            return float('inf'), -1
+
+        if len(etichetta_start) > len(etichetta_end):
+            etichetta_start, etichetta_end = etichetta_end, etichetta_start
+
+        migliore, rango_migliore = float('inf'), -1
+        for rango, distanza in etichetta_start.items():
+            distanza_end = etichetta_end.get(rango)
+            if distanza_end is not None and distanza + distanza_end < migliore:
+                migliore, rango_migliore = distanza + distanza_end, rango
+        return migliore, rango_migliore
+
+    def distanza(self, start, end):
+        # Distanza esatta in passi, infinito se non raggiungibile
+        if start == end:
+            return 0
+        if not self.griglia.contiene(start) or not self.griglia.contiene(end):
+            return float('inf')
+        distanza, _ = self.hub_migliore(self.griglia.id_cella(start), self.griglia.id_cella(end))
+        return distanza
+
+    def percorso(self, start, end):
+        # Stesso formato di percorso_astar: solo i nodi intermedi
+        # start -> hub seguendo i prossimi passi, poi hub -> end (ramo di end al contrario)
+        if start == end:
+            return []
+        if not self.griglia.contiene(start) or not self.griglia.contiene(end):
+            return []
+
+        id_start = self.griglia.id_cella(start)
+        id_end = self.griglia.id_cella(end)
+        _, rango = self.hub_migliore(id_start, id_end)
+        if rango < 0:
+            return []
+
+        andata = self.risali_verso_hub(id_start, rango)
+        ritorno = self.risali_verso_hub(id_end, rango)
+        ritorno.pop()  # L'hub compare già in fondo all'andata
+        ritorno.reverse()
+
+        celle = andata + ritorno
+        return [self.griglia.posizione(id_cella) for id_cella in celle[1:-1]]
+
+    def risali_verso_hub(self, id_cella, rango):
+        # Celle da id_cella all'hub incluso: ogni nodo intermedio ha una voce per lo stesso hub
+        hub = self.ordine[rango]
+        celle = [id_cella]
+        while id_cella != hub:
+            id_cella = self.prossimi[id_cella][rango]
+            celle.append(id_cella)
+        return celle
+
+    def salva(self, percorso_file):
+        # Formato binario compatto: array piatti (offset, hub, distanze, prossimi) compressi
+        offset = array('i', [0])
+        hub = array('i')
+        distanze = array('i')
+        prossimi = array('i')
+        for id_cella in range(self.griglia.numero_celle):
+            etichetta = self.distanze[id_cella] or {}
+            for rango, distanza in etichetta.items():
+                hub.append(rango)
+                distanze.append(distanza)
+                prossimi.append(self.prossimi[id_cella][rango])
+            offset.append(len(hub))
+
+        blocchi = [array('i', self.ordine), offset, hub, distanze, prossimi]
+        intestazione = array('i', [len(blocco) for blocco in blocchi])
+        dati = intestazione.tobytes() + b"".join(blocco.tobytes() for blocco in blocchi)
+
+        try:
+            percorso_file = Path(percorso_file)
+            percorso_file.parent.mkdir(parents=True, exist_ok=True)
+            percorso_temporaneo = percorso_file.with_suffix(".tmp")
+            with open(percorso_temporaneo, "wb") as file:
+                file.write(zlib.compress(dati))
+            os.replace(percorso_temporaneo, percorso_file)
+        except OSError as e:
+            print(f"[WARNING] Impossibile salvare le etichette hub: {e}")
+
+
+def carica_etichette_hub(percorso_file, griglia):
+    # Etichette salvate con EtichetteHub.salva, None se assenti o non valide
+    try:
+        with open(percorso_file, "rb") as file:
+            dati = zlib.decompress(file.read())
+    except (OSError, zlib.error):
+        return None
+
+    try:
+        intestazione = array('i')
+        intestazione.frombytes(dati[:5 * intestazione.itemsize])
+        blocchi = []
+        inizio = len(intestazione) * intestazione.itemsize
+        for lunghezza in intestazione:
+            blocco = array('i')
+            fine = inizio + lunghezza * blocco.itemsize
+            blocco.frombytes(dati[inizio:fine])
+            blocchi.append(blocco)
+            inizio = fine
+        ordine, offset, hub, distanze, prossimi = blocchi
+        if len(offset) != griglia.numero_celle + 1:
+            return None
+    except ValueError:
+        print(f"[WARNING] File etichette hub non valido: {percorso_file}")
+        return None
+
+    etichette = EtichetteHub(griglia, calcola=False)
+    etichette.ordine = list(ordine)
+    for id_cella in etichette.ordine:
+        da, a = offset[id_cella], offset[id_cella + 1]
+        etichette.distanze[id_cella] = dict(zip(hub[da:a], distanze[da:a]))
+        etichette.prossimi[id_cella] = dict(zip(hub[da:a], prossimi[da:a]))
+
+    return etichette
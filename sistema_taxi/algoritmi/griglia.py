@@ -0,0 +1,378 @@
+import bisect
+import weakref
+from array import array
+from collections import deque
+from ..configurazione import costanti
+
+# Griglia condivisa, ricostruita solo quando cambiano dimensioni o ostacoli
+_griglia_corrente = None
+_chiave_griglia = None
+_ostacoli_griglia = None  # Copia di OSTACOLI da cui è stata costruita la griglia corrente
+
+# Contatore delle modifiche a OSTACOLI fatte fuori da blocca_cella/libera_cella
+_versione_ostacoli = 0
+
+# Movimenti ortogonali ammessi: destra, sinistra, giù, su
+MOVIMENTI_ORTOGONALI = [(1, 0), (-1, 0), (0, 1), (0, -1)]
+
+
+def firma_griglia():
+    # FIRMA GRIGLIA: identifica univocamente dimensioni e insieme di ostacoli
+    # Se cambia anche solo un ostacolo le strutture precalcolate non sono più valide
+    return (
+        costanti.GRIGLIA_LARGHEZZA,
+        costanti.GRIGLIA_ALTEZZA,
+        frozenset(tuple(ostacolo) for ostacolo in costanti.OSTACOLI)
+    )
+
+
+def chiave_griglia():
+    # CONTROLLO O(1): dimensioni, identità e lunghezza della lista OSTACOLI e contatore
+    # delle modifiche; le modifiche sul posto a lunghezza invariata le rileva griglia_aggiornata()
+    return (costanti.GRIGLIA_LARGHEZZA, costanti.GRIGLIA_ALTEZZA,
+            id(costanti.OSTACOLI), len(costanti.OSTACOLI), _versione_ostacoli)
+
+
+def segnala_modifica_ostacoli():
+    # La prossima ottieni_griglia() ricostruisce la griglia da OSTACOLI
+    global _versione_ostacoli
+    _versione_ostacoli += 1
+
+
+def griglia_aggiornata(chiave):
+    # Chiave diversa: griglia da ricostruire senza guardare gli ostacoli
+    # Chiave uguale: confronto con la copia salvata, che rileva anche OSTACOLI[i] = nuova cella
+    # Gli elementi non modificati sono gli stessi oggetti: il confronto si ferma all'identità
+    return (_griglia_corrente is not None and _chiave_griglia == chiave
+            and costanti.OSTACOLI == _ostacoli_griglia)
+
+
+def ottieni_griglia():
+    # Restituisce la griglia compatta per la configurazione corrente
+    # La ricostruisce automaticamente se OSTACOLI o le dimensioni sono cambiati
+    global _griglia_corrente
+
+    chiave = chiave_griglia()
+    if not griglia_aggiornata(chiave):
+        _griglia_corrente = Griglia(costanti.GRIGLIA_LARGHEZZA, costanti.GRIGLIA_ALTEZZA, costanti.OSTACOLI)
+        aggiorna_chiave_griglia()
+
+    return _griglia_corrente
+
+
+def aggiorna_chiave_griglia():
+    # Dopo una modifica già applicata alla griglia corrente: OSTACOLI e griglia coincidono
+    global _chiave_griglia, _ostacoli_griglia
+    _chiave_griglia = chiave_griglia()
+    _ostacoli_griglia = list(costanti.OSTACOLI)
+
+
+def blocca_cella(pos):
+    # CHIUSURA STRADA a runtime: aggiorna OSTACOLI e la griglia corrente sul posto
+    # La griglia resta lo stesso oggetto: le strutture derivate si riparano
+    # leggendo il registro delle modifiche invece di ripartire da zero
+    global _chiave_griglia
+    griglia = ottieni_griglia()
+    if not griglia.blocca(pos):
+        return False
+
+    # Stessa cella in OSTACOLI e nella copia: niente ricopia dell'intera lista
+    cella = tuple(pos)
+    costanti.OSTACOLI.append(cella)
+    _ostacoli_griglia.append(cella)
+    _chiave_griglia = chiave_griglia()
+    return True
+
+
+def libera_cella(pos):
+    # RIAPERTURA STRADA a runtime: inverso di blocca_cella
+    griglia = ottieni_griglia()
+    if not griglia.libera(pos):
+        return False
+
+    costanti.OSTACOLI[:] = [ostacolo for ostacolo in costanti.OSTACOLI if tuple(ostacolo) != tuple(pos)]
+    aggiorna_chiave_griglia()
+    return True
+
+
+class Griglia:
+    # Griglia compatta: celle come id interi piatti (y * larghezza + x)
+    # Ostacoli in un bytearray e tabella dei vicini precalcolata una sola volta
+
+    def __init__(self, larghezza, altezza, ostacoli=()):
+        self.larghezza = larghezza
+        self.altezza = altezza
+        self.numero_celle = larghezza * altezza
+
+        # 1 = cella bloccata, 0 = cella percorribile
+        self.bloccate = bytearray(self.numero_celle)
+        for ostacolo in ostacoli:
+            if self.contiene(ostacolo):
+                self.bloccate[self.id_cella(ostacolo)] = 1
+
+        self.vicini = self.calcola_tabella_vicini()
+        self.dimensioni_componenti = {}  # {etichetta: numero di celle}
+        self.prossima_etichetta = 0
+        self.componenti = self.calcola_componenti()
+
+        # Registro delle modifiche dinamiche: (versione, id cella, bloccata), in ordine di versione
+        # Conservato solo per i lettori registrati (dati derivati riparati leggendo il registro),
+        # accorciato appena tutti hanno superato una versione e svuotato quando non ne resta nessuno
+        self.versione = 0
+        self.modifiche = []
+        self.lettori = weakref.WeakKeyDictionary()  # {lettore: versione già letta}
+
+    def calcola_tabella_vicini(self):
+        # ADIACENZA PRECALCOLATA: per ogni cella la tupla degli id vicini percorribili
+        # Le celle bloccate hanno tupla vuota, così la ricerca non le espande mai
+        # Gli id sono presi da un'unica lista per condividere gli oggetti int
+        larghezza = self.larghezza
+        bloccate = self.bloccate
+        ids = list(range(self.numero_celle))
+        vicini = [()] * self.numero_celle
+
+        for id_cella in ids:
+            if bloccate[id_cella]:
+                continue
+
+            y, x = divmod(id_cella, larghezza)
+            adiacenti = []
+            for dx, dy in MOVIMENTI_ORTOGONALI:
+                nx, ny = x + dx, y + dy
+                if 0 <= nx < larghezza and 0 <= ny < self.altezza:
+                    id_vicino = ids[ny * larghezza + nx]
+                    if not bloccate[id_vicino]:
+                        adiacenti.append(id_vicino)
+            vicini[id_cella] = tuple(adiacenti)
+
+        return vicini
+
+    def calcola_componenti(self):
+        # COMPONENTI CONNESSE: etichetta per cella, stessa etichetta = raggiungibili tra loro
+        # Una visita O(celle) al caricamento; -1 per le celle bloccate
+        # Le modifiche dinamiche aggiornano solo le componenti toccate (apri/chiudi_componente)
+        componenti = array('i', [-1]) * self.numero_celle
+        tabella_vicini = self.vicini
+        etichetta = 0
+        self.dimensioni_componenti = {}
+
+        for id_cella in range(self.numero_celle):
+            if self.bloccate[id_cella] or componenti[id_cella] >= 0:
+                continue
+
+            componenti[id_cella] = etichetta
+            da_visitare = [id_cella]
+            dimensione = 1
+            while da_visitare:
+                nodo = da_visitare.pop()
+                for vicino in tabella_vicini[nodo]:
+                    if componenti[vicino] < 0:
+                        componenti[vicino] = etichetta
+                        da_visitare.append(vicino)
+                        dimensione += 1
+            self.dimensioni_componenti[etichetta] = dimensione
+            etichetta += 1
+
+        self.prossima_etichetta = etichetta
+        return componenti
+
+    def nuova_etichetta(self, dimensione):
+        etichetta = self.prossima_etichetta
+        self.prossima_etichetta += 1
+        self.dimensioni_componenti[etichetta] = dimensione
+        return etichetta
+
+    def rietichetta(self, partenza, vecchia, nuova):
+        # Visita la componente di partenza (etichetta vecchia) assegnando l'etichetta nuova
+        componenti = self.componenti
+        tabella_vicini = self.vicini
+        componenti[partenza] = nuova
+        da_visitare = [partenza]
+        while da_visitare:
+            nodo = da_visitare.pop()
+            for vicino in tabella_vicini[nodo]:
+                if componenti[vicino] == vecchia:
+                    componenti[vicino] = nuova
+                    da_visitare.append(vicino)
+
+    def apri_componente(self, id_cella):
+        # CELLA RIAPERTA: unisce al più 4 componenti vicine
+        # Si rietichettano solo le componenti più piccole, la più grande tiene la sua etichetta
+        etichette = {self.componenti[vicino] for vicino in self.vicini[id_cella]}
+        if not etichette:
+            self.componenti[id_cella] = self.nuova_etichetta(1)
+            return
+
+        dimensioni = self.dimensioni_componenti
+        principale = max(etichette, key=lambda etichetta: dimensioni[etichetta])
+        self.componenti[id_cella] = principale
+        dimensioni[principale] += 1
+
+        for vicino in self.vicini[id_cella]:
+            etichetta = self.componenti[vicino]
+            if etichetta != principale:
+                self.rietichetta(vicino, etichetta, principale)
+                dimensioni[principale] += dimensioni.pop(etichetta)
+
+    def chiudi_componente(self, id_cella):
+        # CELLA CHIUSA: la sua componente può spezzarsi in al più 4 parti
+        # Visite in parallelo dai vicini liberi, un nodo per volta ciascuna: visite che si
+        # incontrano si fondono, una visita esaurita è una parte staccata e riceve una nuova
+        # etichetta; ci si ferma quando resta una sola visita, che tiene l'etichetta originale
+        # Il lavoro è proporzionale alle parti staccate (le più piccole), non alla componente
+        componenti = self.componenti
+        tabella_vicini = self.vicini
+        etichetta = componenti[id_cella]
+        componenti[id_cella] = -1
+        self.dimensioni_componenti[etichetta] -= 1
+
+        partenze = [vicino for vicino in self.celle_adiacenti(id_cella) if not self.bloccate[vicino]]
+        if not partenze:
+            del self.dimensioni_componenti[etichetta]
+            return
+        if len(partenze) == 1:
+            return
+
+        gruppo_cella = {}
+        padri = list(range(len(partenze)))
+        frontiere = []
+        visitate = []
+        for gruppo, partenza in enumerate(partenze):
+            gruppo_cella[partenza] = gruppo
+            frontiere.append(deque([partenza]))
+            visitate.append([partenza])
+
+        def radice(gruppo):
+            while padri[gruppo] != gruppo:
+                padri[gruppo] = padri[padri[gruppo]]
+                gruppo = padri[gruppo]
+            return gruppo
+
+        attivi = list(range(len(partenze)))
+        while len(attivi) > 1:
+            for gruppo in list(attivi):
+                if len(attivi) <= 1:
+                    break
+                if gruppo not in attivi:
+                    continue
+
+                if not frontiere[gruppo]:
+                    # Parte staccata: nuova etichetta alle sole celle visitate
+                    nuova = self.nuova_etichetta(len(visitate[gruppo]))
+                    for cella in visitate[gruppo]:
+                        componenti[cella] = nuova
+                    self.dimensioni_componenti[etichetta] -= len(visitate[gruppo])
+                    attivi.remove(gruppo)
+                    continue
+
+                nodo = frontiere[gruppo].popleft()
+                for vicino in tabella_vicini[nodo]:
+                    altro = gruppo_cella.get(vicino)
+                    if altro is None:
+                        gruppo_cella[vicino] = gruppo
+                        visitate[gruppo].append(vicino)
+                        frontiere[gruppo].append(vicino)
+                        continue
+
+                    altro = radice(altro)
+                    if altro != gruppo:
+                        # Le due visite si toccano: stessa parte, si prosegue con una sola
+                        padri[altro] = gruppo
+                        frontiere[gruppo].extend(frontiere[altro])
+                        visitate[gruppo].extend(visitate[altro])
+                        attivi.remove(altro)
+
+    def blocca(self, pos):
+        # True se la cella era libera ed è stata chiusa
+        return self.imposta_ostacolo(pos, True)
+
+    def libera(self, pos):
+        # True se la cella era bloccata ed è stata riaperta
+        return self.imposta_ostacolo(pos, False)
+
+    def imposta_ostacolo(self, pos, bloccata):
+        if not self.contiene(pos):
+            raise ValueError(f"Cella {pos} fuori dalla griglia {self.larghezza}x{self.altezza}")
+
+        id_cella = self.id_cella(pos)
+        if bool(self.bloccate[id_cella]) == bloccata:
+            return False
+
+        self.bloccate[id_cella] = 1 if bloccata else 0
+
+        # Solo la cella e i suoi 4 vicini cambiano adiacenza
+        for id_aggiornare in (id_cella,) + self.celle_adiacenti(id_cella):
+            self.vicini[id_aggiornare] = self.vicini_cella(id_aggiornare)
+        if bloccata:
+            self.chiudi_componente(id_cella)
+        else:
+            self.apri_componente(id_cella)
+
+        self.versione += 1
+        if self.lettori:
+            self.modifiche.append((self.versione, id_cella, bloccata))
+        else:
+            # Lettori tutti raccolti dal garbage collector: nessuno leggerà il registro
+            self.modifiche = []
+        return True
+
+    def registra_lettore(self, lettore):
+        # Il lettore riceverà le modifiche successive alla versione corrente
+        if not self.lettori:
+            self.modifiche = []
+        self.lettori[lettore] = self.versione
+
+    def modifiche_da(self, versione):
+        # Modifiche successive alla versione indicata, in ordine
+        # Inizio cercato per versione (bisezione): corretto anche se il registro ha dei buchi
+        inizio = bisect.bisect_right(self.modifiche, (versione, float('inf')))
+        return self.modifiche[inizio:]
+
+    def conferma_lettura(self, lettore, versione):
+        # Il lettore è aggiornato a versione: le modifiche già lette da tutti si scartano
+        self.lettori[lettore] = versione
+        versione_minima = min(self.lettori.values())
+        if self.modifiche and self.modifiche[0][0] <= versione_minima:
+            self.modifiche = self.modifiche_da(versione_minima)
+
+    def celle_adiacenti(self, id_cella):
+        # Id delle celle ortogonali dentro la griglia, bloccate comprese
+        y, x = divmod(id_cella, self.larghezza)
+        adiacenti = []
+        for dx, dy in MOVIMENTI_ORTOGONALI:
+            nx, ny = x + dx, y + dy
+            if 0 <= nx < self.larghezza and 0 <= ny < self.altezza:
+                adiacenti.append(ny * self.larghezza + nx)
+        return tuple(adiacenti)
+
+    def vicini_cella(self, id_cella):
+        if self.bloccate[id_cella]:
+            return ()
+        return tuple(id_vicino for id_vicino in self.celle_adiacenti(id_cella)
+                     if not self.bloccate[id_vicino])
+
+    def componente(self, pos):
+        # Etichetta della componente, -1 se fuori griglia o bloccata
+        if not self.contiene(pos):
+            return -1
+        return self.componenti[self.id_cella(pos)]
+
+    def raggiungibile(self, start, end):
+        # O(1): esiste un percorso solo se le due celle stanno nella stessa componente
+        componente_start = self.componente(start)
+        return componente_start >= 0 and componente_start == self.componente(end)
+
+    def contiene(self, pos):
+        x, y = pos
+        return 0 <= x < self.larghezza and 0 <= y < self.altezza
+
+    def id_cella(self, pos):
+        return pos[1] * self.larghezza + pos[0]
+
+    def posizione(self, id_cella):
+        y, x = divmod(id_cella, self.larghezza)
+        return (x, y)
+
+    def percorribile(self, pos):
+        # Dentro i confini e non bloccata: O(1) indipendentemente dal numero di ostacoli
+        return self.contiene(pos) and not self.bloccate[self.id_cella(pos)]
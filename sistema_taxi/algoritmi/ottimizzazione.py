@@ -1,19 +1,56 @@
 # Algoritmo di accoppiamento clienti basato su distanza Manhattan
 from .ricerca_percorso import distanza_manhattan
-from ..configurazione.costanti import STAZIONE, RAGGIO_ACCOPPIAMENTO_DEFAULT
+from .abbinamento_pesato import abbinamento_peso_massimo
+from .distanze_vettoriali import (
+    usa_backend_numpy, distanze_stazione_vettoriali, coppie_entro_raggio_vettoriale
+)
+from ..configurazione.costanti import (
+    STAZIONE, RAGGIO_ACCOPPIAMENTO_DEFAULT, SOGLIA_INDICE_SPAZIALE, SOGLIA_RIORDINO_ESATTO,
+    STRATEGIA_ACCOPPIAMENTO_GREEDY, STRATEGIA_ACCOPPIAMENTO_OTTIMA, STRATEGIA_ACCOPPIAMENTO_DEFAULT
+)
 
-def trova_coppie_clienti(clienti, raggio_max=RAGGIO_ACCOPPIAMENTO_DEFAULT):
-    # Trova coppie di clienti entro il raggio massimo usando solo distanza Manhattan
+def distanza_manhattan_stazione(pos):
+    # Metrica di default per gli ordinamenti: distanza Manhattan dalla stazione
+    return distanza_manhattan(pos, STAZIONE)
+
+
+def distanze_dalla_stazione(posizioni, distanza_stazione=None):
+    # Distanze dalla stazione per una lista di posizioni, nello stesso ordine
+    # Con la metrica Manhattan e molte posizioni il calcolo è vettoriale (NumPy)
+    if distanza_stazione is None:
+        distanza_stazione = distanza_manhattan_stazione
+    
+    if distanza_stazione is distanza_manhattan_stazione and usa_backend_numpy(len(posizioni)):
+        return distanze_stazione_vettoriali(posizioni)
+    return [distanza_stazione(pos) for pos in posizioni]
+
+
+def trova_coppie_clienti(clienti, raggio_max=RAGGIO_ACCOPPIAMENTO_DEFAULT, distanza_stazione=None,
+                         strategia=STRATEGIA_ACCOPPIAMENTO_DEFAULT, distanza_coppia=None):
+    # Trova coppie di clienti entro il raggio massimo usando distanza Manhattan
+    # distanza_stazione: metrica per l'ordinamento (es. distanza_stradale_stazione)
+    # strategia: greedy (veloce) oppure ottima (costo totale minimo), default in costanti
+    # distanza_coppia: distanza reale tra clienti (es. distanza_hub), default Manhattan
     lista_clienti = sorted(clienti.keys())
     
     # Trova tutte le coppie possibili entro il raggio
-    coppie_possibili = trova_coppie_vicine(clienti, lista_clienti, raggio_max)
-    
-    # Ordina per distanza dalla stazione (più vicini alla stazione prima)
-    coppie_ordinate = ordina_per_distanza_stazione(coppie_possibili, clienti)
+    coppie_possibili = trova_coppie_vicine(clienti, lista_clienti, raggio_max, distanza_coppia)
     
-    # Seleziona coppie senza sovrapposizioni
-    coppie_finali, clienti_usati = seleziona_coppie_senza_sovrapposizioni(coppie_ordinate)
+    if strategia == STRATEGIA_ACCOPPIAMENTO_GREEDY:
+        # Ordina per distanza dalla stazione (più vicini alla stazione prima)
+        coppie_ordinate = ordina_per_distanza_stazione(coppie_possibili, clienti, distanza_stazione)
+        
+        # Seleziona coppie senza sovrapposizioni
+        coppie_finali, clienti_usati = seleziona_coppie_senza_sovrapposizioni(coppie_ordinate)
+    elif strategia == STRATEGIA_ACCOPPIAMENTO_OTTIMA:
+        # Abbinamento di costo minimo, poi stesso ordine di servizio del greedy
+        coppie_scelte, clienti_usati = seleziona_coppie_costo_minimo(
+            coppie_possibili, clienti, distanza_stazione
+        )
+        coppie_ordinate = ordina_per_distanza_stazione(coppie_scelte, clienti, distanza_stazione)
+        coppie_finali = [(cliente1, cliente2) for _, cliente1, cliente2 in coppie_ordinate]
+    else:
+        raise ValueError(f"Strategia di accoppiamento sconosciuta: {strategia}")
     
     # Clienti rimasti senza coppia (andranno su taxi singoli)
     clienti_singoli = sorted([
@@ -24,8 +61,33 @@ def trova_coppie_clienti(clienti, raggio_max=RAGGIO_ACCOPPIAMENTO_DEFAULT):
     return coppie_finali, clienti_singoli
 
 
-def trova_coppie_vicine(clienti, lista_clienti, raggio_max):
+def trova_coppie_vicine(clienti, lista_clienti, raggio_max, distanza_coppia=None):
     # Trova tutte le coppie di clienti entro il raggio
+    # Pochi clienti: confronto diretto; molti clienti: matrice NumPy a blocchi se
+    # disponibile, altrimenti indice spaziale a bucket
+    if usa_backend_numpy(len(lista_clienti)):
+        coppie_vicine = coppie_entro_raggio_vettoriale(clienti, lista_clienti, raggio_max)
+    elif len(lista_clienti) < SOGLIA_INDICE_SPAZIALE:
+        coppie_vicine = trova_coppie_vicine_forza_bruta(clienti, lista_clienti, raggio_max)
+    else:
+        coppie_vicine = trova_coppie_vicine_indice_spaziale(clienti, lista_clienti, raggio_max)
+    
+    if distanza_coppia is None:
+        return coppie_vicine
+    
+    # La distanza stradale non è mai minore di quella Manhattan: le candidate Manhattan
+    # sono un filtro esatto, poi si tengono quelle entro il raggio anche su strada
+    coppie_stradali = []
+    for _, cliente1, cliente2 in coppie_vicine:
+        dist = distanza_coppia(clienti[cliente1], clienti[cliente2])
+        if dist <= raggio_max:
+            coppie_stradali.append((dist, cliente1, cliente2))
+    
+    return coppie_stradali
+
+
+def trova_coppie_vicine_forza_bruta(clienti, lista_clienti, raggio_max):
+    # Confronta ogni coppia di clienti: O(n²)
     coppie_vicine = []
     
     for i in range(len(lista_clienti)):
@@ -44,16 +106,63 @@ def trova_coppie_vicine(clienti, lista_clienti, raggio_max):
     return coppie_vicine
 
 
-def ordina_per_distanza_stazione(coppie_vicine, clienti):
+def costruisci_indice_spaziale(clienti, lista_clienti, lato_bucket):
+    # SPATIAL HASH: raggruppa i clienti in bucket quadrati di lato lato_bucket
+    # Chiave (x // lato, y // lato) -> indici dei clienti in lista_clienti
+    indice = {}
+    for i, cliente in enumerate(lista_clienti):
+        x, y = clienti[cliente]
+        chiave = (x // lato_bucket, y // lato_bucket)
+        if chiave not in indice:
+            indice[chiave] = []
+        indice[chiave].append(i)
+    return indice
+
+
+def trova_coppie_vicine_indice_spaziale(clienti, lista_clienti, raggio_max):
+    # Con bucket di lato raggio_max due clienti entro il raggio stanno sempre
+    # nello stesso bucket o in uno degli 8 adiacenti: si confrontano solo quelli
+    if raggio_max < 0:
+        return []
+    
+    lato_bucket = max(1, raggio_max)
+    indice = costruisci_indice_spaziale(clienti, lista_clienti, lato_bucket)
+    
+    coppie_indici = []
+    for (bucket_x, bucket_y), indici_bucket in indice.items():
+        for dx in (-1, 0, 1):
+            for dy in (-1, 0, 1):
+                indici_vicini = indice.get((bucket_x + dx, bucket_y + dy))
+                if not indici_vicini:
+                    continue
+                
+                for i in indici_bucket:
+                    pos_i = clienti[lista_clienti[i]]
+                    for j in indici_vicini:
+                        # Ogni coppia viene considerata una sola volta (i < j)
+                        if j <= i:
+                            continue
+                        dist = distanza_manhattan(pos_i, clienti[lista_clienti[j]])
+                        if dist <= raggio_max:
+                            coppie_indici.append((i, j, dist))
+    
+    # Stesso ordine del confronto diretto: per (i, j) crescenti
+    coppie_indici.sort()
+    
+    return [
+        (dist, lista_clienti[i], lista_clienti[j])
+        for i, j, dist in coppie_indici
+    ]
+
+
+def ordina_per_distanza_stazione(coppie_vicine, clienti, distanza_stazione=None):
     # Ordina coppie per distanza totale dalla stazione (più vicine prima)
+    distanze1 = distanze_dalla_stazione([clienti[coppia[1]] for coppia in coppie_vicine], distanza_stazione)
+    distanze2 = distanze_dalla_stazione([clienti[coppia[2]] for coppia in coppie_vicine], distanza_stazione)
+    
     coppie_con_distanza = []
-    for coppia in coppie_vicine:
-        dist, cliente1, cliente2 = coppia
-        
-        dist_stazione1 = distanza_manhattan(clienti[cliente1], STAZIONE)
-        dist_stazione2 = distanza_manhattan(clienti[cliente2], STAZIONE)
+    for coppia, dist_stazione1, dist_stazione2 in zip(coppie_vicine, distanze1, distanze2):
         dist_totale_stazione = dist_stazione1 + dist_stazione2
-        
         coppie_con_distanza.append((dist_totale_stazione, coppia))
     
     coppie_con_distanza.sort()
@@ -79,15 +188,77 @@ def seleziona_coppie_senza_sovrapposizioni(coppie_ordinate):
     return coppie_scelte, clienti_usati
 
 
-def ordina_clienti_per_distanza_stazione(clienti, posizioni):
-    # Ordina clienti per distanza Manhattan dalla stazione
+def seleziona_coppie_costo_minimo(coppie_vicine, clienti, distanza_stazione=None):
+    # ACCOPPIAMENTO OTTIMO: minimizza i passi totali di tutti i viaggi
+    # Viaggi separati: 2·d(a) + 2·d(b) - viaggio condiviso: d(a) + d(a,b) + d(b)
+    # Costo minimo = abbinamento di peso massimo con peso d(a) + d(b) - d(a,b)
+    distanze1 = distanze_dalla_stazione([clienti[coppia[1]] for coppia in coppie_vicine], distanza_stazione)
+    distanze2 = distanze_dalla_stazione([clienti[coppia[2]] for coppia in coppie_vicine], distanza_stazione)
+    
+    # Solo le coppie che fanno davvero risparmiare entrano nel grafo
+    archi_utili = []
+    for coppia, dist_stazione1, dist_stazione2 in zip(coppie_vicine, distanze1, distanze2):
+        dist = coppia[0]
+        risparmio = dist_stazione1 + dist_stazione2 - dist
+        if risparmio > 0 and risparmio != float('inf'):
+            archi_utili.append((int(risparmio), coppia))
+    
+    coppie_scelte = []
+    clienti_usati = set()
+    
+    # Il grafo delle coppie candidate è sparso: ogni componente connessa
+    # si risolve separatamente (blossom O(n³) solo sulla componente)
+    for archi_componente in raggruppa_per_componente(archi_utili):
+        indici = {}
+        archi_locali = []
+        for risparmio, (_, cliente1, cliente2) in archi_componente:
+            i = indici.setdefault(cliente1, len(indici))
+            j = indici.setdefault(cliente2, len(indici))
+            archi_locali.append((i, j, risparmio))
+        
+        compagno = abbinamento_peso_massimo(archi_locali)
+        
+        for risparmio, coppia in archi_componente:
+            _, cliente1, cliente2 = coppia
+            if compagno[indici[cliente1]] == indici[cliente2]:
+                coppie_scelte.append(coppia)
+                clienti_usati.add(cliente1)
+                clienti_usati.add(cliente2)
+    
+    return coppie_scelte, clienti_usati
+
+
+def raggruppa_per_componente(archi_utili):
+    # UNION-FIND sui clienti: raggruppa gli archi per componente connessa
+    padre = {}
+    
+    def radice(cliente):
+        while padre[cliente] != cliente:
+            padre[cliente] = padre[padre[cliente]]
+            cliente = padre[cliente]
+        return cliente
+    
+    for _, (_, cliente1, cliente2) in archi_utili:
+        padre.setdefault(cliente1, cliente1)
+        padre.setdefault(cliente2, cliente2)
+        radice1, radice2 = radice(cliente1), radice(cliente2)
+        if radice1 != radice2:
+            padre[radice2] = radice1
+    
+    componenti = {}
+    for arco in archi_utili:
+        componenti.setdefault(radice(arco[1][1]), []).append(arco)
+    
+    return list(componenti.values())
+
+
+def ordina_clienti_per_distanza_stazione(clienti, posizioni, distanza_stazione=None):
+    # Ordina clienti per distanza dalla stazione (Manhattan se non specificata)
     if not clienti:
         return []
     
-    clienti_con_distanza = []
-    for cliente in clienti:
-        distanza = distanza_manhattan(posizioni[cliente], STAZIONE)
-        clienti_con_distanza.append((distanza, cliente))
+    distanze = distanze_dalla_stazione([posizioni[cliente] for cliente in clienti], distanza_stazione)
+    clienti_con_distanza = list(zip(distanze, clienti))
     
     clienti_con_distanza.sort()
     
@@ -98,3 +269,115 @@ def ordina_clienti_per_distanza_stazione(clienti, posizioni):
     return ordine
 
 
+def ordina_tappe_percorso(partenza, tappe, arrivo, distanza):
+    # Ordine di visita delle tappe che minimizza partenza -> tappe -> arrivo
+    # arrivo None: percorso aperto, termina sull'ultima tappa
+    # distanza(a, b): oracolo dei percorsi minimi (es. TabellaPercorsi.distanza)
+    # Poche tappe: programmazione dinamica esatta; molte: nearest neighbour + 2-opt
+    # L'ordine originale viene mantenuto se nessun riordino lo migliora
+    tappe = list(tappe)
+    if len(tappe) <= 1:
+        return tappe
+
+    if len(tappe) <= SOGLIA_RIORDINO_ESATTO:
+        ordine = ordina_tappe_esatto(partenza, tappe, arrivo, distanza)
+    else:
+        ordine = ordina_tappe_due_opt(partenza, tappe, arrivo, distanza)
+
+    if costo_visita(partenza, ordine, arrivo, distanza) < costo_visita(partenza, tappe, arrivo, distanza):
+        return ordine
+    return tappe
+
+
+def costo_visita(partenza, ordine, arrivo, distanza):
+    # Passi totali per visitare le tappe nell'ordine dato
+    costo = 0
+    posizione = partenza
+    for tappa in ordine:
+        costo += distanza(posizione, tappa)
+        posizione = tappa
+    if arrivo is not None:
+        costo += distanza(posizione, arrivo)
+    return costo
+
+
+def ordina_tappe_esatto(partenza, tappe, arrivo, distanza):
+    # HELD-KARP: costo[maschera][j] = percorso minimo che visita la maschera finendo in j
+    # O(2^n · n²) con le distanze tra tappe lette una sola volta
+    n = len(tappe)
+    infinito = float('inf')
+    tra_tappe = [[distanza(a, b) for b in tappe] for a in tappe]
+
+    costo = [[infinito] * n for _ in range(1 << n)]
+    padre = [[-1] * n for _ in range(1 << n)]
+    for j in range(n):
+        costo[1 << j][j] = distanza(partenza, tappe[j])
+
+    for maschera in range(1, 1 << n):
+        riga_costo = costo[maschera]
+        for j in range(n):
+            costo_j = riga_costo[j]
+            if costo_j == infinito or not (maschera >> j) & 1:
+                continue
+            for k in range(n):
+                if (maschera >> k) & 1:
+                    continue
+                nuova_maschera = maschera | (1 << k)
+                nuovo_costo = costo_j + tra_tappe[j][k]
+                if nuovo_costo < costo[nuova_maschera][k]:
+                    costo[nuova_maschera][k] = nuovo_costo
+                    padre[nuova_maschera][k] = j
+
+    completa = (1 << n) - 1
+    migliore, ultima = infinito, -1
+    for j in range(n):
+        totale = costo[completa][j]
+        if arrivo is not None:
+            totale += distanza(tappe[j], arrivo)
+        if totale < migliore:
+            migliore, ultima = totale, j
+
+    # Tappe irraggiungibili: nessun ordine finito, si tiene quello originale
+    if ultima < 0:
+        return tappe
+
+    ordine = []
+    maschera = completa
+    while ultima >= 0:
+        ordine.append(tappe[ultima])
+        maschera, ultima = maschera ^ (1 << ultima), padre[maschera][ultima]
+    ordine.reverse()
+
+    return ordine
+
+
+def ordina_tappe_due_opt(partenza, tappe, arrivo, distanza):
+    # NEAREST NEIGHBOUR come soluzione iniziale, poi 2-opt fino a un minimo locale
+    # Estremi fissi: solo i tratti interni vengono invertiti
+    rimanenti = list(tappe)
+    ordine = []
+    posizione = partenza
+    while rimanenti:
+        prossima = min(rimanenti, key=lambda tappa: distanza(posizione, tappa))
+        rimanenti.remove(prossima)
+        ordine.append(prossima)
+        posizione = prossima
+
+    def tratto(a, b):
+        return 0 if b is None else distanza(a, b)
+
+    n = len(ordine)
+    migliorato = True
+    while migliorato:
+        migliorato = False
+        for i in range(n - 1):
+            precedente = partenza if i == 0 else ordine[i - 1]
+            for j in range(i + 1, n):
+                successiva = arrivo if j == n - 1 else ordine[j + 1]
+                variazione = (distanza(precedente, ordine[j]) + tratto(ordine[i], successiva) -
+                              distanza(precedente, ordine[i]) - tratto(ordine[j], successiva))
+                if variazione < 0:
+                    ordine[i:j + 1] = reversed(ordine[i:j + 1])
+                    migliorato = True
+
+    return ordine
@@ -1,5 +1,8 @@
 import heapq
-from ..configurazione.costanti import GRIGLIA_LARGHEZZA, GRIGLIA_ALTEZZA, OSTACOLI
+from .griglia import ottieni_griglia
+from .salti_jps import ottieni_tabelle_salto
+from ..configurazione.costanti import MODALITA_RICERCA_ASTAR, MODALITA_RICERCA_JPS
+from ..diagnostica.strumentazione import strumentazione
 
 def distanza_manhattan(punto_a, punto_b):
     # EURISTICA MANHATTAN: |x1-x2| + |y1-y2|
@@ -9,29 +12,70 @@ def distanza_manhattan(punto_a, punto_b):
     distanza_y = abs(punto_a[1] - punto_b[1])  # Differenza coordinate Y
     return distanza_x + distanza_y  # Somma = passi minimi necessari
 
-def percorso_astar(start, end):
+def percorso_astar(start, end, griglia=None, modalita=MODALITA_RICERCA_ASTAR, statistiche=None):
     # ALGORITMO A*: Trova il percorso più breve usando f(n) = g(n) + h(n)
     # g(n) = costo reale dalla partenza
     # h(n) = euristica (stima costo verso destinazione)
     # f(n) = stima costo totale del percorso
+    # modalita: astar (default) oppure jps, stesso formato del risultato
+    # statistiche: dizionario opzionale riempito con nodi espansi e inserimenti in coda
+    if modalita == MODALITA_RICERCA_JPS:
+        ricerca = percorso_jps
+    elif modalita == MODALITA_RICERCA_ASTAR:
+        ricerca = cerca_percorso_astar
+    else:
+        raise ValueError(f"Modalità di ricerca sconosciuta: {modalita}")
     
+    # Strumentazione spenta: un solo controllo, nessun costo aggiuntivo nella ricerca
+    if not strumentazione.attiva:
+        return ricerca(start, end, griglia, statistiche)
+    
+    if statistiche is None:
+        statistiche = {}
+    with strumentazione.misura(f"ricerca.{modalita}"):
+        percorso = ricerca(start, end, griglia, statistiche)
+    strumentazione.conta(f"{modalita}.chiamate")
+    strumentazione.conta(f"{modalita}.nodi_espansi", statistiche.get('nodi_espansi', 0))
+    strumentazione.conta(f"{modalita}.inserimenti_coda", statistiche.get('inserimenti_coda', 0))
+    return percorso
+
+
+def cerca_percorso_astar(start, end, griglia=None, statistiche=None):
+    # A* cella per cella sulla griglia compatta (modalità astar di percorso_astar)
     # Caso base: già alla destinazione
     if start == end:
         return []
     
+    # La ricerca lavora sulla griglia compatta (id interi + vicini precalcolati)
+    if griglia is None:
+        griglia = ottieni_griglia()
+    
     # Verifica validità posizioni (dentro griglia e non ostacoli)
-    if not posizione_valida(start) or not posizione_valida(end):
+    if not griglia.percorribile(start) or not griglia.percorribile(end):
         return []
     
+    # Regioni separate da ostacoli: rifiuto immediato invece di esplorare tutta la componente
+    if not griglia.raggiungibile(start, end):
+        return []
+    
+    larghezza = griglia.larghezza
+    tabella_vicini = griglia.vicini
+    id_start = griglia.id_cella(start)
+    id_end = griglia.id_cella(end)
+    x_end, y_end = end
+    
     # INIZIALIZZAZIONE A*:
     # Coda prioritaria: (f_score, nodo) - esplora sempre nodo con f(n) minimo
-    coda_aperta = [(0, start)]  # f(start) = 0 + h(start,end)
+    coda_aperta = [(0, id_start)]  # f(start) = 0 + h(start,end)
     
     # g(n): costo reale per raggiungere ogni nodo dalla partenza
-    costi_g = {start: 0}  # g(start) = 0 (costo per raggiungere se stesso)
+    costi_g = {id_start: 0}  # g(start) = 0 (costo per raggiungere se stesso)
     
     # Predecessori: per ricostruire il percorso alla fine
-    predecessori = {start: None}  # start non ha predecessore
+    predecessori = {id_start: None}  # start non ha predecessore
+    
+    nodi_espansi = 0
+    inserimenti_coda = 1
     
     # CICLO PRINCIPALE A*: esplora nodi in ordine di f(n) crescente
     while coda_aperta:
@@ -39,72 +83,336 @@ def percorso_astar(start, end):
         _, nodo_corrente = heapq.heappop(coda_aperta)
         
         # SUCCESSO: raggiunta destinazione, ricostruisci percorso
-        if nodo_corrente == end:
-            return ricostruisci_percorso(predecessori, end)
+        if nodo_corrente == id_end:
+            if statistiche is not None:
+                statistiche['nodi_espansi'] = nodi_espansi
+                statistiche['inserimenti_coda'] = inserimenti_coda
+            percorso_id = ricostruisci_percorso(predecessori, id_end)
+            return [griglia.posizione(id_cella) for id_cella in percorso_id]
         
-        # ESPANSIONE: esplora tutti i vicini ortogonali del nodo corrente
-        for vicino in get_vicini(nodo_corrente):
-            # CALCOLO g(vicino): costo per raggiungere il vicino
-            # g(vicino) = g(corrente) + 1 (ogni movimento costa 1)
-            nuovo_costo_g = costi_g[nodo_corrente] + 1
-            
+        nodi_espansi += 1
+        
+        # g(vicino) = g(corrente) + 1 (ogni movimento costa 1)
+        nuovo_costo_g = costi_g[nodo_corrente] + 1
+        
+        # ESPANSIONE: vicini ortogonali già filtrati nella tabella della griglia
+        for vicino in tabella_vicini[nodo_corrente]:
             # AGGIORNAMENTO: se trovato percorso migliore verso questo vicino
-            if vicino not in costi_g or nuovo_costo_g < costi_g[vicino]:
+            costo_g_vicino = costi_g.get(vicino)
+            if costo_g_vicino is None or nuovo_costo_g < costo_g_vicino:
                 # Salva il nuovo costo g(n) migliore
                 costi_g[vicino] = nuovo_costo_g
                 
                 # CALCOLO f(n) = g(n) + h(n)
                 # f(vicino) = costo_reale + euristica_manhattan
-                costo_f = nuovo_costo_g + distanza_manhattan(vicino, end)
+                y_vicino, x_vicino = divmod(vicino, larghezza)
+                costo_f = nuovo_costo_g + abs(x_vicino - x_end) + abs(y_vicino - y_end)
                 
                 # Salva da dove siamo arrivati (per ricostruire percorso)
                 predecessori[vicino] = nodo_corrente
                 
                 # Aggiungi alla coda con priorità f(n)
                 heapq.heappush(coda_aperta, (costo_f, vicino))
+                inserimenti_coda += 1
     
     # FALLIMENTO: nessun percorso trovato
+    if statistiche is not None:
+        statistiche['nodi_espansi'] = nodi_espansi
+        statistiche['inserimenti_coda'] = inserimenti_coda
     return []
 
 
-def posizione_valida(pos):
-    # VALIDAZIONE POSIZIONE: controlla se una cella è esplorabile
-    # Usata da A* per evitare posizioni illegali
-    x, y = pos
+def percorso_jps(start, end, griglia=None, statistiche=None):
+    # JUMP POINT SEARCH 4-CONNESSO (variante "never diagonal" di PathFinding.js)
+    # Su griglie a costo uniforme molti percorsi minimi sono equivalenti: invece di
+    # espandere ogni cella si "salta" in linea retta fino al prossimo punto di decisione
+    # (destinazione, vicino forzato da un ostacolo, o diramazione orizzontale)
+    # A* lavora solo sui jump point; il risultato è espanso cella per cella
+    if start == end:
+        return []
+    
+    if griglia is None:
+        griglia = ottieni_griglia()
+    
+    if not griglia.percorribile(start) or not griglia.percorribile(end):
+        return []
+    if not griglia.raggiungibile(start, end):
+        return []
+    
+    larghezza = griglia.larghezza
+    altezza = griglia.altezza
+    x_end, y_end = end
+    id_start = griglia.id_cella(start)
+    id_end = griglia.id_cella(end)
     
-    # Controllo 1: dentro i confini della griglia
-    if not (0 <= x < GRIGLIA_LARGHEZZA and 0 <= y < GRIGLIA_ALTEZZA):
-        return False  # Fuori dai limiti
+    # Salti precalcolati (JPS+): ogni salto costa O(1) invece di una scansione della riga
+    tabelle = ottieni_tabelle_salto(griglia)
+    corse = tabelle.corse
+    salti = tabelle.salti
     
-    # Controllo 2: non è un ostacolo (muro, edificio, ecc.)
-    if pos in OSTACOLI:
-        return False  # Posizione bloccata
+    def salta_orizzontale(x, y, dx):
+        # Primo jump point lungo la riga da (x, y) inclusa, -1 se prima c'è un ostacolo
+        if not 0 <= x < larghezza:
+            return -1
+        indice = 0 if dx > 0 else 1
+        id_cella = y * larghezza + x
+        punto_salto = salti[indice][id_cella]
+        
+        # La destinazione sulla stessa riga, prima del muro, è anch'essa un jump point
+        if y == y_end:
+            distanza_end = (x_end - x) * dx
+            if 0 <= distanza_end < corse[indice][id_cella]:
+                if punto_salto < 0 or distanza_end <= (punto_salto - id_cella) * dx:
+                    return id_end
+        return punto_salto
+    
+    def salta_verticale(x, y, dy):
+        # Come sopra lungo la colonna; i rami orizzontali sono già nelle tabelle,
+        # tranne quello che porta alla destinazione (solo sulla riga y_end)
+        if not 0 <= y < altezza:
+            return -1
+        indice = 2 if dy > 0 else 3
+        id_cella = y * larghezza + x
+        punto_salto = salti[indice][id_cella]
+        
+        distanza_riga = (y_end - y) * dy
+        if 0 <= distanza_riga < corse[indice][id_cella]:
+            id_riga_end = y_end * larghezza + x
+            indice_riga = 0 if x_end >= x else 1
+            if abs(x_end - x) < corse[indice_riga][id_riga_end]:
+                if punto_salto < 0 or distanza_riga * larghezza <= (punto_salto - id_cella) * dy:
+                    return id_riga_end
+        return punto_salto
     
-    return True  # Posizione valida per il movimento
+    coda_aperta = [(0, id_start)]
+    costi_g = {id_start: 0}
+    predecessori = {id_start: None}
+    chiusi = set()
+    nodi_espansi = 0
+    inserimenti_coda = 1
+    
+    while coda_aperta:
+        _, nodo_corrente = heapq.heappop(coda_aperta)
+        
+        if nodo_corrente == id_end:
+            if statistiche is not None:
+                statistiche['nodi_espansi'] = nodi_espansi
+                statistiche['inserimenti_coda'] = inserimenti_coda
+            punti_salto = ricostruisci_percorso(predecessori, id_end)
+            return espandi_punti_salto([start] + [griglia.posizione(p) for p in punti_salto] + [end])
+        
+        if nodo_corrente in chiusi:
+            continue
+        chiusi.add(nodo_corrente)
+        nodi_espansi += 1
+        
+        y, x = divmod(nodo_corrente, larghezza)
+        costo_corrente = costi_g[nodo_corrente]
+        
+        # POTATURA: senza padre tutte le direzioni, altrimenti avanti e i due lati
+        padre = predecessori[nodo_corrente]
+        if padre is None:
+            direzioni = ((1, 0), (-1, 0), (0, 1), (0, -1))
+        else:
+            y_padre, x_padre = divmod(padre, larghezza)
+            if x != x_padre:
+                dx = 1 if x > x_padre else -1
+                direzioni = ((0, -1), (0, 1), (dx, 0))
+            else:
+                dy = 1 if y > y_padre else -1
+                direzioni = ((-1, 0), (1, 0), (0, dy))
+        
+        for dx, dy in direzioni:
+            if dx:
+                punto_salto = salta_orizzontale(x + dx, y, dx)
+            else:
+                punto_salto = salta_verticale(x, y + dy, dy)
+            if punto_salto < 0 or punto_salto in chiusi:
+                continue
+            
+            y_salto, x_salto = divmod(punto_salto, larghezza)
+            nuovo_costo_g = costo_corrente + abs(x_salto - x) + abs(y_salto - y)
+            costo_g_salto = costi_g.get(punto_salto)
+            if costo_g_salto is None or nuovo_costo_g < costo_g_salto:
+                costi_g[punto_salto] = nuovo_costo_g
+                predecessori[punto_salto] = nodo_corrente
+                costo_f = nuovo_costo_g + abs(x_salto - x_end) + abs(y_salto - y_end)
+                heapq.heappush(coda_aperta, (costo_f, punto_salto))
+                inserimenti_coda += 1
+    
+    if statistiche is not None:
+        statistiche['nodi_espansi'] = nodi_espansi
+        statistiche['inserimenti_coda'] = inserimenti_coda
+    return []
 
 
-def get_vicini(pos):
-    # GENERAZIONE VICINI: trova tutte le posizioni raggiungibili in 1 step
-    # A* usa questa funzione per espandere ogni nodo
-    x, y = pos
-    vicini = []
+def espandi_punti_salto(punti_salto):
+    # Jump point consecutivi sono sempre allineati: si riempiono i tratti rettilinei
+    # Formato di percorso_astar: solo le celle intermedie
+    percorso = []
+    for (x1, y1), (x2, y2) in zip(punti_salto, punti_salto[1:]):
+        passo_x = (x2 > x1) - (x2 < x1)
+        passo_y = (y2 > y1) - (y2 < y1)
+        x, y = x1, y1
+        while (x, y) != (x2, y2):
+            x += passo_x
+            y += passo_y
+            percorso.append((x, y))
+    # L'ultima cella aggiunta è la destinazione
+    return percorso[:-1]
+
+
+def espandi_verso_destinazioni(start, destinazioni, griglia, fermati_al_primo=False):
+    # RICERCA MULTI-DESTINAZIONE: una sola espansione BFS dalla partenza
+    # Costo unitario: la BFS equivale a Dijkstra e ogni nodo è definitivo appena scoperto
+    # Si ferma quando tutte le destinazioni sono state raggiunte (o la prima, se richiesto)
+    # Restituisce (predecessori, distanze) indicizzati per id cella
+    id_start = griglia.id_cella(start)
+    predecessori = {id_start: None}
+    distanze = {id_start: 0}
     
-    # MOVIMENTI ORTOGONALI: solo su/giù/sinistra/destra (no diagonali)
-    # Questo simula il movimento realistico di un taxi su strade urbane
-    movimenti = [(1, 0),   # Destra
-                 (-1, 0),  # Sinistra  
-                 (0, 1),   # Giù
-                 (0, -1)]  # Su
-    
-    # Controlla ogni direzione possibile
-    for dx, dy in movimenti:
-        nuova_pos = (x + dx, y + dy)
+    da_trovare = set()
+    for destinazione in destinazioni:
+        if griglia.raggiungibile(start, destinazione):
+            da_trovare.add(griglia.id_cella(destinazione))
+    
+    # La partenza è già una destinazione (distanza 0)
+    if id_start in da_trovare:
+        da_trovare.discard(id_start)
+        if fermati_al_primo:
+            return predecessori, distanze
+    
+    if not da_trovare:
+        return predecessori, distanze
+    
+    tabella_vicini = griglia.vicini
+    livello = [id_start]
+    distanza_livello = 0
+    
+    # Espansione per livelli: a parità di distanza tutte le destinazioni vengono viste
+    while livello and da_trovare:
+        distanza_livello += 1
+        prossimo_livello = []
+        trovata = False
         
-        # Aggiungi solo se la posizione è valida (dentro griglia, no ostacoli)
-        if posizione_valida(nuova_pos):
-            vicini.append(nuova_pos)
+        for nodo_corrente in livello:
+            for vicino in tabella_vicini[nodo_corrente]:
+                if vicino not in distanze:
+                    distanze[vicino] = distanza_livello
+                    predecessori[vicino] = nodo_corrente
+                    prossimo_livello.append(vicino)
+                    if vicino in da_trovare:
+                        da_trovare.discard(vicino)
+                        trovata = True
+        
+        if trovata and fermati_al_primo:
+            break
+        livello = prossimo_livello
+    
+    strumentazione.conta("bfs_multi.chiamate")
+    strumentazione.conta("bfs_multi.nodi_visitati", len(distanze))
+    return predecessori, distanze
+
+
+def distanze_multi_destinazione(start, destinazioni, griglia=None):
+    # {destinazione: passi} per le destinazioni raggiungibili da start
+    if griglia is None:
+        griglia = ottieni_griglia()
+    if not griglia.percorribile(start):
+        return {}
+    
+    _, distanze = espandi_verso_destinazioni(start, destinazioni, griglia)
+    
+    risultato = {}
+    for destinazione in destinazioni:
+        if griglia.contiene(destinazione):
+            distanza = distanze.get(griglia.id_cella(destinazione))
+            if distanza is not None:
+                risultato[destinazione] = distanza
+    return risultato
+
+
+def percorsi_multi_destinazione(start, destinazioni, griglia=None):
+    # {destinazione: nodi intermedi} come percorso_astar, con una sola espansione
+    # Le destinazioni non raggiungibili non compaiono nel risultato
+    if griglia is None:
+        griglia = ottieni_griglia()
+    if not griglia.percorribile(start):
+        return {}
+    
+    predecessori, _ = espandi_verso_destinazioni(start, destinazioni, griglia)
+    
+    percorsi = {}
+    for destinazione in destinazioni:
+        if destinazione == start:
+            percorsi[destinazione] = []
+            continue
+        if not griglia.contiene(destinazione):
+            continue
+        id_destinazione = griglia.id_cella(destinazione)
+        if id_destinazione in predecessori:
+            percorso_id = ricostruisci_percorso(predecessori, id_destinazione)
+            percorsi[destinazione] = [griglia.posizione(id_cella) for id_cella in percorso_id]
+    return percorsi
+
+
+def piu_vicina_raggiungibile(start, destinazioni, griglia=None):
+    # (destinazione, passi) della destinazione raggiungibile più vicina, (None, inf) se nessuna
+    # L'espansione si ferma al primo livello BFS che contiene una destinazione;
+    # a parità di distanza vince la prima nell'ordine dato
+    if griglia is None:
+        griglia = ottieni_griglia()
+    if not griglia.percorribile(start):
+        return None, float('inf')
+    
+    _, distanze = espandi_verso_destinazioni(start, destinazioni, griglia, fermati_al_primo=True)
+    
+    migliore, distanza_minima = None, float('inf')
+    for destinazione in destinazioni:
+        if not griglia.contiene(destinazione):
+            continue
+        distanza = distanze.get(griglia.id_cella(destinazione))
+        if distanza is not None and distanza < distanza_minima:
+            migliore, distanza_minima = destinazione, distanza
+    return migliore, distanza_minima
+
+
+def percorsi_batch(coppie, griglia=None):
+    # Lista di (start, end) -> lista di percorsi nello stesso ordine (formato percorso_astar)
+    # Le coppie con la stessa partenza condividono un'unica espansione
+    if griglia is None:
+        griglia = ottieni_griglia()
+    
+    destinazioni_per_partenza = {}
+    for start, end in coppie:
+        destinazioni_per_partenza.setdefault(start, []).append(end)
+    
+    percorsi_per_partenza = {
+        start: percorsi_multi_destinazione(start, destinazioni, griglia)
+        for start, destinazioni in destinazioni_per_partenza.items()
+    }
+    
+    return [list(percorsi_per_partenza[start].get(end, [])) for start, end in coppie]
+
+
+def posizione_valida(pos, griglia=None):
+    # VALIDAZIONE POSIZIONE: controlla se una cella è esplorabile
+    # Dentro i confini e non ostacolo, con lookup O(1) nel bytearray della griglia
+    if griglia is None:
+        griglia = ottieni_griglia()
+    return griglia.percorribile(pos)
+
+
+def get_vicini(pos, griglia=None):
+    # GENERAZIONE VICINI: trova tutte le posizioni raggiungibili in 1 step
+    # MOVIMENTI ORTOGONALI: solo su/giù/sinistra/destra (no diagonali)
+    # Le celle vicine sono lette dalla tabella precalcolata della griglia
+    if griglia is None:
+        griglia = ottieni_griglia()
+    if not griglia.percorribile(pos):
+        return []
     
-    return vicini  # Lista delle posizioni esplorabili
+    return [griglia.posizione(vicino) for vicino in griglia.vicini[griglia.id_cella(pos)]]
 
 
 def ricostruisci_percorso(predecessori, end):
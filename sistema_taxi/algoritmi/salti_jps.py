@@ -0,0 +1,111 @@
+from array import array
+
+# Tabelle di salto condivise, ricostruite solo quando cambia la griglia
+_tabelle_correnti = None
+
+# Direzioni nell'ordine degli indici delle tabelle: destra, sinistra, giù, su
+DIREZIONI_SALTO = [(1, 0), (-1, 0), (0, 1), (0, -1)]
+
+
+def ottieni_tabelle_salto(griglia):
+    # Tabelle valide per la griglia data (calcolate alla prima ricerca JPS)
+    # Un ostacolo dinamico può spostare i jump point di intere righe e colonne: ricalcolo
+    global _tabelle_correnti
+
+    if (_tabelle_correnti is None or _tabelle_correnti.griglia is not griglia or
+            _tabelle_correnti.versione != griglia.versione):
+        _tabelle_correnti = TabelleSalto(griglia)
+
+    return _tabelle_correnti
+
+
+class TabelleSalto:
+    # JPS+ 4-CONNESSO: per ogni cella e direzione, precalcolati una volta per mappa
+    # corse[d][cella] = celle libere consecutive da cella (inclusa) in direzione d
+    # salti[d][cella] = primo jump point da cella (inclusa) in direzione d, -1 se c'è un muro prima
+    # I salti ignorano la destinazione: la ricerca la aggiunge in O(1) con le corse
+
+    def __init__(self, griglia):
+        self.griglia = griglia
+        self.versione = griglia.versione
+        numero_celle = griglia.numero_celle
+        self.corse = [array('i', [0]) * numero_celle for _ in DIREZIONI_SALTO]
+        self.salti = [array('i', [-1]) * numero_celle for _ in DIREZIONI_SALTO]
+
+        self.calcola_salti_orizzontali()
+        self.calcola_salti_verticali()
+
+    def griglia_con_bordo(self):
+        # Copia degli ostacoli con una cornice bloccata: i controlli sui vicini
+        # diventano semplici letture senza test sui confini
+        larghezza = self.griglia.larghezza
+        larghezza_bordo = larghezza + 2
+        bloccate_bordo = bytearray([1]) * (larghezza_bordo * (self.griglia.altezza + 2))
+        for y in range(self.griglia.altezza):
+            inizio = (y + 1) * larghezza_bordo + 1
+            bloccate_bordo[inizio:inizio + larghezza] = self.griglia.bloccate[y * larghezza:(y + 1) * larghezza]
+        return bloccate_bordo, larghezza_bordo
+
+    def calcola_salti_orizzontali(self):
+        # Una passata per riga e direzione, dal bordo verso cui si muove il taxi
+        larghezza = self.griglia.larghezza
+        bloccate = self.griglia.bloccate
+        bloccate_bordo, larghezza_bordo = self.griglia_con_bordo()
+
+        for indice, (dx, _) in enumerate(DIREZIONI_SALTO[:2]):
+            corse = self.corse[indice]
+            salti = self.salti[indice]
+            colonne = range(larghezza - 1, -1, -1) if dx > 0 else range(larghezza)
+
+            for y in range(self.griglia.altezza):
+                for x in colonne:
+                    id_cella = y * larghezza + x
+                    if bloccate[id_cella]:
+                        continue
+
+                    dentro = 0 <= x + dx < larghezza
+                    corse[id_cella] = 1 + (corse[id_cella + dx] if dentro else 0)
+
+                    # Vicino forzato: cella sopra/sotto libera ma bloccata alle spalle
+                    id_bordo = (y + 1) * larghezza_bordo + x + 1
+                    sopra = id_bordo - larghezza_bordo
+                    sotto = id_bordo + larghezza_bordo
+                    if ((not bloccate_bordo[sopra] and bloccate_bordo[sopra - dx]) or
+                            (not bloccate_bordo[sotto] and bloccate_bordo[sotto - dx])):
+                        salti[id_cella] = id_cella
+                    elif dentro:
+                        salti[id_cella] = salti[id_cella + dx]
+
+    def calcola_salti_verticali(self):
+        # Anche le celle con un ramo orizzontale utile sono jump point verticali
+        larghezza = self.griglia.larghezza
+        altezza = self.griglia.altezza
+        bloccate = self.griglia.bloccate
+        bloccate_bordo, larghezza_bordo = self.griglia_con_bordo()
+        salti_destra, salti_sinistra = self.salti[0], self.salti[1]
+
+        for indice, (_, dy) in enumerate(DIREZIONI_SALTO[2:], 2):
+            corse = self.corse[indice]
+            salti = self.salti[indice]
+            righe = range(altezza - 1, -1, -1) if dy > 0 else range(altezza)
+            passo = dy * larghezza
+            passo_bordo = dy * larghezza_bordo
+
+            for x in range(larghezza):
+                for y in righe:
+                    id_cella = y * larghezza + x
+                    if bloccate[id_cella]:
+                        continue
+
+                    dentro = 0 <= y + dy < altezza
+                    corse[id_cella] = 1 + (corse[id_cella + passo] if dentro else 0)
+
+                    id_bordo = (y + 1) * larghezza_bordo + x + 1
+                    ramo = ((x + 1 < larghezza and salti_destra[id_cella + 1] >= 0) or
+                            (x > 0 and salti_sinistra[id_cella - 1] >= 0))
+                    if (ramo or
+                            (not bloccate_bordo[id_bordo - 1] and bloccate_bordo[id_bordo - 1 - passo_bordo]) or
+                            (not bloccate_bordo[id_bordo + 1] and bloccate_bordo[id_bordo + 1 - passo_bordo])):
+                        salti[id_cella] = id_cella
+                    elif dentro:
+                        salti[id_cella] = salti[id_cella + passo]
@@ -0,0 +1,266 @@
+import heapq
+from array import array
+from collections import deque
+from .griglia import ottieni_griglia
+from ..configurazione.costanti import STAZIONE
+from ..diagnostica.strumentazione import strumentazione
+
+# Tabella condivisa, ricostruita solo quando cambiano griglia o ostacoli
+_tabella_corrente = None
+
+
+def ottieni_tabella_percorsi():
+    # Restituisce la tabella valida per la griglia corrente
+    # La ricostruisce automaticamente se OSTACOLI o le dimensioni sono cambiati
+    global _tabella_corrente
+
+    griglia = ottieni_griglia()
+    if _tabella_corrente is None or _tabella_corrente.griglia is not griglia:
+        _tabella_corrente = TabellaPercorsi(griglia)
+    elif _tabella_corrente.versione != griglia.versione:
+        # Ostacoli modificati a runtime: si riparano solo le parti toccate degli alberi
+        _tabella_corrente.aggiorna()
+
+    return _tabella_corrente
+
+
+def ottieni_campo_stazione():
+    # Campo distanze della stazione per la griglia corrente
+    # Un solo albero BFS radicato in STAZIONE, calcolato una volta per mappa
+    return ottieni_tabella_percorsi().campo(STAZIONE)
+
+
+def distanza_stradale_stazione(pos):
+    # Distanza reale (su strada, con ostacoli) tra una cella e la stazione
+    # Alternativa a distanza_manhattan per gli ordinamenti in ottimizzazione.py
+    return ottieni_campo_stazione().distanza(pos)
+
+
+def calcola_albero_verso(griglia, id_destinazione):
+    # BFS A RITROSO: una sola espansione dalla destinazione verso tutta la griglia
+    # Movimenti a costo unitario: la BFS trova già le distanze minime
+    # prossimi[cella] = cella successiva sul percorso minimo verso la destinazione
+    # -1 indica una cella non raggiungibile (o bloccata)
+    distanze = array('i', [-1]) * griglia.numero_celle
+    prossimi = array('i', [-1]) * griglia.numero_celle
+
+    if griglia.bloccate[id_destinazione]:
+        return distanze, prossimi
+
+    tabella_vicini = griglia.vicini
+    distanze[id_destinazione] = 0
+    prossimi[id_destinazione] = id_destinazione
+
+    coda = deque([id_destinazione])
+    while coda:
+        nodo_corrente = coda.popleft()
+        distanza_vicino = distanze[nodo_corrente] + 1
+
+        for vicino in tabella_vicini[nodo_corrente]:
+            if distanze[vicino] < 0:
+                distanze[vicino] = distanza_vicino
+                prossimi[vicino] = nodo_corrente
+                coda.append(vicino)
+
+    return distanze, prossimi
+
+
+def modifiche_nette(griglia, versione):
+    # Celle il cui stato è davvero cambiato dalla versione indicata
+    # Una cella chiusa e poi riaperta nello stesso intervallo non conta
+    stato_iniziale = {}
+    for _, id_cella, bloccata in griglia.modifiche_da(versione):
+        stato_iniziale.setdefault(id_cella, not bloccata)
+
+    chiuse = []
+    aperte = []
+    for id_cella, era_bloccata in stato_iniziale.items():
+        if bool(griglia.bloccate[id_cella]) != era_bloccata:
+            (chiuse if griglia.bloccate[id_cella] else aperte).append(id_cella)
+    return chiuse, aperte
+
+
+def ripara_chiusure(griglia, distanze, prossimi, chiuse):
+    # CELLE CHIUSE: cambiano solo le celle il cui percorso passava da una cella chiusa
+    # (sottoalberi BFS delle celle chiuse); le altre mantengono percorso e distanza
+    # Le celle invalidate ripartono dal bordo ancora valido, in ordine di distanza
+    invalidate = set()
+    da_visitare = [id_cella for id_cella in chiuse if distanze[id_cella] >= 0]
+    while da_visitare:
+        nodo = da_visitare.pop()
+        if nodo in invalidate:
+            continue
+        invalidate.add(nodo)
+        for figlio in griglia.celle_adiacenti(nodo):
+            if prossimi[figlio] == nodo and figlio not in invalidate:
+                da_visitare.append(figlio)
+
+    for nodo in invalidate:
+        distanze[nodo] = -1
+        prossimi[nodo] = -1
+
+    tabella_vicini = griglia.vicini
+    coda = []
+    for nodo in invalidate:
+        for vicino in tabella_vicini[nodo]:
+            if distanze[vicino] >= 0:
+                heapq.heappush(coda, (distanze[vicino] + 1, nodo, vicino))
+
+    while coda:
+        distanza, nodo, successivo = heapq.heappop(coda)
+        if distanze[nodo] >= 0:
+            continue
+        distanze[nodo] = distanza
+        prossimi[nodo] = successivo
+        for vicino in tabella_vicini[nodo]:
+            if vicino in invalidate and distanze[vicino] < 0:
+                heapq.heappush(coda, (distanza + 1, vicino, nodo))
+
+
+def ripara_aperture(griglia, distanze, prossimi, aperte):
+    # CELLE RIAPERTE: le distanze possono solo diminuire, e solo passando dalle celle aperte
+    # Si propaga il miglioramento a partire da ciascuna cella finché qualcosa cambia
+    tabella_vicini = griglia.vicini
+    for id_cella in aperte:
+        coda = deque()
+        for vicino in tabella_vicini[id_cella]:
+            if distanze[vicino] >= 0 and (distanze[id_cella] < 0 or distanze[vicino] + 1 < distanze[id_cella]):
+                distanze[id_cella] = distanze[vicino] + 1
+                prossimi[id_cella] = vicino
+        if distanze[id_cella] >= 0:
+            coda.append(id_cella)
+
+        while coda:
+            nodo = coda.popleft()
+            distanza_vicino = distanze[nodo] + 1
+            for vicino in tabella_vicini[nodo]:
+                if distanze[vicino] < 0 or distanza_vicino < distanze[vicino]:
+                    distanze[vicino] = distanza_vicino
+                    prossimi[vicino] = nodo
+                    coda.append(vicino)
+
+
+class TabellaPercorsi:
+    # Distanze e prossimi passi tra tutte le celle della griglia
+    # Ogni riga (albero BFS verso una destinazione) viene calcolata una sola volta
+
+    def __init__(self, griglia):
+        self.griglia = griglia
+        self.versione = griglia.versione
+        griglia.registra_lettore(self)
+        self.righe = {}  # {id destinazione: (distanze, prossimi)}
+        self.campi = {}  # {origine: CampoDistanze}
+
+    def riga(self, destinazione):
+        id_destinazione = self.griglia.id_cella(destinazione)
+        riga = self.righe.get(id_destinazione)
+        if riga is None:
+            with strumentazione.misura("tabella.bfs_riga"):
+                riga = calcola_albero_verso(self.griglia, id_destinazione)
+            strumentazione.conta("tabella.righe_calcolate")
+            self.righe[id_destinazione] = riga
+        return riga
+
+    def aggiorna(self):
+        # RIPARAZIONE INCREMENTALE delle righe già calcolate dopo blocca_cella/libera_cella
+        # Prima le chiusure (sul grafo senza le celle riaperte), poi le aperture
+        # Righe la cui destinazione è cambiata: scartate, si ricalcolano alla prossima richiesta
+        chiuse, aperte = modifiche_nette(self.griglia, self.versione)
+        self.versione = self.griglia.versione
+        self.griglia.conferma_lettura(self, self.versione)
+        if not chiuse and not aperte:
+            return
+
+        cambiate = set(chiuse) | set(aperte)
+        for id_destinazione in list(self.righe):
+            if id_destinazione in cambiate:
+                del self.righe[id_destinazione]
+                continue
+
+            distanze, prossimi = self.righe[id_destinazione]
+            if chiuse:
+                ripara_chiusure(self.griglia, distanze, prossimi, chiuse)
+            if aperte:
+                ripara_aperture(self.griglia, distanze, prossimi, aperte)
+
+        for origine in list(self.campi):
+            if self.griglia.id_cella(origine) in cambiate:
+                del self.campi[origine]
+
+    def campo(self, origine):
+        # Campo distanze riusabile per tutte le tratte che partono o arrivano in origine
+        campo = self.campi.get(origine)
+        if campo is None:
+            campo = CampoDistanze(self, origine)
+            self.campi[origine] = campo
+        return campo
+
+    def precalcola_tutte(self):
+        # Tabella completa all-pairs: una BFS per ogni cella libera
+        for id_cella in range(self.griglia.numero_celle):
+            if not self.griglia.bloccate[id_cella]:
+                self.riga(self.griglia.posizione(id_cella))
+
+    def distanza(self, start, end):
+        # Numero di passi minimo, infinito se la destinazione non è raggiungibile
+        if start == end:
+            return 0
+        # Componenti diverse: nessuna riga BFS da calcolare
+        if not self.griglia.raggiungibile(start, end):
+            return float('inf')
+
+        distanze, _ = self.riga(end)
+        distanza = distanze[self.griglia.id_cella(start)]
+        return distanza if distanza >= 0 else float('inf')
+
+    def percorso(self, start, end):
+        # Stesso formato di percorso_astar: solo i nodi intermedi
+        # Nessuna ricerca: si seguono i prossimi passi in O(lunghezza percorso)
+        if start == end:
+            return []
+        if not self.griglia.raggiungibile(start, end):
+            return []
+
+        id_end = self.griglia.id_cella(end)
+        nodo = self.griglia.id_cella(start)
+
+        # Se esiste già l'albero radicato in start (es. la stazione) lo si legge al contrario
+        if id_end not in self.righe and nodo in self.righe:
+            percorso = self.percorso(end, start)
+            percorso.reverse()
+            return percorso
+
+        _, prossimi = self.riga(end)
+        if prossimi[nodo] < 0:
+            return []
+
+        percorso = []
+        nodo = prossimi[nodo]
+        while nodo != id_end:
+            percorso.append(self.griglia.posizione(nodo))
+            nodo = prossimi[nodo]
+
+        return percorso
+
+
+class CampoDistanze:
+    # Albero dei percorsi minimi radicato in una cella (tipicamente la STAZIONE)
+    # Griglia non orientata: la stessa riga serve sia le andate sia i ritorni
+
+    def __init__(self, tabella, origine):
+        self.tabella = tabella
+        self.origine = origine
+        self.distanze, self.prossimi = tabella.riga(origine)
+
+    def distanza(self, pos):
+        return self.tabella.distanza(pos, self.origine)
+
+    def percorso_verso_origine(self, pos):
+        # Tratta di ritorno: nodi intermedi da pos all'origine
+        return self.tabella.percorso(pos, self.origine)
+
+    def percorso_da_origine(self, pos):
+        # Tratta di andata: lo stesso percorso di ritorno letto al contrario
+        percorso = self.percorso_verso_origine(pos)
+        percorso.reverse()
+        return percorso
@@ -17,12 +17,40 @@ OSTACOLI = [
 TAXI_SINGOLO = "taxi_singolo"
 TAXI_CONDIVISO = "taxi_condiviso"
 
+# Flotta generica: taxi1, taxi2, ... come nei problemi PDDL
+PREFISSO_TAXI_FLOTTA = "taxi"
+NUMERO_TAXI_DEFAULT = 2
+CAPACITA_TAXI_DEFAULT = 2  # Posti per veicolo (con 2 o più posti il taxi serve coppie)
+
 # Parametri sistema
 COSTO_PER_STEP = 1.0
 RAGGIO_ACCOPPIAMENTO_DEFAULT = 2
+STRATEGIA_ACCOPPIAMENTO_GREEDY = "greedy"  # Veloce: coppie più vicine alla stazione prima
+STRATEGIA_ACCOPPIAMENTO_OTTIMA = "ottima"   # Abbinamento di costo totale minimo (blossom)
+STRATEGIA_ACCOPPIAMENTO_DEFAULT = STRATEGIA_ACCOPPIAMENTO_GREEDY
+SOGLIA_INDICE_SPAZIALE = 32  # Clienti oltre i quali l'accoppiamento usa lo spatial hash
+SOGLIA_BACKEND_NUMPY = 64  # Elementi oltre i quali le distanze Manhattan si calcolano con NumPy
+MODALITA_RICERCA_ASTAR = "astar"  # A* classico cella per cella
+MODALITA_RICERCA_JPS = "jps"      # Jump Point Search 4-connesso (mappe grandi e aperte)
+RIPRODUCI_PIANO_PDDL_DEFAULT = False  # True: il piano PDDL si anima così com'è anche in multi-taxi
+COMPATTA_PIANO_PDDL = True  # Piano riprodotto compattato (move unite, prelievi di ogni giro riordinati)
+SOGLIA_RIORDINO_ESATTO = 9  # Tappe per giro oltre le quali il riordino usa l'euristica 2-opt
+
+# Cache su disco dei piani calcolati
+CARTELLA_CACHE_PIANI = ".cache_piani"
+DIMENSIONE_MASSIMA_CACHE_PIANI = 32 * 1024 * 1024  # Byte, oltre si eliminano i meno usati
+VERSIONE_CACHE_PIANI = 5  # Da incrementare se cambia il formato dei piani
+CARTELLA_ETICHETTE_HUB = ".cache_etichette_hub"  # Oracolo distanze, un file per mappa
+
+# Diagnostica: timer e contatori per ogni caricamento (F11 nella GUI per attivarli)
+STRUMENTAZIONE_ATTIVA = False
+FILE_RAPPORTO_STRUMENTAZIONE = None  # Es. "strumentazione.log": i rapporti vengono accodati
 
 # Interfaccia grafica
 VELOCITA_ANIMAZIONE_DEFAULT = 125
+PASSI_MASSIMI_PER_FRAME = 8  # Step recuperabili in un solo frame quando l'animazione è in ritardo
+FINESTRA_TELEMETRIA_FRAME = 120  # Frame considerati nelle statistiche mobili
+AGGIORNAMENTO_TELEMETRIA_FRAME = 15  # Ogni quanti frame si aggiorna la riga di telemetria
 
 COLORI = {
     'stazione': '#2ecc71',
@@ -41,6 +69,15 @@ COLORI = {
     'sfondo': 'white'
 }
 
+# Colori dei taxi della flotta (taxi, traccia), assegnati in ordine e poi ripetuti
+COLORI_FLOTTA = [
+    ('#e74c3c', '#e67e22'),
+    ('#9b59b6', '#8e44ad'),
+    ('#16a085', '#1abc9c'),
+    ('#d35400', '#f39c12'),
+    ('#2980b9', '#5dade2'),
+]
+
 def configura_encoding_console():
     try:
         if sys.stdout and (not sys.stdout.encoding or "utf" not in sys.stdout.encoding.lower()):
@@ -60,6 +97,15 @@ PERCORSI_PIANI = {
     5: "PDDL/plans/plan5"
 }
 
+# Problemi PDDL: dichiarano la flotta (oggetti di tipo taxi) usata dalla modalità multi-taxi
+PERCORSI_PROBLEMI = {
+    1: "PDDL/problem/problem1.pddl",
+    2: "PDDL/problem/problem2.pddl",
+    3: "PDDL/problem/problem3.pddl",
+    4: "PDDL/problem/problem4.pddl",
+    5: "PDDL/problem/problem5.pddl"
+}
+
 PERCORSI_POSIZIONI = {
     1: "PDDL/locations/location1.json",
     2: "PDDL/locations/location2.json",
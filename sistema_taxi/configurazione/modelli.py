@@ -1,9 +1,150 @@
+from bisect import bisect_right
+
+from .costanti import COSTO_PER_STEP
+
+# Indice di occupazione: chi è a bordo a ogni step, costruito una sola volta
+class OccupazioneTaxi:
+    def __init__(self, eventi_prelievo, eventi_discesa):
+        self.indici_eventi = []  # Indici con almeno un evento, in ordine crescente
+        self.a_bordo = []  # Clienti a bordo dopo gli eventi del corrispondente indice
+        self.intervalli_clienti = {}  # {cliente: [(indice_prelievo, indice_discesa)]}
+
+        a_bordo = []
+        inizio_corsa = {}
+        for indice in sorted(set(eventi_prelievo) | set(eventi_discesa)):
+            # Stesso ordine del replay: prima i prelievi, poi le discese
+            for cliente in eventi_prelievo.get(indice, []):
+                if cliente not in a_bordo:
+                    a_bordo.append(cliente)
+                    inizio_corsa[cliente] = indice
+
+            for cliente in eventi_discesa.get(indice, []):
+                if cliente in a_bordo:
+                    a_bordo.remove(cliente)
+                    intervallo = (inizio_corsa.pop(cliente), indice)
+                    self.intervalli_clienti.setdefault(cliente, []).append(intervallo)
+
+            self.indici_eventi.append(indice)
+            self.a_bordo.append(tuple(a_bordo))
+
+        # Clienti mai scesi: a bordo fino alla fine del percorso
+        for cliente, indice in inizio_corsa.items():
+            self.intervalli_clienti.setdefault(cliente, []).append((indice, None))
+
+    def clienti_a_bordo(self, indice):
+        # Ricerca binaria sull'ultimo evento <= indice: O(log numero_eventi)
+        posizione = bisect_right(self.indici_eventi, indice) - 1
+        if posizione < 0:
+            return ()
+        return self.a_bordo[posizione]
+
+# Tariffe del piano in forma chiusa, calcolate una sola volta dagli eventi
+class CostiPiano:
+    # Tra due eventi consecutivi chi è a bordo non cambia: l'intervallo vale
+    # passi / clienti a bordo per ciascun cliente e passi per il taxi
+    # Un solo passaggio sugli eventi produce i totali e le somme prefisse per evento;
+    # i valori sono in step e vanno moltiplicati per il costo di uno step
+    def __init__(self, occupazione, ultimo_indice):
+        self.ultimo_indice = max(0, ultimo_indice)
+        self.indici = []  # Inizio di ogni intervallo tra eventi (entro il percorso)
+        self.quote = []  # Quota di uno step per cliente nell'intervallo (0 se vuoto)
+        self.occupati = []  # 1 se il taxi ha clienti a bordo nell'intervallo
+        self.quote_cumulate = []  # Quota per cliente accumulata fino all'inizio dell'intervallo
+        self.passi_occupati_cumulati = []  # Step a pagamento fino all'inizio dell'intervallo
+        self.totali_clienti = {}
+        self.passi_occupati = 0
+
+        quota_cumulata = 0.0
+        indici_eventi = occupazione.indici_eventi
+        for k, inizio in enumerate(indici_eventi):
+            if inizio >= self.ultimo_indice:
+                break
+
+            clienti = occupazione.a_bordo[k]
+            fine = indici_eventi[k + 1] if k + 1 < len(indici_eventi) else self.ultimo_indice
+            passi = min(fine, self.ultimo_indice) - inizio
+            quota = 1.0 / len(clienti) if clienti else 0.0
+
+            self.indici.append(inizio)
+            self.quote.append(quota)
+            self.occupati.append(1 if clienti else 0)
+            self.quote_cumulate.append(quota_cumulata)
+            self.passi_occupati_cumulati.append(self.passi_occupati)
+
+            for cliente in clienti:
+                self.totali_clienti[cliente] = self.totali_clienti.get(cliente, 0.0) + quota * passi
+            if clienti:
+                self.passi_occupati += passi
+            quota_cumulata += quota * passi
+
+        self.intervalli_clienti = occupazione.intervalli_clienti
+
+    def quota_cumulata(self, indice):
+        # Quota per cliente degli step < indice: O(log numero_eventi)
+        posizione = bisect_right(self.indici, indice) - 1
+        if posizione < 0:
+            return 0.0
+        indice = min(indice, self.ultimo_indice)
+        return self.quote_cumulate[posizione] + (indice - self.indici[posizione]) * self.quote[posizione]
+
+    def costo_cliente(self, cliente, indice=None, costo_per_step=COSTO_PER_STEP):
+        # Costo del cliente dopo indice step (None: a fine percorso)
+        if indice is None or indice >= self.ultimo_indice:
+            return self.totali_clienti.get(cliente, 0.0) * costo_per_step
+        costo = 0.0
+        for inizio, fine in self.intervalli_clienti.get(cliente, ()):
+            if indice > inizio:
+                fine = indice if fine is None else min(indice, fine)
+                costo += self.quota_cumulata(fine) - self.quota_cumulata(inizio)
+        return costo * costo_per_step
+
+    def costo_taxi(self, indice=None, costo_per_step=COSTO_PER_STEP):
+        # Step percorsi con almeno un cliente a bordo, dopo indice step (None: a fine percorso)
+        if indice is None or indice >= self.ultimo_indice:
+            return self.passi_occupati * costo_per_step
+        posizione = bisect_right(self.indici, indice) - 1
+        if posizione < 0:
+            return 0.0
+        passi = self.passi_occupati_cumulati[posizione] + (indice - self.indici[posizione]) * self.occupati[posizione]
+        return passi * costo_per_step
+
+    def costi_clienti(self, costo_per_step=COSTO_PER_STEP):
+        return {cliente: totale * costo_per_step for cliente, totale in self.totali_clienti.items()}
+
+# Indici derivati (occupazione, costi) esclusi dal pickle: ricostruiti al caricamento,
+# così un piano salvato da una versione precedente ottiene sempre i campi correnti
+ATTRIBUTI_DERIVATI = ("occupazione", "costi")
+
+
+def stato_serializzabile(piano):
+    return {nome: valore for nome, valore in piano.__dict__.items() if nome not in ATTRIBUTI_DERIVATI}
+
+
+def ripristina_stato(piano, stato):
+    piano.__dict__.update((nome, valore) for nome, valore in stato.items() if nome not in ATTRIBUTI_DERIVATI)
+    piano.aggiorna_occupazione()
+
 # Rappresenta il percorso completo di un viaggio taxi
 class Viaggio:
     def __init__(self, percorso, eventi_prelievo, eventi_discesa):
         self.percorso = percorso
         self.eventi_prelievo = eventi_prelievo
         self.eventi_discesa = eventi_discesa
+        self.aggiorna_occupazione()
+
+    def aggiorna_occupazione(self):
+        # Da richiamare se percorso o eventi vengono modificati dopo la costruzione
+        self.occupazione = OccupazioneTaxi(self.eventi_prelievo, self.eventi_discesa)
+        self.costi = CostiPiano(self.occupazione, len(self.percorso) - 1)
+
+    def __getstate__(self):
+        return stato_serializzabile(self)
+
+    def __setstate__(self, stato):
+        ripristina_stato(self, stato)
+
+    def clienti_a_bordo(self, indice):
+        return self.occupazione.clienti_a_bordo(indice)
 
 # Piano di movimento per singolo taxi
 class PianoTaxi:
@@ -11,15 +152,32 @@ class PianoTaxi:
         self.percorso = percorso
         self.eventi_prelievo = prelievi
         self.eventi_discesa = discese
+        self.aggiorna_occupazione()
+
+    def aggiorna_occupazione(self):
+        # Da richiamare se percorso o eventi vengono modificati dopo la costruzione
+        self.occupazione = OccupazioneTaxi(self.eventi_prelievo, self.eventi_discesa)
+        self.costi = CostiPiano(self.occupazione, len(self.percorso) - 1)
+
+    def __getstate__(self):
+        return stato_serializzabile(self)
+
+    def __setstate__(self, stato):
+        ripristina_stato(self, stato)
+
+    def clienti_a_bordo(self, indice):
+        return self.occupazione.clienti_a_bordo(indice)
 
     def completato(self, indice):
         return indice >= len(self.percorso) - 1
 
 # Gestisce piani di più taxi contemporaneamente
 class PianiMultiTaxi:
-    def __init__(self, piani_taxi, etichette_clienti):
+    def __init__(self, piani_taxi, etichette_clienti, clienti_irraggiungibili=None):
         self.piani = piani_taxi
         self.etichette = etichette_clienti
+        # {cliente: posizione} esclusi dalla pianificazione: nessun percorso dalla stazione
+        self.clienti_irraggiungibili = clienti_irraggiungibili or {}
 
 # Stato dell'animazione e costi del sistema
 class StatoAnimazione:
@@ -55,7 +213,8 @@ class StatoAnimazione:
 # Configurazione per ogni problema/scenario
 class ConfigProblema:
     def __init__(self, numero, nome, percorso_piano, percorso_posizioni, 
-                 usa_multi_taxi=False, taxi_condiviso=False, colore_taxi="#e74c3c"):
+                 usa_multi_taxi=False, taxi_condiviso=False, colore_taxi="#e74c3c",
+                 percorso_problema=None, riproduci_piano=False):
         self.numero = numero
         self.nome = nome
         self.percorso_piano = percorso_piano
@@ -63,3 +222,29 @@ class ConfigProblema:
         self.usa_multi_taxi = usa_multi_taxi
         self.taxi_condiviso = taxi_condiviso
         self.colore_taxi = colore_taxi
+        self.percorso_problema = percorso_problema  # File PDDL con la flotta (opzionale)
+        self.riproduci_piano = riproduci_piano  # Piano PDDL animato così com'è, senza pianificatore
+
+
+class AzionePiano:
+    # Azione del piano già tokenizzata: ogni riga viene divisa una sola volta
+    # numero: posizione nel piano (da 1), come nei messaggi di errore
+    def __init__(self, numero, tokens):
+        self.numero = numero
+        self.tokens = tokens
+        self.operazione = tokens[0] if tokens else None
+
+
+class ProblemaPddl:
+    # Istanza del dominio taxi-planner letta da PDDL/problem/*.pddl
+    # Nomi sempre minuscoli, come le azioni dei piani
+    def __init__(self, nome, taxi, passeggeri, locations, stazioni,
+                 posizioni_taxi, posizioni_passeggeri, destinazioni_passeggeri):
+        self.nome = nome
+        self.taxi = taxi  # Lista ordinata come nel file
+        self.passeggeri = passeggeri
+        self.locations = locations
+        self.stazioni = stazioni  # Set di location con (station ?l)
+        self.posizioni_taxi = posizioni_taxi  # {taxi: location iniziale}
+        self.posizioni_passeggeri = posizioni_passeggeri  # {passeggero: location iniziale}
+        self.destinazioni_passeggeri = destinazioni_passeggeri  # {passeggero: location obiettivo}
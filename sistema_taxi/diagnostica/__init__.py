@@ -0,0 +1,3 @@
+# Modulo diagnostica sistema taxi
+from .strumentazione import *
+from .telemetria_frame import *
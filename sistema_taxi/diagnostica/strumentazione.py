@@ -0,0 +1,184 @@
+import cProfile
+import io
+import pstats
+import time
+from pathlib import Path
+
+# Righe del profilo cProfile riportate nel rapporto testuale
+RIGHE_PROFILO = 25
+
+
+class MisuraNulla:
+    # Context manager vuoto restituito quando la strumentazione è spenta:
+    # nessuna lettura dell'orologio e nessuna allocazione per ogni stadio
+    def __enter__(self):
+        return self
+
+    def __exit__(self, tipo, valore, traccia):
+        return False
+
+
+MISURA_NULLA = MisuraNulla()
+
+
+class MisuraStadio:
+    # Tempo di un blocco with: sommato allo stadio e contato come chiamata
+    def __init__(self, strumentazione, nome):
+        self.strumentazione = strumentazione
+        self.nome = nome
+        self.inizio = 0.0
+
+    def __enter__(self):
+        self.inizio = time.perf_counter()
+        return self
+
+    def __exit__(self, tipo, valore, traccia):
+        self.strumentazione.registra_tempo(self.nome, time.perf_counter() - self.inizio)
+        return False
+
+
+class Strumentazione:
+    # TIMER E CONTATORI DI PROCESSO
+    # Spenta (default): misura() restituisce un oggetto condiviso e conta() esce subito,
+    # quindi nei punti caldi il costo è un solo controllo di attributo
+    # Accesa: tempi per stadio (chiamate, totale) e contatori azzerati a ogni sessione
+
+    def __init__(self):
+        self.attiva = False
+        self.tempi = {}  # {stadio: [chiamate, secondi totali]}
+        self.contatori = {}
+        self.percorso_rapporto = None
+        self.profilo_richiesto = None  # None: nessun profilo; altrimenti percorso file (o "")
+
+    def misura(self, nome):
+        if not self.attiva:
+            return MISURA_NULLA
+        return MisuraStadio(self, nome)
+
+    def conta(self, nome, quantita=1):
+        if self.attiva:
+            self.contatori[nome] = self.contatori.get(nome, 0) + quantita
+
+    def registra_tempo(self, nome, secondi):
+        voce = self.tempi.get(nome)
+        if voce is None:
+            self.tempi[nome] = [1, secondi]
+        else:
+            voce[0] += 1
+            voce[1] += secondi
+
+    def azzera(self):
+        self.tempi = {}
+        self.contatori = {}
+
+    def come_dizionario(self):
+        # Forma serializzabile (JSON) dei dati raccolti
+        return {
+            "tempi_ms": {
+                nome: {"chiamate": chiamate, "totale": secondi * 1000}
+                for nome, (chiamate, secondi) in self.tempi.items()
+            },
+            "contatori": dict(self.contatori),
+        }
+
+    def rapporto(self, titolo, durata=None):
+        # Rapporto testuale: stadi in ordine di tempo totale, poi i contatori
+        righe = [f"=== {titolo}" + (f" ({durata * 1000:.1f} ms)" if durata is not None else "") + " ==="]
+        if self.tempi:
+            righe.append("Stadi:")
+            for nome, (chiamate, secondi) in sorted(self.tempi.items(), key=lambda voce: -voce[1][1]):
+                righe.append(f"  {nome:<32} {chiamate:>6}x {secondi * 1000:>10.2f} ms")
+        if self.contatori:
+            righe.append("Contatori:")
+            for nome, valore in sorted(self.contatori.items()):
+                righe.append(f"  {nome:<32} {valore:>10}")
+        return "\n".join(righe)
+
+    def sessione(self, titolo):
+        # Un caricamento completo: azzera, misura, stampa e salva il rapporto
+        return SessioneStrumentazione(self, titolo)
+
+
+class SessioneStrumentazione:
+    # Context manager attorno a un caricamento; se richiesto cattura anche un profilo cProfile
+    # Con strumentazione spenta e nessun profilo richiesto non fa nulla
+
+    def __init__(self, strumentazione, titolo):
+        self.strumentazione = strumentazione
+        self.titolo = titolo
+        self.profilo = None
+        self.inizio = 0.0
+
+    def __enter__(self):
+        strumentazione = self.strumentazione
+        if strumentazione.attiva:
+            strumentazione.azzera()
+        if strumentazione.profilo_richiesto is not None:
+            self.profilo = cProfile.Profile()
+            self.profilo.enable()
+        self.inizio = time.perf_counter()
+        return self
+
+    def __exit__(self, tipo, valore, traccia):
+        durata = time.perf_counter() - self.inizio
+        strumentazione = self.strumentazione
+        testo = None
+
+        if strumentazione.attiva:
+            testo = strumentazione.rapporto(self.titolo, durata)
+
+        if self.profilo is not None:
+            self.profilo.disable()
+            testo_profilo = self.chiudi_profilo(strumentazione.profilo_richiesto)
+            testo = testo_profilo if testo is None else f"{testo}\n{testo_profilo}"
+            # Il profilo vale per un solo caricamento
+            strumentazione.profilo_richiesto = None
+
+        if testo is not None:
+            print(testo)
+            if strumentazione.percorso_rapporto:
+                salva_rapporto(testo, strumentazione.percorso_rapporto)
+        return False
+
+    def chiudi_profilo(self, percorso_profilo):
+        # Statistiche grezze su file (per snakeviz/pstats) e le funzioni più costose nel rapporto
+        if percorso_profilo:
+            self.profilo.dump_stats(percorso_profilo)
+
+        flusso = io.StringIO()
+        statistiche = pstats.Stats(self.profilo, stream=flusso)
+        statistiche.sort_stats("cumulative").print_stats(RIGHE_PROFILO)
+        return f"Profilo cProfile ({self.titolo}):\n{flusso.getvalue()}"
+
+
+def salva_rapporto(testo, percorso_rapporto):
+    # I rapporti si accodano: un file raccoglie più caricamenti
+    try:
+        with open(Path(percorso_rapporto), "a", encoding="utf-8") as file:
+            file.write(testo + "\n\n")
+    except OSError as e:
+        print(f"[WARNING] Impossibile salvare il rapporto di strumentazione: {e}")
+
+
+# Istanza condivisa da algoritmi, pianificazione e interfaccia
+strumentazione = Strumentazione()
+
+
+def configura_strumentazione(attiva=True, percorso_rapporto=None):
+    # Accende/spegne timer e contatori; percorso_rapporto: file in cui accodare i rapporti
+    strumentazione.attiva = attiva
+    strumentazione.percorso_rapporto = percorso_rapporto
+    strumentazione.azzera()
+
+
+def profila_prossimo_caricamento(percorso_profilo=""):
+    # cProfile solo sul prossimo caricamento; percorso_profilo: file .prof opzionale
+    strumentazione.profilo_richiesto = percorso_profilo or ""
+
+
+def misura_stadio(nome):
+    return strumentazione.misura(nome)
+
+
+def conta(nome, quantita=1):
+    strumentazione.conta(nome, quantita)
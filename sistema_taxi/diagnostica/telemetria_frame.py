@@ -0,0 +1,84 @@
+import statistics
+from collections import deque
+from ..configurazione.costanti import FINESTRA_TELEMETRIA_FRAME, PASSI_MASSIMI_PER_FRAME
+
+
+class TelemetriaFrame:
+    # Statistiche mobili sugli ultimi frame dell'animazione
+    # lavoro: tempo speso nel callback, intervallo: tempo reale tra due frame,
+    # ritardo: quanto il frame è partito dopo la sua scadenza, passi: step simulati nel frame
+
+    def __init__(self, dimensione=FINESTRA_TELEMETRIA_FRAME):
+        self.frame = deque(maxlen=dimensione)
+        self.frame_totali = 0
+
+    def azzera(self):
+        self.frame.clear()
+        self.frame_totali = 0
+
+    def registra(self, lavoro, intervallo, ritardo, passi):
+        self.frame.append((lavoro, intervallo, ritardo, passi))
+        self.frame_totali += 1
+
+    def statistiche(self):
+        # Tempi in millisecondi; None se non è ancora stato registrato alcun frame
+        if not self.frame:
+            return None
+
+        lavori = sorted(frame[0] for frame in self.frame)
+        intervalli = [frame[1] for frame in self.frame if frame[1] is not None]
+        ritardi = [frame[2] for frame in self.frame]
+        passi = [frame[3] for frame in self.frame]
+
+        return {
+            "frame": len(self.frame),
+            "lavoro_medio_ms": statistics.fmean(lavori) * 1000,
+            "lavoro_p95_ms": lavori[min(len(lavori) - 1, int(len(lavori) * 0.95))] * 1000,
+            "lavoro_massimo_ms": lavori[-1] * 1000,
+            "intervallo_medio_ms": statistics.fmean(intervalli) * 1000 if intervalli else 0.0,
+            "jitter_ms": statistics.pstdev(intervalli) * 1000 if len(intervalli) > 1 else 0.0,
+            "ritardo_medio_ms": statistics.fmean(ritardi) * 1000,
+            "passi_per_frame": statistics.fmean(passi),
+            "passi_recuperati": sum(passi) - len(passi),
+        }
+
+    def descrizione(self):
+        # Riga compatta per la GUI
+        dati = self.statistiche()
+        if dati is None:
+            return "Frame: -"
+        return (f"Frame: {dati['lavoro_medio_ms']:.1f} ms (p95 {dati['lavoro_p95_ms']:.1f}), "
+                f"jitter {dati['jitter_ms']:.1f} ms, {dati['passi_per_frame']:.1f} passi/frame")
+
+
+class CadenzaAnimazione:
+    # PACING A OROLOGIO: ogni step della simulazione ha una scadenza fissa
+    # (partenza + k * periodo); il frame esegue tutti gli step già scaduti, fino a
+    # passi_massimi, così la riproduzione resta in tempo reale anche se un frame sfora
+    # Se il ritardo supera comunque passi_massimi periodi si riallinea all'orologio
+    # invece di inseguire un arretrato sempre maggiore
+
+    def __init__(self, periodo, passi_massimi=PASSI_MASSIMI_PER_FRAME):
+        self.periodo = max(periodo, 0.001)
+        self.passi_massimi = max(1, passi_massimi)
+        self.scadenza = 0.0
+
+    def avvia(self, adesso):
+        self.scadenza = adesso
+
+    def ritardo(self, adesso):
+        return max(0.0, adesso - self.scadenza)
+
+    def passi_dovuti(self, adesso):
+        # Almeno uno step per frame; uno in più per ogni periodo intero di ritardo
+        passi = 1 + int(self.ritardo(adesso) / self.periodo)
+        return min(passi, self.passi_massimi)
+
+    def registra_passi(self, passi, adesso):
+        self.scadenza += passi * self.periodo
+        if adesso - self.scadenza > self.passi_massimi * self.periodo:
+            self.scadenza = adesso
+
+    def attesa_ms(self, adesso):
+        # Millisecondi fino alla prossima scadenza (0: il frame successivo è già in ritardo)
+        return max(0, int(round((self.scadenza - adesso) * 1000)))
@@ -1,2 +1,3 @@
 # Modulo gestione file sistema taxi
 from .lettore_file import *
+from .cache_piani import *
@@ -0,0 +1,134 @@
+import hashlib
+import os
+import pickle
+import zlib
+from pathlib import Path
+from ..configurazione.costanti import (
+    CARTELLA_CACHE_PIANI, DIMENSIONE_MASSIMA_CACHE_PIANI, VERSIONE_CACHE_PIANI,
+    STRATEGIA_ACCOPPIAMENTO_DEFAULT, CAPACITA_TAXI_DEFAULT
+)
+from ..algoritmi.griglia import firma_griglia
+
+ESTENSIONE_CACHE = ".piano"
+
+# Cache condivisa dall'interfaccia
+_cache_corrente = None
+
+
+def ottieni_cache_piani():
+    # Cache su disco nella cartella di default
+    global _cache_corrente
+
+    if _cache_corrente is None:
+        _cache_corrente = CachePiani()
+
+    return _cache_corrente
+
+
+def calcola_chiave_scenario(percorso_piano, percorso_posizioni, modalita, raggio_coppia=None,
+                            strategia_accoppiamento=STRATEGIA_ACCOPPIAMENTO_DEFAULT,
+                            capacita=CAPACITA_TAXI_DEFAULT):
+    # CHIAVE DI CONTENUTO: hash dei file e di tutto ciò che influenza il piano
+    # Cambiare un ostacolo, la griglia, il raggio, la strategia di accoppiamento o la
+    # capacità dei taxi produce una chiave diversa
+    larghezza, altezza, ostacoli = firma_griglia()
+
+    hash_scenario = hashlib.sha256()
+    for percorso_file in (percorso_piano, percorso_posizioni):
+        with open(percorso_file, "rb") as file:
+            contenuto = file.read()
+        hash_scenario.update(len(contenuto).to_bytes(8, "little"))
+        hash_scenario.update(contenuto)
+
+    parametri = (VERSIONE_CACHE_PIANI, modalita, raggio_coppia, strategia_accoppiamento, capacita,
+                 larghezza, altezza, sorted(ostacoli))
+    hash_scenario.update(repr(parametri).encode("utf-8"))
+
+    return hash_scenario.hexdigest()
+
+
+class CachePiani:
+    # Piani già calcolati salvati come pickle compresso con zlib, un file per chiave
+    # La data di modifica del file fa da orologio LRU: ogni lettura la aggiorna
+
+    def __init__(self, cartella=CARTELLA_CACHE_PIANI, dimensione_massima=DIMENSIONE_MASSIMA_CACHE_PIANI):
+        self.cartella = Path(cartella)
+        self.dimensione_massima = dimensione_massima
+
+    def percorso_voce(self, chiave):
+        return self.cartella / f"{chiave}{ESTENSIONE_CACHE}"
+
+    def carica(self, chiave):
+        # Restituisce l'oggetto salvato oppure None se assente o illeggibile
+        percorso_voce = self.percorso_voce(chiave)
+        try:
+            with open(percorso_voce, "rb") as file:
+                dati = file.read()
+        except OSError:
+            return None
+
+        try:
+            risultato = pickle.loads(zlib.decompress(dati))
+        except Exception as e:
+            print(f"[WARNING] Voce di cache non valida eliminata: {percorso_voce.name} ({e})")
+            self.elimina(chiave)
+            return None
+
+        try:
+            os.utime(percorso_voce)
+        except OSError:
+            pass
+
+        return risultato
+
+    def salva(self, chiave, risultato):
+        # Scrittura atomica: file temporaneo poi rename, mai voci troncate
+        try:
+            self.cartella.mkdir(parents=True, exist_ok=True)
+            dati = zlib.compress(pickle.dumps(risultato, pickle.HIGHEST_PROTOCOL))
+
+            percorso_voce = self.percorso_voce(chiave)
+            percorso_temporaneo = percorso_voce.with_suffix(".tmp")
+            with open(percorso_temporaneo, "wb") as file:
+                file.write(dati)
+            os.replace(percorso_temporaneo, percorso_voce)
+        except OSError as e:
+            print(f"[WARNING] Impossibile salvare il piano in cache: {e}")
+            return
+
+        self.applica_limite_dimensione()
+
+    def elimina(self, chiave):
+        try:
+            self.percorso_voce(chiave).unlink()
+        except OSError:
+            pass
+
+    def svuota(self):
+        for percorso_voce in self.cartella.glob(f"*{ESTENSIONE_CACHE}"):
+            try:
+                percorso_voce.unlink()
+            except OSError:
+                pass
+
+    def applica_limite_dimensione(self):
+        # EVICTION LRU: oltre la dimensione massima si eliminano le voci usate meno di recente
+        voci = []
+        dimensione_totale = 0
+        for percorso_voce in self.cartella.glob(f"*{ESTENSIONE_CACHE}"):
+            try:
+                stato = percorso_voce.stat()
+            except OSError:
+                continue
+            voci.append((stato.st_mtime, stato.st_size, percorso_voce))
+            dimensione_totale += stato.st_size
+
+        voci.sort()
+        for _, dimensione, percorso_voce in voci:
+            if dimensione_totale <= self.dimensione_massima:
+                break
+            try:
+                percorso_voce.unlink()
+                dimensione_totale -= dimensione
+            except OSError:
+                pass
@@ -1,6 +1,7 @@
 import json
 from pathlib import Path
 from ..configurazione.costanti import STAZIONE
+from ..configurazione.modelli import AzionePiano, ProblemaPddl
 
 def trova_primo_file_esistente(lista_candidati):
     for candidato in lista_candidati:
@@ -10,11 +11,17 @@ def trova_primo_file_esistente(lista_candidati):
     return None
 
 def leggi_azioni_da_piano(percorso_file):
-    azioni = []
+    # Lista completa delle azioni (per piani piccoli o accessi ripetuti)
+    return list(itera_righe_azioni(percorso_file))
+
+
+def itera_righe_azioni(percorso_file):
+    # STREAMING: una riga alla volta, il file non viene mai caricato tutto in memoria
+    trovata_azione = False
     
     try:
         with open(percorso_file, "r", encoding="utf-8") as file:
-            for numero_riga, riga in enumerate(file, 1):
+            for riga in file:
                 riga = riga.strip()
                 
                 if not riga or riga.startswith(";"):
@@ -24,17 +31,32 @@ def leggi_azioni_da_piano(percorso_file):
                     riga = riga[:riga.rfind(")") + 1]
                 
                 if riga.startswith("(") and riga.endswith(")"):
-                    azioni.append(riga.lower())
+                    trovata_azione = True
+                    yield riga.lower()
     
     except FileNotFoundError:
         raise FileNotFoundError(f"File piano non trovato: {percorso_file}")
     except Exception as e:
         raise ValueError(f"Errore durante la lettura del file piano {percorso_file}: {e}")
     
-    if not azioni:
+    if not trovata_azione:
         raise ValueError(f"Nessuna azione valida trovata nel file: {percorso_file}")
-    
-    return azioni
+
+
+def tokenizza_azioni(azioni):
+    # Righe -> AzionePiano: strip e split una sola volta per azione
+    # Le azioni già tokenizzate passano invariate, così i consumatori
+    # accettano sia liste di stringhe sia flussi di AzionePiano
+    for numero, azione in enumerate(azioni, 1):
+        if isinstance(azione, AzionePiano):
+            yield azione
+        else:
+            yield AzionePiano(numero, azione.strip("()").split())
+
+
+def itera_azioni_da_piano(percorso_file):
+    # Pipeline completa: file -> righe -> azioni tokenizzate
+    return tokenizza_azioni(itera_righe_azioni(percorso_file))
 
 
 def carica_posizioni_da_json(percorso_file):
@@ -79,8 +101,8 @@ def carica_posizioni_da_json(percorso_file):
 def estrai_prima_mappatura_pickup(lista_azioni):
     mappa_pickup = {}
     
-    for azione_raw in lista_azioni:
-        tokens = azione_raw.strip("()").split()
+    for azione in tokenizza_azioni(lista_azioni):
+        tokens = azione.tokens
         
         if len(tokens) == 4 and tokens[0] == "pickup":
             _, taxi, passeggero, location = tokens
@@ -92,3 +114,118 @@ def estrai_prima_mappatura_pickup(lista_azioni):
                 mappa_pickup[passeggero_upper] = location_lower
     
     return mappa_pickup
+
+
+def leggi_problema_pddl(percorso_file):
+    # Legge un problema del dominio taxi-planner: oggetti tipati, stato iniziale e goal
+    try:
+        with open(percorso_file, "r", encoding="utf-8") as file:
+            testo = file.read()
+    except FileNotFoundError:
+        raise FileNotFoundError(f"File problema non trovato: {percorso_file}")
+    except Exception as e:
+        raise ValueError(f"Errore durante la lettura del file problema {percorso_file}: {e}")
+    
+    espressione = analizza_espressione_pddl(testo)
+    if not espressione or espressione[0] != "define":
+        raise ValueError(f"Il file {percorso_file} non contiene un problema PDDL (define ...)")
+    
+    nome = None
+    oggetti = {}
+    fatti_iniziali = []
+    obiettivi = []
+    
+    for sezione in espressione[1:]:
+        if not isinstance(sezione, list) or not sezione:
+            continue
+        
+        chiave = sezione[0]
+        if chiave == "problem" and len(sezione) > 1:
+            nome = sezione[1]
+        elif chiave == ":objects":
+            oggetti = leggi_oggetti_tipati(sezione[1:])
+        elif chiave == ":init":
+            fatti_iniziali = [fatto for fatto in sezione[1:] if isinstance(fatto, list)]
+        elif chiave == ":goal" and len(sezione) > 1:
+            goal = sezione[1]
+            obiettivi = goal[1:] if goal and goal[0] == "and" else [goal]
+    
+    stazioni = set()
+    posizioni_taxi = {}
+    posizioni_passeggeri = {}
+    for fatto in fatti_iniziali:
+        if fatto[0] == "station" and len(fatto) == 2:
+            stazioni.add(fatto[1])
+        elif fatto[0] == "at" and len(fatto) == 3:
+            posizioni_taxi[fatto[1]] = fatto[2]
+        elif fatto[0] == "passenger-at" and len(fatto) == 3:
+            posizioni_passeggeri[fatto[1]] = fatto[2]
+    
+    destinazioni_passeggeri = {}
+    for obiettivo in obiettivi:
+        if not isinstance(obiettivo, list) or obiettivo[0] != "passenger-at" or len(obiettivo) != 3:
+            raise ValueError(f"Goal non supportato nel file {percorso_file}: {obiettivo}")
+        destinazioni_passeggeri[obiettivo[1]] = obiettivo[2]
+    
+    return ProblemaPddl(
+        nome=nome,
+        taxi=oggetti.get("taxi", []),
+        passeggeri=oggetti.get("passenger", []),
+        locations=oggetti.get("location", []),
+        stazioni=stazioni,
+        posizioni_taxi=posizioni_taxi,
+        posizioni_passeggeri=posizioni_passeggeri,
+        destinazioni_passeggeri=destinazioni_passeggeri
+    )
+
+
+def analizza_espressione_pddl(testo):
+    # S-EXPRESSION: parentesi -> liste annidate di token minuscoli, commenti ";" ignorati
+    righe = [riga.split(";", 1)[0] for riga in testo.lower().splitlines()]
+    tokens = " ".join(righe).replace("(", " ( ").replace(")", " ) ").split()
+    
+    pila = [[]]
+    for token in tokens:
+        if token == "(":
+            pila.append([])
+        elif token == ")":
+            if len(pila) == 1:
+                raise ValueError("Parentesi chiusa senza corrispondente apertura")
+            lista = pila.pop()
+            pila[-1].append(lista)
+        else:
+            pila[-1].append(token)
+    
+    if len(pila) != 1:
+        raise ValueError("Parentesi non bilanciate nel file PDDL")
+    if not pila[0]:
+        return []
+    return pila[0][0]
+
+
+def leggi_oggetti_tipati(tokens):
+    # "taxi1 taxi2 - taxi p1 - passenger" -> {"taxi": [...], "passenger": [...]}
+    oggetti = {}
+    in_attesa = []
+    i = 0
+    while i < len(tokens):
+        if tokens[i] == "-" and i + 1 < len(tokens):
+            oggetti.setdefault(tokens[i + 1], []).extend(in_attesa)
+            in_attesa = []
+            i += 2
+        else:
+            in_attesa.append(tokens[i])
+            i += 1
+    
+    if in_attesa:
+        oggetti.setdefault("object", []).extend(in_attesa)
+    
+    return oggetti
+
+
+def scrivi_piano(azioni, percorso_file):
+    # Stesso formato dei piani in PDDL/plans: un'azione per riga e costo unitario finale
+    with open(percorso_file, "w", encoding="utf-8") as file:
+        for azione in azioni:
+            file.write(f"{azione}\n")
+        file.write(f"; cost = {len(azioni)} (unit cost)\n")
@@ -1,21 +1,40 @@
 # Interfaccia grafica principale sistema taxi
 
+import time
 import tkinter as tk
 from tkinter import ttk
 
 from ..configurazione.costanti import (
     GRIGLIA_LARGHEZZA, GRIGLIA_ALTEZZA, PIXEL_PER_CELLA, STAZIONE, OSTACOLI,
-    TAXI_SINGOLO, TAXI_CONDIVISO, COSTO_PER_STEP, COLORI,
-    PERCORSI_PIANI, PERCORSI_POSIZIONI, CONFIGURAZIONE_PROBLEMI,
-    VELOCITA_ANIMAZIONE_DEFAULT
+    TAXI_SINGOLO, TAXI_CONDIVISO, COLORI, COLORI_FLOTTA,
+    PERCORSI_PIANI, PERCORSI_POSIZIONI, PERCORSI_PROBLEMI, CONFIGURAZIONE_PROBLEMI,
+    VELOCITA_ANIMAZIONE_DEFAULT, STRUMENTAZIONE_ATTIVA, FILE_RAPPORTO_STRUMENTAZIONE,
+    AGGIORNAMENTO_TELEMETRIA_FRAME, RIPRODUCI_PIANO_PDDL_DEFAULT, COMPATTA_PIANO_PDDL,
+    STRATEGIA_ACCOPPIAMENTO_DEFAULT, CAPACITA_TAXI_DEFAULT
 )
 from ..configurazione.modelli import StatoAnimazione, ConfigProblema
 from ..gestione_file.lettore_file import (
-    trova_primo_file_esistente, leggi_azioni_da_piano, carica_posizioni_da_json,
-    estrai_prima_mappatura_pickup
+    trova_primo_file_esistente, itera_azioni_da_piano, carica_posizioni_da_json,
+    estrai_prima_mappatura_pickup, leggi_problema_pddl
 )
-from ..pianificazione.costruttore_rotte import costruisci_viaggio_da_azioni
-from ..pianificazione.gestore_taxi import costruisci_piani_taxi_singolo_e_condiviso
+from ..gestione_file.cache_piani import ottieni_cache_piani, calcola_chiave_scenario
+from ..pianificazione.costruttore_rotte import costruisci_rotte_da_azioni, ottimizza_sequenza_azioni
+from ..pianificazione.pianificatore_flotta import costruisci_piani_flotta
+from ..pianificazione.risolutore_pddl import genera_piano_da_problema
+from ..simulazione.motore import MotoreSimulazione
+from ..simulazione.cronologia import costruisci_cronologia
+from ..diagnostica.strumentazione import (
+    strumentazione, configura_strumentazione, profila_prossimo_caricamento
+)
+from ..diagnostica.telemetria_frame import TelemetriaFrame, CadenzaAnimazione
+
+
+class CanvasStrumentato(tk.Canvas):
+    # Canvas che conta gli oggetti creati quando la strumentazione è attiva
+    # Tutti i create_* di Tkinter passano da _create
+    def _create(self, tipo, argomenti, opzioni):
+        strumentazione.conta("canvas.oggetti_creati")
+        return super()._create(tipo, argomenti, opzioni)
 
 
 class FinestraPrincipale:
@@ -31,10 +50,15 @@ class FinestraPrincipale:
         self.piano_multi_taxi = None
         self.piano_viaggio_singolo = None
         self.etichette_clienti = {}
+        self.motore_simulazione = None  # Motore headless che produce gli step animati
+        self.cronologia = None  # Stato precalcolato a ogni step, per il cursore
         
         # Controllo loop animazione
         self.loop_attivo = False
         self.timer_id = None
+        self.cadenza = CadenzaAnimazione(VELOCITA_ANIMAZIONE_DEFAULT / 1000)
+        self.telemetria_frame = TelemetriaFrame()
+        self.inizio_frame_precedente = None
         
         # Stato interfaccia grafica
         self.pixel_per_cella = PIXEL_PER_CELLA
@@ -44,6 +68,7 @@ class FinestraPrincipale:
         self.clienti_prelevati = set()  # Set dei clienti già prelevati
         self.percorsi_completati = {}  # Percorsi completati per ogni cliente {cliente: [(x1,y1), (x2,y2), ...]}
         self.clienti_consegnati = set()  # Set dei clienti consegnati
+        self.tracce_disegnate = {}  # {nome_taxi: {cliente: ultimo indice percorso già disegnato}}
         self.pulsanti_problemi = {}  # Riferimenti ai pulsanti dei problemi
         self.problema_attivo = None  # Numero del problema attualmente attivo alla stazione
         
@@ -55,6 +80,12 @@ class FinestraPrincipale:
         self.var_costo_condiviso = tk.StringVar(value="Taxi condiviso: 0€")
         self.etichette_costi_clienti = {}
         
+        # Strumentazione: F11 attiva/disattiva timer e contatori, F12 profila il prossimo caricamento
+        if STRUMENTAZIONE_ATTIVA:
+            configura_strumentazione(True, FILE_RAPPORTO_STRUMENTAZIONE)
+        self.finestra.bind("<F11>", lambda evento: self.commuta_strumentazione())
+        self.finestra.bind("<F12>", lambda evento: self.profila_ricaricamento())
+        
         # Inizializza l'interfaccia
         self.crea_interfaccia()
         self.configura_layout()
@@ -66,7 +97,7 @@ class FinestraPrincipale:
     def crea_interfaccia(self):
         # Crea tutti i componenti dell'interfaccia grafica
         # Canvas principale per la griglia
-        self.canvas = tk.Canvas(
+        self.canvas = CanvasStrumentato(
             self.finestra,
             width=GRIGLIA_LARGHEZZA * PIXEL_PER_CELLA,
             height=GRIGLIA_ALTEZZA * PIXEL_PER_CELLA,
@@ -99,8 +130,20 @@ class FinestraPrincipale:
             # Salva riferimento per aggiornamenti futuri
             self.pulsanti_problemi[numero] = pulsante
         
+        # Piano PDDL riprodotto così com'è: i piani con più veicoli diventano una flotta in parallelo
+        self.variabile_riproduci_piano = tk.BooleanVar(value=RIPRODUCI_PIANO_PDDL_DEFAULT)
+        ttk.Checkbutton(
+            self.pannello_controlli, text="Riproduci piano PDDL",
+            variable=self.variabile_riproduci_piano, command=self.ricarica_problema_attivo
+        ).pack(anchor="w", pady=(4, 0))
+        
         ttk.Separator(self.pannello_controlli, orient="horizontal").pack(fill="x", pady=8)
     
+    def ricarica_problema_attivo(self):
+        # Cambio di modalità: il problema aperto si ricarica con la nuova scelta
+        if self.problema_attivo is not None:
+            self.carica_problema(self.problema_attivo)
+    
     def crea_comando_carica_problema(self, numero):
         # Crea comando per caricare problema specifico
         def comando():
@@ -144,6 +187,21 @@ class FinestraPrincipale:
         self.variabile_velocita = tk.IntVar(value=VELOCITA_ANIMAZIONE_DEFAULT)
         ttk.Entry(self.pannello_controlli, textvariable=self.variabile_velocita, width=8).pack(anchor="w")
         
+        # Telemetria frame: tempo di lavoro, jitter e step recuperati per frame
+        self.variabile_telemetria = tk.StringVar(value="Frame: -")
+        ttk.Label(self.pannello_controlli, textvariable=self.variabile_telemetria,
+                 font=("Arial", 8), wraplength=180).pack(anchor="w", pady=(4, 0))
+        
+        # Cursore sugli step: salto diretto a qualsiasi punto della cronologia
+        self.variabile_passo = tk.DoubleVar(value=0)
+        self.var_etichetta_passo = tk.StringVar(value="Step 0 / 0")
+        ttk.Label(self.pannello_controlli, textvariable=self.var_etichetta_passo).pack(anchor="w", pady=(8, 0))
+        self.cursore_passo = ttk.Scale(
+            self.pannello_controlli, from_=0, to=0, orient="horizontal",
+            variable=self.variabile_passo, command=self.sposta_cursore_passo
+        )
+        self.cursore_passo.pack(fill="x")
+        
         ttk.Separator(self.pannello_controlli, orient="horizontal").pack(fill="x", pady=8)
     
     def crea_dashboard_costi(self):
@@ -244,7 +302,9 @@ class FinestraPrincipale:
             percorso_posizioni=PERCORSI_POSIZIONI[numero_problema],
             usa_multi_taxi=config['usa_multi_taxi'],
             taxi_condiviso=config['taxi_condiviso'],
-            colore_taxi=config['colore_taxi']
+            colore_taxi=config['colore_taxi'],
+            percorso_problema=PERCORSI_PROBLEMI.get(numero_problema),
+            riproduci_piano=self.variabile_riproduci_piano.get()
         )
         
         self.carica_da_configurazione(self.configurazione_corrente)
@@ -252,43 +312,234 @@ class FinestraPrincipale:
     
     def carica_da_configurazione(self, configurazione):
         # Carica problema da configurazione
+        # Con la strumentazione attiva ogni stadio è misurato e il rapporto stampato alla fine
+        with strumentazione.sessione(f"Caricamento {configurazione.nome}"):
+            self.esegui_caricamento(configurazione)
+    
+    def esegui_caricamento(self, configurazione):
         # Trova i file
-        percorso_piano = trova_primo_file_esistente([configurazione.percorso_piano])
-        if not percorso_piano:
-            return
-        
-        percorso_posizioni = trova_primo_file_esistente([configurazione.percorso_posizioni])
+        with strumentazione.misura("ricerca_file"):
+            percorso_piano = trova_primo_file_esistente([configurazione.percorso_piano])
+            percorso_posizioni = trova_primo_file_esistente([configurazione.percorso_posizioni])
+            percorso_problema = None
+            if configurazione.percorso_problema:
+                percorso_problema = trova_primo_file_esistente([configurazione.percorso_problema])
         if not percorso_posizioni:
             return
         
-        # Carica i dati
-        azioni = leggi_azioni_da_piano(percorso_piano)
-        posizioni = carica_posizioni_da_json(percorso_posizioni)
-        
-        if configurazione.usa_multi_taxi:
-            # Modalità multi-taxi con accoppiamento automatico
-            mappa_pickup = estrai_prima_mappatura_pickup(azioni)
-            self.piano_multi_taxi = costruisci_piani_taxi_singolo_e_condiviso(
-                mappa_pickup, posizioni, raggio_coppia=2
-            )
-            self.piano_viaggio_singolo = None
-            self.etichette_clienti = self.piano_multi_taxi.etichette
+        # Piano mancante: lo genera il risolutore interno dal problema PDDL, se c'è
+        if not percorso_piano:
+            if not percorso_problema:
+                return
+            print(f"[WARNING] Piano {configurazione.percorso_piano} non trovato: "
+                  f"generato dal problema {percorso_problema}")
+        
+        # Pianificatore di flotta solo in multi-taxi e se il piano non va riprodotto così com'è
+        pianifica_flotta = configurazione.usa_multi_taxi and not configurazione.riproduci_piano
+        
+        # Flotta dichiarata nel problema PDDL (taxi1 taxi2 ...), solo per il pianificatore di flotta
+        nomi_taxi = None
+        if pianifica_flotta:
+            nomi_taxi = self.leggi_flotta(percorso_problema)
+        
+        # Scenario già risolto: i piani arrivano dalla cache su disco
+        if pianifica_flotta:
+            modalita = "flotta:" + ",".join(nomi_taxi or ())
         else:
-            # Modalità taxi singolo
-            viaggio, etichette = costruisci_viaggio_da_azioni(azioni, posizioni)
-            self.piano_multi_taxi = None
-            self.piano_viaggio_singolo = viaggio
-            self.etichette_clienti = etichette
+            modalita = "piano_pddl:compatto" if COMPATTA_PIANO_PDDL else "piano_pddl"
+        if not percorso_piano:
+            modalita += ":risolutore"
+        raggio_coppia = 2 if pianifica_flotta else None
+        cache = ottieni_cache_piani()
+        with strumentazione.misura("cache.carica"):
+            chiave = calcola_chiave_scenario(percorso_piano or percorso_problema, percorso_posizioni,
+                                             modalita, raggio_coppia, STRATEGIA_ACCOPPIAMENTO_DEFAULT,
+                                             CAPACITA_TAXI_DEFAULT)
+            risultato = cache.carica(chiave)
+        
+        if risultato is None:
+            strumentazione.conta("cache.mancati")
+            risultato = self.calcola_piani(percorso_piano, percorso_posizioni,
+                                           pianifica_flotta, raggio_coppia, nomi_taxi, percorso_problema)
+            with strumentazione.misura("cache.salva"):
+                cache.salva(chiave, risultato)
+        else:
+            strumentazione.conta("cache.trovati")
+        
+        self.piano_multi_taxi, self.piano_viaggio_singolo, self.etichette_clienti = risultato
         
         # Aggiorna interfaccia
         self.finestra.title(f"Sistema Taxi Intelligenti - {configurazione.nome}")
-        self.reset_stato()
-        self.ridisegna_scenario_completo()
+        with strumentazione.misura("reset_stato"):
+            self.reset_stato()
+        with strumentazione.misura("ridisegna_scenario_completo"):
+            self.ridisegna_scenario_completo()
+        
+        # Cronologia dopo il primo disegno: i percorsi hanno già la stazione in testa
+        with strumentazione.misura("cronologia"):
+            self.costruisci_cronologia()
         
         # Forza aggiornamento completo dell'interfaccia
-        self.finestra.update_idletasks()
-        self.finestra.update()
+        with strumentazione.misura("aggiornamento_tk"):
+            self.finestra.update_idletasks()
+            self.finestra.update()
+    
+    def leggi_flotta(self, percorso_problema):
+        # Nomi dei taxi dichiarati nel problema; None (flotta di default) se il file manca o non è valido
+        if not percorso_problema or not trova_primo_file_esistente([percorso_problema]):
+            return None
+        try:
+            return leggi_problema_pddl(percorso_problema).taxi or None
+        except (OSError, ValueError) as e:
+            print(f"[WARNING] Flotta non letta da {percorso_problema}: {e}")
+            return None
+    
+    def calcola_piani(self, percorso_piano, percorso_posizioni, usa_multi_taxi, raggio_coppia,
+                      nomi_taxi=None, percorso_problema=None):
+        # Carica i dati e calcola i piani: (piano multi-taxi, viaggio singolo, etichette)
+        # Multi-taxi: la flotta del problema PDDL (nomi_taxi) si divide clienti e coppie
+        # Il piano è letto in streaming: ogni azione viene tokenizzata una sola volta
+        # Senza percorso_piano le azioni arrivano dal risolutore interno (percorso_problema)
+        if percorso_piano:
+            azioni = itera_azioni_da_piano(percorso_piano)
+        else:
+            with strumentazione.misura("risolutore_pddl"):
+                azioni = genera_piano_da_problema(percorso_problema, percorso_posizioni,
+                                                  capacita=CAPACITA_TAXI_DEFAULT,
+                                                  strategia_accoppiamento=STRATEGIA_ACCOPPIAMENTO_DEFAULT)
+        with strumentazione.misura("carica_posizioni_da_json"):
+            posizioni = carica_posizioni_da_json(percorso_posizioni)
+        
+        if usa_multi_taxi:
+            # Modalità multi-taxi con accoppiamento automatico
+            with strumentazione.misura("lettura_piano"):
+                mappa_pickup = estrai_prima_mappatura_pickup(azioni)
+            with strumentazione.misura("pianificazione"):
+                piano_multi_taxi = costruisci_piani_flotta(
+                    mappa_pickup, posizioni, capacita=CAPACITA_TAXI_DEFAULT, raggio_coppia=raggio_coppia,
+                    strategia_accoppiamento=STRATEGIA_ACCOPPIAMENTO_DEFAULT, nomi_taxi=nomi_taxi
+                )
+            return piano_multi_taxi, None, piano_multi_taxi.etichette
+        
+        # Piano PDDL riprodotto: stesse tappe, con COMPATTA_PIANO_PDDL giri compattati e riordinati
+        # Un percorso per taxi: con più taxi nel piano si anima una flotta in parallelo
+        if COMPATTA_PIANO_PDDL:
+            with strumentazione.misura("compattazione_piano"):
+                rapporto = {}
+                azioni = ottimizza_sequenza_azioni(azioni, posizioni, rapporto)
+            if rapporto['passi_dopo'] < rapporto['passi_prima']:
+                print(f"[INFO] Piano compattato: {rapporto['passi_prima']} -> {rapporto['passi_dopo']} passi")
+        with strumentazione.misura("lettura_piano_e_viaggio"):
+            return costruisci_rotte_da_azioni(azioni, posizioni)
+    
+    def commuta_strumentazione(self):
+        # F11: accende o spegne timer e contatori per i caricamenti successivi
+        configura_strumentazione(not strumentazione.attiva, FILE_RAPPORTO_STRUMENTAZIONE)
+        print(f"[INFO] Strumentazione {'attiva' if strumentazione.attiva else 'disattivata'}")
+    
+    def profila_ricaricamento(self):
+        # F12: ricarica il problema corrente sotto cProfile (solo questo caricamento)
+        if self.configurazione_corrente is None:
+            return
+        profila_prossimo_caricamento()
+        self.carica_da_configurazione(self.configurazione_corrente)
+    
+    def costruisci_cronologia(self):
+        # Posizioni, occupazione e somme prefisse dei costi per ogni step del piano caricato
+        if self.motore_simulazione is None:
+            self.cronologia = None
+        else:
+            self.cronologia = costruisci_cronologia(self.motore_simulazione.piani)
+        passi_totali = self.cronologia.passi_totali if self.cronologia else 0
+        self.cursore_passo.configure(to=passi_totali)
+        self.aggiorna_cursore_passo()
+    
+    def passo_corrente(self):
+        # Step globale raggiunto: i taxi avanzano in parallelo
+        if self.motore_simulazione is None:
+            return 0
+        return max(self.motore_simulazione.indici.values(), default=0)
+    
+    def aggiorna_cursore_passo(self):
+        # Allinea cursore ed etichetta allo step corrente (la variabile non richiama il comando)
+        passo = self.passo_corrente()
+        passi_totali = self.cronologia.passi_totali if self.cronologia else 0
+        self.variabile_passo.set(passo)
+        self.var_etichetta_passo.set(f"Step {passo} / {passi_totali}")
+    
+    def sposta_cursore_passo(self, valore):
+        # Comando del cursore: Tk passa il valore come stringa decimale
+        passo = int(round(float(valore)))
+        if passo != self.passo_corrente():
+            self.vai_a_passo(passo)
+    
+    def vai_a_passo(self, passo):
+        # SALTO DIRETTO: lo stato allo step richiesto arriva dalla cronologia precalcolata,
+        # senza rieseguire prelievi, consegne e costi degli step precedenti
+        # Il costo dipende da taxi, clienti e tracce visibili, non dallo step raggiunto
+        if self.cronologia is None or self.motore_simulazione is None:
+            return
+        
+        stato = self.cronologia.stato(passo)
+        piani = self.motore_simulazione.piani
         
+        # Stato logico: clienti prelevati/consegnati e tracciamenti
+        self.clienti_prelevati = set(stato.prelevati)
+        self.clienti_consegnati = set(stato.consegnati)
+        self.percorsi_completati.clear()
+        for cliente, (nome_taxi, indice_prelievo) in stato.prelevati.items():
+            percorso = piani[nome_taxi].percorso
+            indice = stato.indici_taxi[nome_taxi]
+            self.percorsi_completati[cliente] = {
+                'percorso_verso_cliente': percorso[:indice_prelievo + 1],
+                'percorso_verso_stazione': percorso[indice_prelievo:indice + 1] if indice > indice_prelievo else [],
+                'indice_prelievo': indice_prelievo,
+                'completato': cliente in stato.consegnati
+            }
+        
+        # Costi: somme prefisse lette allo step richiesto
+        self.stato_animazione.costi_clienti = {cliente: 0.0 for cliente in self.etichette_clienti}
+        self.stato_animazione.costi_clienti.update(stato.costi_clienti)
+        self.stato_animazione.costo_taxi_singolo = 0.0
+        self.stato_animazione.costo_taxi_condiviso = 0.0
+        for nome_taxi, costo in stato.costi_taxi.items():
+            if self.taxi_condiviso(nome_taxi):
+                self.stato_animazione.costo_taxi_condiviso += costo
+            else:
+                self.stato_animazione.costo_taxi_singolo += costo
+        self.motore_simulazione.imposta_stato(stato.indici_taxi, stato.costi_clienti, stato.costi_taxi)
+        
+        # Ridisegno: scenario di base, poi taxi nelle nuove posizioni e tracce dei clienti a bordo
+        self.ridisegna_scenario_completo()
+        for nome_taxi, indice in stato.indici_taxi.items():
+            piano = piani[nome_taxi]
+            self.stato_animazione.aggiorna_taxi(nome_taxi, indice)
+            if self.piano_multi_taxi:
+                self.muovi_taxi_multi(nome_taxi, piano.percorso[indice])
+                self.disegna_tracce_clienti_attivi(piano, indice, nome_taxi)
+            else:
+                self.muovi_taxi_singolo(piano.percorso[indice])
+                self.disegna_tracce_clienti_attivi(piano, indice, TAXI_SINGOLO)
+        
+        self.aggiorna_visualizzazione_costi()
+        self.aggiorna_cursore_passo()
+    
+    def colori_taxi(self, nome_taxi):
+        # (colore taxi, colore traccia): coppia storica per singolo/condiviso,
+        # altrimenti un colore per veicolo della flotta in ordine di piano
+        if nome_taxi == TAXI_SINGOLO:
+            return COLORI['taxi_singolo'], COLORI['traccia_singolo']
+        if nome_taxi == TAXI_CONDIVISO:
+            return COLORI['taxi_condiviso'], COLORI['traccia_condiviso']
+        nomi = list(self.piano_multi_taxi.piani) if self.piano_multi_taxi else []
+        indice = nomi.index(nome_taxi) if nome_taxi in nomi else 0
+        return COLORI_FLOTTA[indice % len(COLORI_FLOTTA)]
+    
+    def taxi_condiviso(self, nome_taxi):
+        # Dashboard: a quale totale va il costo del taxi
+        if self.piano_multi_taxi:
+            return nome_taxi != TAXI_SINGOLO
+        return bool(self.configurazione_corrente and self.configurazione_corrente.taxi_condiviso)
     
     def reset_stato(self):
         # Resetta lo stato dell'animazione e dei costi
@@ -304,8 +555,11 @@ class FinestraPrincipale:
         if self.piano_multi_taxi:
             for nome_taxi in self.piano_multi_taxi.piani.keys():
                 self.stato_animazione.aggiorna_taxi(nome_taxi, 0)
+            self.motore_simulazione = MotoreSimulazione(self.piano_multi_taxi)
         else:
             self.stato_animazione.aggiorna_taxi("singolo", 0)
+            self.motore_simulazione = (MotoreSimulazione({"singolo": self.piano_viaggio_singolo})
+                                       if self.piano_viaggio_singolo else None)
         
         # Inizializza i costi per i clienti correnti
         for cliente in self.etichette_clienti.keys():
@@ -320,14 +574,17 @@ class FinestraPrincipale:
         self.clienti_prelevati.clear()
         self.clienti_consegnati.clear()
         self.percorsi_completati.clear()
+        self.tracce_disegnate.clear()
         self.id_clienti_canvas.clear()
         
         self.aggiorna_visualizzazione_costi()
+        self.aggiorna_cursore_passo()
     
     def ridisegna_scenario_completo(self):
         # Ridisegna l'intero scenario con ordine z-index corretto
         self.disegna_griglia_iniziale()
         self.canvas.delete("stazione", "stazione_primo_piano", "stazione_testo", "taxi", "cliente", "traccia")
+        self.tracce_disegnate.clear()
         
         # ORDINE Z-INDEX: clienti (fondo) → taxi → stazione → tracciato attivo (primo piano)
         
@@ -412,23 +669,17 @@ class FinestraPrincipale:
     
     def disegna_taxi_multi(self):
         # Disegna i taxi per il sistema multi-taxi
-        colori_taxi = {TAXI_SINGOLO: COLORI['taxi_singolo'], TAXI_CONDIVISO: COLORI['taxi_condiviso']}
-        
         for nome_taxi, piano in self.piano_multi_taxi.piani.items():
             if not piano.percorso:
                 continue
             
-            # Assicurati che il percorso inizi dalla stazione
-            if piano.percorso[0] != STAZIONE:
-                piano.percorso = [STAZIONE] + piano.percorso
-            
-            # Disegna il taxi
+            # Disegna il taxi (i piani della flotta partono già dalla stazione)
             x1, y1, x2, y2 = self.converti_cella_in_pixel(piano.percorso[0])
             padding_taxi = self.calcola_padding(0.20)
             id_taxi = self.canvas.create_rectangle(
                 x1 + padding_taxi, y1 + padding_taxi,
                 x2 - padding_taxi, y2 - padding_taxi,
-                fill=colori_taxi.get(nome_taxi, COLORI['taxi_singolo']),
+                fill=self.colori_taxi(nome_taxi)[0],
                 outline=COLORI['taxi_bordo'], width=2, tags="taxi"
             )
             
@@ -509,15 +760,21 @@ class FinestraPrincipale:
         # Cancella le tracce di questo cliente per entrambi i tipi di taxi
         self.canvas.delete(f"traccia_cliente_{etichetta_cliente}_{TAXI_SINGOLO}")
         self.canvas.delete(f"traccia_cliente_{etichetta_cliente}_{TAXI_CONDIVISO}")
+        # Taxi della flotta con nomi generici (taxi1, taxi2, ...)
+        for nome_taxi, tracce_taxi in self.tracce_disegnate.items():
+            if tracce_taxi.pop(etichetta_cliente, None) is not None:
+                self.canvas.delete(f"traccia_cliente_{etichetta_cliente}_{nome_taxi}")
     
     def disegna_tracce_clienti_attivi(self, piano, indice_corrente, nome_taxi):
         # Disegna tracce per clienti attualmente a bordo
         clienti_a_bordo = self.calcola_clienti_a_bordo(piano, indice_corrente)
+        tracce_taxi = self.tracce_disegnate.setdefault(nome_taxi, {})
         
-        # Cancella tracce dei clienti non più a bordo
-        for cliente_esistente in list(self.percorsi_completati.keys()):
+        # Cancella tracce dei clienti non più a bordo (solo quelle effettivamente disegnate)
+        for cliente_esistente in list(tracce_taxi.keys()):
             if cliente_esistente not in clienti_a_bordo or self.percorsi_completati[cliente_esistente]['completato']:
                 self.canvas.delete(f"traccia_cliente_{cliente_esistente}_{nome_taxi}")
+                del tracce_taxi[cliente_esistente]
         
         # Disegna traccia per ogni cliente a bordo
         for cliente in clienti_a_bordo:
@@ -535,22 +792,28 @@ class FinestraPrincipale:
         # Determina colore traccia corretto basato su configurazione problema
         if self.configurazione_corrente and self.configurazione_corrente.taxi_condiviso:
             colore_traccia = COLORI['traccia_condiviso']
-        elif nome_taxi == TAXI_CONDIVISO:
-            colore_traccia = COLORI['traccia_condiviso']
+        elif self.piano_multi_taxi:
+            colore_traccia = self.colori_taxi(nome_taxi)[1]
         else:
             colore_traccia = COLORI['traccia_singolo']
         
         # Disegna percorso dal prelievo alla posizione corrente
+        # INCREMENTALE: solo i segmenti successivi all'ultimo già disegnato,
+        # così il lavoro per frame resta costante anche su corse lunghe
         if indice_corrente > indice_prelievo:
-            percorso_attivo = piano.percorso[indice_prelievo:indice_corrente + 1]
+            tracce_taxi = self.tracce_disegnate.setdefault(nome_taxi, {})
+            ultimo_disegnato = tracce_taxi.get(etichetta_cliente, indice_prelievo)
+            
             # Tag unico per cliente e tipo taxi
             tag_unico = f"traccia_cliente_{etichetta_cliente}_{nome_taxi}"
-            self.disegna_traccia_percorso(
-                percorso_attivo, 
-                len(percorso_attivo) - 1, 
-                colore_traccia, 
-                tag_unico
+            self.disegna_segmenti_traccia(
+                piano.percorso,
+                ultimo_disegnato + 1,
+                indice_corrente + 1,
+                colore_traccia,
+                f"traccia {tag_unico}"
             )
+            tracce_taxi[etichetta_cliente] = max(ultimo_disegnato, indice_corrente)
     
     def disegna_traccia_percorso(self, percorso, fino_a_indice, colore_traccia=None, nome_taxi=None):
         # Disegna traccia percorso fino a indice specificato (inclusa stazione finale)
@@ -570,7 +833,11 @@ class FinestraPrincipale:
         if fino_a_indice < len(percorso) - 1 and percorso[fino_a_indice + 1] == STAZIONE:
             fine_effettiva = min(fino_a_indice + 2, len(percorso))
         
-        for i in range(1, fine_effettiva):
+        self.disegna_segmenti_traccia(percorso, 1, fine_effettiva, colore_traccia, tag_traccia)
+    
+    def disegna_segmenti_traccia(self, percorso, da_indice, a_indice, colore_traccia, tag_traccia):
+        # Disegna i segmenti percorso[i-1] -> percorso[i] per i in [da_indice, a_indice)
+        for i in range(max(1, da_indice), min(a_indice, len(percorso))):
             punto_a = percorso[i - 1]
             punto_b = percorso[i]
             
@@ -618,6 +885,7 @@ class FinestraPrincipale:
                 self.stato_animazione.velocita = VELOCITA_ANIMAZIONE_DEFAULT
             
             self.pulsante_play.config(text="⏸ Pause")
+            self.avvia_cadenza()
             self.loop_animazione()
     
     def reset_animazione(self):
@@ -632,19 +900,51 @@ class FinestraPrincipale:
         self.reset_stato()
         self.ridisegna_scenario_completo()
     
+    def avvia_cadenza(self):
+        # Nuova sequenza di frame: scadenze ripartono da adesso, statistiche azzerate
+        self.cadenza = CadenzaAnimazione(self.stato_animazione.velocita / 1000)
+        self.cadenza.avvia(time.perf_counter())
+        self.telemetria_frame.azzera()
+        self.inizio_frame_precedente = None
+    
     def loop_animazione(self):
         # Loop principale dell'animazione
+        # Pacing a orologio: se il frame parte in ritardo esegue più step prima di ridisegnare,
+        # poi il prossimo frame è programmato sulla scadenza successiva, non dopo velocita fissi
         if not self.stato_animazione.attiva or self.loop_attivo:
             return
         
         self.loop_attivo = True
-        self.avanza_step_animazione()
+        inizio = time.perf_counter()
+        ritardo = self.cadenza.ritardo(inizio)
+        passi_dovuti = self.cadenza.passi_dovuti(inizio)
+        
+        passi = 0
+        while passi < passi_dovuti and self.stato_animazione.attiva:
+            self.avanza_step_animazione()
+            passi += 1
+        
+        self.aggiorna_cursore_passo()
+        fine = time.perf_counter()
+        self.cadenza.registra_passi(passi, fine)
+        self.registra_frame(inizio, fine, ritardo, passi)
         
         if self.stato_animazione.attiva:
-            self.timer_id = self.finestra.after(self.stato_animazione.velocita, self.continua_loop)
+            self.timer_id = self.finestra.after(self.cadenza.attesa_ms(fine), self.continua_loop)
         else:
             self.loop_attivo = False
     
+    def registra_frame(self, inizio, fine, ritardo, passi):
+        # Aggiorna le statistiche mobili e, ogni tanto, la riga di telemetria
+        intervallo = None
+        if self.inizio_frame_precedente is not None:
+            intervallo = inizio - self.inizio_frame_precedente
+        self.inizio_frame_precedente = inizio
+        self.telemetria_frame.registra(fine - inizio, intervallo, ritardo, passi)
+        
+        if self.telemetria_frame.frame_totali % AGGIORNAMENTO_TELEMETRIA_FRAME == 0:
+            self.variabile_telemetria.set(self.telemetria_frame.descrizione())
+    
     def continua_loop(self):
         # Continua il loop dell'animazione
         self.loop_attivo = False
@@ -669,75 +969,61 @@ class FinestraPrincipale:
     
     def avanza_multi_taxi(self):
         # Avanza l'animazione per il sistema multi-taxi
-        movimento_effettuato = False
+        # Il motore di simulazione calcola lo step, la GUI si limita a mostrarlo
+        passi = self.motore_simulazione.avanza_step()
         
-        for nome_taxi, piano in self.piano_multi_taxi.piani.items():
-            indice_corrente = self.stato_animazione.get_indice_taxi(nome_taxi)
-            
-            if indice_corrente >= len(piano.percorso) - 1:
-                continue
-            
-            # Avanza di un step
-            nuovo_indice = indice_corrente + 1
-            self.stato_animazione.aggiorna_taxi(nome_taxi, nuovo_indice)
+        for passo in passi:
+            nome_taxi = passo.nome_taxi
+            piano = self.piano_multi_taxi.piani[nome_taxi]
+            self.stato_animazione.aggiorna_taxi(nome_taxi, passo.indice)
             
             # Muovi il taxi
-            self.muovi_taxi_multi(nome_taxi, piano.percorso[nuovo_indice])
-            
-            # Gestisci eventi di prelievo
-            self.gestisci_eventi_prelievo(piano, nuovo_indice)
-            
-            # Gestisci eventi di consegna
-            self.gestisci_eventi_consegna(piano, nuovo_indice)
+            self.muovi_taxi_multi(nome_taxi, passo.posizione)
             
-            # Aggiorna tracciamento percorsi per clienti a bordo
-            self.aggiorna_tracciamenti_percorsi(piano, nuovo_indice)
-            
-            # Disegna tracce clienti attivi
-            self.disegna_tracce_clienti_attivi(piano, nuovo_indice, nome_taxi)
+            # Mostra prelievi, consegne e tracce del passo
+            self.mostra_passo(passo, piano, nome_taxi)
             
             # Aggiorna costi
-            self.aggiorna_costi_multi_taxi(piano, indice_corrente, nome_taxi)
-            movimento_effettuato = True
+            self.aggiorna_costi_multi_taxi(passo)
         
-        return movimento_effettuato
+        return bool(passi)
     
     def avanza_taxi_singolo(self):
         # Avanza l'animazione per il taxi singolo
         if not self.piano_viaggio_singolo or not self.piano_viaggio_singolo.percorso:
             return False
         
-        indice_corrente = self.stato_animazione.get_indice_taxi("singolo")
-        
-        if indice_corrente >= len(self.piano_viaggio_singolo.percorso) - 1:
+        passi = self.motore_simulazione.avanza_step()
+        if not passi:
             return False
         
-        # Avanza di un step
-        nuovo_indice = indice_corrente + 1
-        self.stato_animazione.aggiorna_taxi("singolo", nuovo_indice)
+        passo = passi[0]
+        self.stato_animazione.aggiorna_taxi("singolo", passo.indice)
         
         # Muovi il taxi
-        nuova_posizione = self.piano_viaggio_singolo.percorso[nuovo_indice]
-        self.muovi_taxi_singolo(nuova_posizione)
+        self.muovi_taxi_singolo(passo.posizione)
+        
+        # Per taxi singolo, usa sempre TAXI_SINGOLO indipendentemente dalla configurazione
+        self.mostra_passo(passo, self.piano_viaggio_singolo, TAXI_SINGOLO)
+        
+        # Aggiorna costi
+        self.aggiorna_costi_taxi_singolo(passo)
         
+        return True
+    
+    def mostra_passo(self, passo, piano, nome_taxi):
+        # Rende visibile uno step prodotto dal motore di simulazione
         # Gestisci eventi di prelievo
-        self.gestisci_eventi_prelievo(self.piano_viaggio_singolo, nuovo_indice)
+        self.gestisci_eventi_prelievo(passo, piano)
         
         # Gestisci eventi di consegna
-        self.gestisci_eventi_consegna(self.piano_viaggio_singolo, nuovo_indice)
+        self.gestisci_eventi_consegna(passo)
         
         # Aggiorna tracciamento percorsi per clienti a bordo
-        self.aggiorna_tracciamenti_percorsi(self.piano_viaggio_singolo, nuovo_indice)
+        self.aggiorna_tracciamenti_percorsi(passo, piano)
         
         # Disegna tracce clienti attivi
-        # Per taxi singolo, usa sempre TAXI_SINGOLO indipendentemente dalla configurazione
-        nome_taxi = TAXI_SINGOLO
-        self.disegna_tracce_clienti_attivi(self.piano_viaggio_singolo, nuovo_indice, nome_taxi)
-        
-        # Aggiorna costi
-        self.aggiorna_costi_taxi_singolo(indice_corrente)
-        
-        return True
+        self.disegna_tracce_clienti_attivi(piano, passo.indice, nome_taxi)
     
     def muovi_taxi_multi(self, nome_taxi, nuova_posizione):
         # Muove un taxi specifico nel sistema multi-taxi
@@ -767,102 +1053,63 @@ class FinestraPrincipale:
             x2 - padding_taxi, y2 - padding_taxi
         )
     
-    def gestisci_eventi_prelievo(self, piano, indice):
+    def gestisci_eventi_prelievo(self, passo, piano):
         # Gestisce eventi prelievo clienti
-        if not hasattr(piano, 'eventi_prelievo') or indice not in piano.eventi_prelievo:
-            return
-        
         # Marca tutti i clienti prelevati a questo step
-        for cliente in piano.eventi_prelievo[indice]:
+        for cliente in passo.prelevati:
             self.marca_cliente_prelevato(cliente)
             # Inizia a tracciare il percorso per questo cliente
-            self.inizia_tracciamento_percorso(cliente, piano.percorso, indice)
+            self.inizia_tracciamento_percorso(cliente, piano.percorso, passo.indice)
     
-    def gestisci_eventi_consegna(self, piano, indice):
+    def gestisci_eventi_consegna(self, passo):
         # Gestisce eventi consegna clienti
         # Verifica se siamo alla stazione e ci sono clienti a bordo da consegnare
-        if indice < len(piano.percorso) and piano.percorso[indice] == STAZIONE:
-            # Trova i clienti che devono essere consegnati
-            clienti_a_bordo = self.calcola_clienti_a_bordo(piano, indice - 1)
-            for cliente in clienti_a_bordo:
+        if passo.posizione == STAZIONE:
+            # Consegnati i clienti che erano a bordo durante l'ultimo step
+            for cliente in passo.clienti_paganti:
                 if cliente in self.clienti_prelevati and cliente not in self.clienti_consegnati:
                     self.completa_tracciamento_percorso(cliente)
                     # Migliora visualizzazione dropoff in stazione
                     self.evidenzia_dropoff_stazione(cliente)
     
-    def aggiorna_tracciamenti_percorsi(self, piano, indice):
+    def aggiorna_tracciamenti_percorsi(self, passo, piano):
         # Aggiorna tracciamento percorsi clienti a bordo
-        clienti_a_bordo = self.calcola_clienti_a_bordo(piano, indice - 1)
-        for cliente in clienti_a_bordo:
+        for cliente in passo.clienti_paganti:
             if cliente in self.clienti_prelevati and cliente not in self.clienti_consegnati:
-                self.aggiorna_tracciamento_percorso(cliente, piano.percorso, indice)
+                self.aggiorna_tracciamento_percorso(cliente, piano.percorso, passo.indice)
     
     # === GESTIONE COSTI ===
     
-    def aggiorna_costi_multi_taxi(self, piano, indice_precedente, nome_taxi):
-        # Aggiorna i costi per il sistema multi-taxi
-        # Calcola chi è a bordo
-        clienti_a_bordo = self.calcola_clienti_a_bordo(piano, indice_precedente)
-        
-        # Calcola costi se ci sono clienti a bordo
-        if clienti_a_bordo and indice_precedente < len(piano.percorso) - 1:
-            costo_per_cliente = COSTO_PER_STEP / len(clienti_a_bordo)
-            
-            for cliente in clienti_a_bordo:
-                self.stato_animazione.aggiungi_costo(cliente, costo_per_cliente)
-                self.assicura_riga_costo_cliente(cliente)
-            
-            # Aggiorna contatori
-            if nome_taxi == TAXI_SINGOLO:
-                self.stato_animazione.costo_taxi_singolo += 1
-            else:
-                self.stato_animazione.costo_taxi_condiviso += 1
-        
+    def aggiorna_costi_multi_taxi(self, passo):
+        # Aggiorna i costi per il sistema multi-taxi leggendo le tariffe del piano
+        self.applica_costi_passo(passo, self.piano_multi_taxi.piani[passo.nome_taxi])
         self.aggiorna_visualizzazione_costi()
     
-    def aggiorna_costi_taxi_singolo(self, indice_precedente):
-        # Aggiorna i costi per il taxi singolo
-        if not self.piano_viaggio_singolo:
-            return
-        
-        # Calcola chi è a bordo
-        clienti_a_bordo = self.calcola_clienti_a_bordo(self.piano_viaggio_singolo, indice_precedente)
-        
-        # Calcola costi se ci sono clienti a bordo
-        if clienti_a_bordo and indice_precedente < len(self.piano_viaggio_singolo.percorso) - 1:
-            costo_per_cliente = COSTO_PER_STEP / len(clienti_a_bordo)
-            
-            for cliente in clienti_a_bordo:
-                self.stato_animazione.aggiungi_costo(cliente, costo_per_cliente)
-                self.assicura_riga_costo_cliente(cliente)
-            
-            # Aggiorna contatori
-            if self.configurazione_corrente and self.configurazione_corrente.taxi_condiviso:
-                self.stato_animazione.costo_taxi_condiviso += 1
-            else:
-                self.stato_animazione.costo_taxi_singolo += 1
-        
+    def aggiorna_costi_taxi_singolo(self, passo):
+        # Aggiorna i costi per il taxi singolo leggendo le tariffe del piano
+        self.applica_costi_passo(passo, self.piano_viaggio_singolo)
         self.aggiorna_visualizzazione_costi()
     
+    def applica_costi_passo(self, passo, piano):
+        # Costi all'indice raggiunto dalle somme prefisse del piano (CostiPiano):
+        # nessuna quota ricalcolata a ogni frame
+        if not passo.clienti_paganti:
+            return
+        costi = piano.costi
+        for cliente in passo.clienti_paganti:
+            self.stato_animazione.costi_clienti[cliente] = costi.costo_cliente(cliente, passo.indice)
+            self.assicura_riga_costo_cliente(cliente)
+        
+        costo_step = costi.costo_taxi(passo.indice) - costi.costo_taxi(passo.indice_precedente)
+        if self.taxi_condiviso(passo.nome_taxi):
+            self.stato_animazione.costo_taxi_condiviso += costo_step
+        else:
+            self.stato_animazione.costo_taxi_singolo += costo_step
+    
     def calcola_clienti_a_bordo(self, piano, indice):
         # Calcola quali clienti sono a bordo a un determinato indice
-        clienti_a_bordo = []
-        
-        # Scorre tutti gli step fino all'indice corrente
-        for i in range(indice + 1):
-            # Aggiungi clienti prelevati
-            if hasattr(piano, 'eventi_prelievo') and i in piano.eventi_prelievo:
-                for cliente in piano.eventi_prelievo[i]:
-                    if cliente not in clienti_a_bordo:
-                        clienti_a_bordo.append(cliente)
-            
-            # Rimuovi clienti scesi
-            if hasattr(piano, 'eventi_discesa') and i in piano.eventi_discesa:
-                for cliente in piano.eventi_discesa[i]:
-                    if cliente in clienti_a_bordo:
-                        clienti_a_bordo.remove(cliente)
-        
-        return clienti_a_bordo
+        # Lookup sull'indice di occupazione precalcolato nel piano (niente replay)
+        return list(piano.clienti_a_bordo(indice))
     
     def aggiorna_visualizzazione_costi(self):
         # Aggiorna la visualizzazione dei costi per tutti i clienti
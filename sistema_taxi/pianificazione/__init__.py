@@ -1,3 +1,6 @@
 # Modulo pianificazione sistema taxi
 from .gestore_taxi import *
 from .costruttore_rotte import *
+from .pianificatore_flotta import *
+from .risolutore_pddl import *
+from .riparazione_rotte import *
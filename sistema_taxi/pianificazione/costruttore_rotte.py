@@ -1,6 +1,8 @@
 from ..configurazione.costanti import STAZIONE
-from ..configurazione.modelli import Viaggio, PianoTaxi
-from ..algoritmi.ricerca_percorso import percorso_astar
+from ..configurazione.modelli import Viaggio, PianoTaxi, PianiMultiTaxi
+from ..algoritmi.tabella_percorsi import ottieni_tabella_percorsi
+from ..algoritmi.ottimizzazione import ordina_tappe_percorso
+from ..gestione_file.lettore_file import tokenizza_azioni
 
 def ottieni_cella_da_label(label, posizioni_locations):
     chiave = label.lower()
@@ -11,49 +13,167 @@ def ottieni_cella_da_label(label, posizioni_locations):
 
 def costruisci_viaggio_da_azioni(lista_azioni, posizioni_locations):
     # Converte azioni SAS in piano viaggio
-    percorso_completo = []
-    eventi_prelievo = {}
-    eventi_discesa = {}
-    etichette_clienti = {}
-    posizione_corrente = None
-    
-    # Processa ogni azione
-    for numero_azione, azione_raw in enumerate(lista_azioni, 1):
-        try:
-            tokens = azione_raw.strip("()").split()
-            if not tokens:
+    # lista_azioni: lista di stringhe oppure flusso di AzionePiano (itera_azioni_da_piano)
+    costruttore = CostruttoreViaggio(posizioni_locations)
+    
+    for azione in tokenizza_azioni(lista_azioni):
+        costruttore.elabora(azione)
+    
+    return costruttore.risultato()
+
+
+def analizza_piano(lista_azioni, posizioni_locations):
+    # PASSAGGIO UNICO: costruzione rotta, validazione e statistiche
+    # consumano la stessa azione tokenizzata, il piano non viene mai materializzato
+    costruttore = CostruttoreViaggio(posizioni_locations)
+    validatore = ValidatoreAzioni()
+    statistiche = StatisticheAzioni()
+    
+    for azione in tokenizza_azioni(lista_azioni):
+        costruttore.elabora(azione)
+        validatore.elabora(azione)
+        statistiche.elabora(azione)
+    
+    viaggio, etichette_clienti = costruttore.risultato()
+    return viaggio, etichette_clienti, validatore.risultato(), statistiche.risultato()
+
+
+def costruisci_piani_da_azioni(lista_azioni, posizioni_locations):
+    # PIANI MULTI-VEICOLO: un percorso e un indice eventi per ogni taxi del piano
+    # Un solo passaggio: ogni azione aggiorna solo il taxi che la esegue,
+    # così le flotte del piano PDDL vengono riprodotte in parallelo
+    costruttore = CostruttorePianiTaxi(posizioni_locations)
+    
+    for azione in tokenizza_azioni(lista_azioni):
+        costruttore.elabora(azione)
+    
+    return costruttore.risultato()
+
+
+def costruisci_rotte_da_azioni(lista_azioni, posizioni_locations):
+    # Caricamento di un piano PDDL in un solo passaggio, come lo riproduce la GUI:
+    # (PianiMultiTaxi, None, etichette) se il piano usa più taxi, mossi in parallelo;
+    # (None, Viaggio, etichette) se ne usa uno solo, come costruisci_viaggio_da_azioni
+    piani = costruisci_piani_da_azioni(lista_azioni, posizioni_locations)
+    if len(piani.piani) > 1:
+        tabella = ottieni_tabella_percorsi()
+        for piano in piani.piani.values():
+            parti_dalla_stazione(piano, tabella)
+        return piani, None, piani.etichette
+    
+    piano = next(iter(piani.piani.values()), None)
+    if piano is None:
+        return None, Viaggio([], {}, {}), piani.etichette
+    return None, Viaggio(piano.percorso, piano.eventi_prelievo, piano.eventi_discesa), piani.etichette
+
+
+def parti_dalla_stazione(piano, tabella):
+    # I taxi della flotta partono dalla STAZIONE: se il piano inizia altrove si antepone
+    # il tragitto dalla stazione e gli eventi si spostano dello stesso numero di indici,
+    # così occupazione, costi e cronologia restano allineati al percorso
+    if not piano.percorso or piano.percorso[0] == STAZIONE:
+        return False
+    
+    tragitto = [STAZIONE] + tabella.percorso(STAZIONE, piano.percorso[0])
+    scarto = len(tragitto)
+    piano.percorso[:0] = tragitto
+    piano.eventi_prelievo = {indice + scarto: clienti for indice, clienti in piano.eventi_prelievo.items()}
+    piano.eventi_discesa = {indice + scarto: clienti for indice, clienti in piano.eventi_discesa.items()}
+    piano.aggiorna_occupazione()
+    return True
+
+
+class CostruttorePianiTaxi:
+    # Un CostruttoreViaggio per taxi, creato alla prima azione del veicolo
+    
+    def __init__(self, posizioni_locations, tabella=None):
+        self.posizioni_locations = posizioni_locations
+        self.tabella = tabella if tabella is not None else ottieni_tabella_percorsi()
+        self.costruttori = {}  # {nome_taxi: CostruttoreViaggio}
+    
+    def elabora(self, azione):
+        tokens = azione.tokens
+        if not tokens:
+            return
+        
+        # Le azioni malformate senza taxi vengono segnalate dal costruttore senza nome
+        nome_taxi = tokens[1] if len(tokens) > 1 else None
+        costruttore = self.costruttori.get(nome_taxi)
+        if costruttore is None:
+            costruttore = CostruttoreViaggio(self.posizioni_locations, self.tabella)
+            self.costruttori[nome_taxi] = costruttore
+        
+        costruttore.elabora(azione)
+    
+    def risultato(self):
+        piani_taxi = {}
+        etichette_clienti = {}
+        
+        for nome_taxi, costruttore in self.costruttori.items():
+            # Taxi senza alcuna azione valida: nessun percorso da animare
+            if not costruttore.percorso_completo:
                 continue
-            
-            operazione = tokens[0]
+            piani_taxi[nome_taxi] = PianoTaxi(costruttore.percorso_completo,
+                                              costruttore.eventi_prelievo,
+                                              costruttore.eventi_discesa)
+            etichette_clienti.update(costruttore.etichette_clienti)
+        
+        return PianiMultiTaxi(piani_taxi, etichette_clienti)
+
+
+class CostruttoreViaggio:
+    # Stato della costruzione del percorso, aggiornato un'azione alla volta
+    
+    def __init__(self, posizioni_locations, tabella=None):
+        self.posizioni_locations = posizioni_locations
+        self.tabella = tabella if tabella is not None else ottieni_tabella_percorsi()
+        self.percorso_completo = []
+        self.eventi_prelievo = {}
+        self.eventi_discesa = {}
+        self.etichette_clienti = {}
+        self.posizione_corrente = None
+    
+    def elabora(self, azione):
+        tokens = azione.tokens
+        if not tokens:
+            return
+        
+        try:
+            operazione = azione.operazione
             
             if operazione == "move":
-                posizione_corrente = processa_azione_move(tokens, posizioni_locations, 
-                                                        percorso_completo, posizione_corrente)
+                self.posizione_corrente = processa_azione_move(tokens, self.posizioni_locations,
+                                                               self.percorso_completo,
+                                                               self.posizione_corrente,
+                                                               self.tabella)
                     
             elif operazione == "pickup":
-                processa_azione_pickup(tokens, posizioni_locations,
-                                     percorso_completo, eventi_prelievo, 
-                                     etichette_clienti, posizione_corrente)
+                processa_azione_pickup(tokens, self.posizioni_locations,
+                                     self.percorso_completo, self.eventi_prelievo,
+                                     self.etichette_clienti, self.posizione_corrente)
                 
             elif operazione == "dropoff":
-                processa_azione_dropoff(tokens, percorso_completo, 
-                                      eventi_discesa, posizione_corrente)
+                processa_azione_dropoff(tokens, self.percorso_completo,
+                                      self.eventi_discesa, self.posizione_corrente)
             else:
                 print(f"[WARNING] Azione sconosciuta ignorata: {operazione}")
                 
         except Exception as e:
-            print(f"[ERROR] Errore azione {numero_azione}: {e}")
-            continue
-    
-    viaggio = Viaggio(percorso_completo, eventi_prelievo, eventi_discesa)
+            print(f"[ERROR] Errore azione {azione.numero}: {e}")
     
-    return viaggio, etichette_clienti
+    def risultato(self):
+        viaggio = Viaggio(self.percorso_completo, self.eventi_prelievo, self.eventi_discesa)
+        return viaggio, self.etichette_clienti
 
 
-def processa_azione_move(tokens, posizioni_locations, percorso_completo, posizione_corrente):
+def processa_azione_move(tokens, posizioni_locations, percorso_completo, posizione_corrente,
+                         tabella=None):
     if len(tokens) != 4:
         raise ValueError(f"Azione move malformata: {tokens}")
     
+    if tabella is None:
+        tabella = ottieni_tabella_percorsi()
+    
     _, nome_taxi, src_label, dst_label = tokens
     
     src_cella = ottieni_cella_da_label(src_label, posizioni_locations)
@@ -63,7 +183,7 @@ def processa_azione_move(tokens, posizioni_locations, percorso_completo, posizio
         posizione_corrente = src_cella
         percorso_completo.append(posizione_corrente)
     
-    segmento_intermedio = percorso_astar(posizione_corrente, dst_cella)
+    segmento_intermedio = tabella.percorso(posizione_corrente, dst_cella)
     percorso_completo.extend(segmento_intermedio)
     percorso_completo.append(dst_cella)
     
@@ -109,96 +229,247 @@ def processa_azione_dropoff(tokens, percorso_completo, eventi_discesa, posizione
 
 
 def valida_sequenza_azioni(lista_azioni):
-    errori = []
-    clienti_prelevati = set()
-    clienti_scesi = set()
+    validatore = ValidatoreAzioni()
+    for azione in tokenizza_azioni(lista_azioni):
+        validatore.elabora(azione)
+    return validatore.risultato()
+
+
+class ValidatoreAzioni:
+    # Controlli di coerenza prelievi/discese, un'azione alla volta
+    
+    def __init__(self):
+        self.errori = []
+        self.clienti_prelevati = set()
+        self.clienti_scesi = set()
     
-    for i, azione in enumerate(lista_azioni):
-        tokens = azione.strip("()").split()
+    def elabora(self, azione):
+        tokens = azione.tokens
         if not tokens:
-            continue
-            
-        operazione = tokens[0]
+            return
+        
+        numero = azione.numero
+        operazione = azione.operazione
         
         try:
             if operazione == "pickup":
                 if len(tokens) != 4:
-                    errori.append(f"Azione {i+1}: pickup malformata")
-                    continue
+                    self.errori.append(f"Azione {numero}: pickup malformata")
+                    return
                     
                 cliente = tokens[2].upper()
-                if cliente in clienti_prelevati:
-                    errori.append(f"Azione {i+1}: cliente {cliente} già prelevato")
+                if cliente in self.clienti_prelevati:
+                    self.errori.append(f"Azione {numero}: cliente {cliente} già prelevato")
                 else:
-                    clienti_prelevati.add(cliente)
+                    self.clienti_prelevati.add(cliente)
                     
             elif operazione == "dropoff":
                 if len(tokens) != 4:
-                    errori.append(f"Azione {i+1}: dropoff malformata")
-                    continue
+                    self.errori.append(f"Azione {numero}: dropoff malformata")
+                    return
                     
                 cliente = tokens[2].upper()
-                if cliente not in clienti_prelevati:
-                    errori.append(f"Azione {i+1}: cliente {cliente} non era stato prelevato")
-                elif cliente in clienti_scesi:
-                    errori.append(f"Azione {i+1}: cliente {cliente} già sceso")
+                if cliente not in self.clienti_prelevati:
+                    self.errori.append(f"Azione {numero}: cliente {cliente} non era stato prelevato")
+                elif cliente in self.clienti_scesi:
+                    self.errori.append(f"Azione {numero}: cliente {cliente} già sceso")
                 else:
-                    clienti_scesi.add(cliente)
+                    self.clienti_scesi.add(cliente)
                     
             elif operazione == "move":
                 if len(tokens) != 4:
-                    errori.append(f"Azione {i+1}: move malformata")
+                    self.errori.append(f"Azione {numero}: move malformata")
                     
         except Exception as e:
-            errori.append(f"Azione {i+1}: errore di parsing - {e}")
+            self.errori.append(f"Azione {numero}: errore di parsing - {e}")
+    
+    def risultato(self):
+        errori = list(self.errori)
+        clienti_non_scesi = self.clienti_prelevati - self.clienti_scesi
+        if clienti_non_scesi:
+            errori.append(f"Clienti prelevati ma non scesi: {clienti_non_scesi}")
+        
+        return len(errori) == 0, errori
+
+
+def ottimizza_sequenza_azioni(lista_azioni, posizioni_locations, rapporto=None):
+    # COMPATTAZIONE DEL PIANO, taxi per taxi:
+    # - catene di move consecutive diventano un'unica tratta
+    # - le move che riportano alla posizione corrente vengono eliminate
+    # - i prelievi di uno stesso giro (fino al dropoff) vengono riordinati
+    #   con l'oracolo dei percorsi minimi; il taxi arriva comunque dove arrivava prima
+    # rapporto: dizionario opzionale riempito con azioni e passi prima/dopo
+    azioni = list(tokenizza_azioni(lista_azioni))
+    tabella = ottieni_tabella_percorsi()
+    
+    def distanza(label_a, label_b):
+        return tabella.distanza(ottieni_cella_da_label(label_a, posizioni_locations),
+                                ottieni_cella_da_label(label_b, posizioni_locations))
     
-    clienti_non_scesi = clienti_prelevati - clienti_scesi
-    if clienti_non_scesi:
-        errori.append(f"Clienti prelevati ma non scesi: {clienti_non_scesi}")
+    # Ogni azione originale occupa un posto: il giro ottimizzato riusa i posti
+    # delle azioni che sostituisce, così l'intreccio tra taxi diversi non cambia
+    posti = [[] for _ in azioni]
+    giri_aperti = {}  # {nome_taxi: indici delle move/pickup del giro corrente}
+    posizioni_taxi = {}
     
-    return len(errori) == 0, errori
+    def chiudi_giro(nome_taxi):
+        indici = giri_aperti.pop(nome_taxi)
+        nuove_azioni, posizioni_taxi[nome_taxi] = compatta_giro(
+            nome_taxi, [azioni[i].tokens for i in indici], posizioni_taxi.get(nome_taxi), distanza
+        )
+        for k, testo in enumerate(nuove_azioni):
+            posti[indici[min(k, len(indici) - 1)]].append(testo)
+    
+    for i, azione in enumerate(azioni):
+        tokens = azione.tokens
+        if azione.operazione in ("move", "pickup") and len(tokens) == 4:
+            giri_aperti.setdefault(tokens[1], []).append(i)
+            continue
+        
+        # Qualsiasi altra azione (dropoff, sconosciuta, malformata) chiude il giro del suo taxi
+        if len(tokens) > 1 and tokens[1] in giri_aperti:
+            chiudi_giro(tokens[1])
+        posti[i].append(testo_azione(tokens))
+    
+    for nome_taxi in list(giri_aperti):
+        chiudi_giro(nome_taxi)
+    
+    azioni_ottimizzate = [testo for posto in posti for testo in posto]
+    
+    if rapporto is not None:
+        rapporto['azioni_prima'] = len(azioni)
+        rapporto['azioni_dopo'] = len(azioni_ottimizzate)
+        rapporto['passi_prima'] = calcola_passi_piano(azioni, posizioni_locations)
+        rapporto['passi_dopo'] = calcola_passi_piano(azioni_ottimizzate, posizioni_locations)
+    
+    return azioni_ottimizzate
 
 
-def ottimizza_sequenza_azioni(lista_azioni, posizioni_locations):
-    return lista_azioni
+def compatta_giro(nome_taxi, lista_tokens, posizione_iniziale, distanza):
+    # Giro = move e pickup consecutive di un taxi; restituisce (azioni, posizione finale)
+    # Tappe = location con almeno un prelievo, nell'ordine della prima visita
+    partenza = posizione_iniziale
+    posizione = posizione_iniziale
+    prelievi_partenza = []
+    tappe = {}
+    
+    for tokens in lista_tokens:
+        if tokens[0] == "move":
+            if posizione is None:
+                partenza = tokens[2]
+            posizione = tokens[3]
+        else:
+            luogo = tokens[3]
+            if posizione is None:
+                partenza = posizione = luogo
+            # Piano incoerente (prelievo lontano dal taxi): il giro resta invariato
+            if luogo != posizione:
+                return [testo_azione(tokens) for tokens in lista_tokens], posizione
+            if luogo == partenza:
+                prelievi_partenza.append(testo_azione(tokens))
+            else:
+                tappe.setdefault(luogo, []).append(testo_azione(tokens))
+    
+    arrivo = posizione
+    try:
+        ordine = ordina_tappe_percorso(partenza, list(tappe), arrivo, distanza)
+    except KeyError:
+        # Location sconosciute: nessun oracolo, si compatta senza riordinare
+        ordine = list(tappe)
+    
+    nuove_azioni = list(prelievi_partenza)
+    corrente = partenza
+    for luogo in ordine:
+        nuove_azioni.append(f"(move {nome_taxi} {corrente} {luogo})")
+        nuove_azioni.extend(tappe[luogo])
+        corrente = luogo
+    if arrivo != corrente:
+        nuove_azioni.append(f"(move {nome_taxi} {corrente} {arrivo})")
+    
+    return nuove_azioni, arrivo
+
+
+def testo_azione(tokens):
+    return "(" + " ".join(tokens) + ")"
+
+
+def calcola_passi_piano(lista_azioni, posizioni_locations):
+    # Passi percorsi da tutti i taxi del piano, con la stessa semantica del costruttore:
+    # ogni move parte dalla posizione effettiva del taxi
+    tabella = ottieni_tabella_percorsi()
+    posizioni_taxi = {}
+    passi_totali = 0
+    
+    for azione in tokenizza_azioni(lista_azioni):
+        tokens = azione.tokens
+        if azione.operazione != "move" or len(tokens) != 4:
+            continue
+        
+        _, nome_taxi, src_label, dst_label = tokens
+        try:
+            dst_cella = ottieni_cella_da_label(dst_label, posizioni_locations)
+            posizione = posizioni_taxi.get(nome_taxi)
+            if posizione is None:
+                posizione = ottieni_cella_da_label(src_label, posizioni_locations)
+        except KeyError:
+            continue
+        
+        passi_totali += tabella.distanza(posizione, dst_cella)
+        posizioni_taxi[nome_taxi] = dst_cella
+    
+    return passi_totali
 
 
 def estrai_statistiche_azioni(lista_azioni):
-    statistiche = {
-        'totale_azioni': len(lista_azioni),
-        'movimenti': 0,
-        'prelievi': 0,
-        'discese': 0,
-        'clienti_unici': set(),
-        'locations_visitate': set()
-    }
-    
-    for azione in lista_azioni:
-        tokens = azione.strip("()").split()
+    statistiche = StatisticheAzioni()
+    for azione in tokenizza_azioni(lista_azioni):
+        statistiche.elabora(azione)
+    return statistiche.risultato()
+
+
+class StatisticheAzioni:
+    # Contatori del piano aggiornati un'azione alla volta
+    
+    def __init__(self):
+        self.totale_azioni = 0
+        self.movimenti = 0
+        self.prelievi = 0
+        self.discese = 0
+        self.clienti_unici = set()
+        self.locations_visitate = set()
+    
+    def elabora(self, azione):
+        self.totale_azioni += 1
+        tokens = azione.tokens
         if not tokens:
-            continue
+            return
             
-        operazione = tokens[0]
+        operazione = azione.operazione
         
         if operazione == "move":
-            statistiche['movimenti'] += 1
+            self.movimenti += 1
             if len(tokens) >= 4:
-                statistiche['locations_visitate'].add(tokens[2].lower())
-                statistiche['locations_visitate'].add(tokens[3].lower())
+                self.locations_visitate.add(tokens[2].lower())
+                self.locations_visitate.add(tokens[3].lower())
                 
         elif operazione == "pickup":
-            statistiche['prelievi'] += 1
+            self.prelievi += 1
             if len(tokens) >= 3:
-                statistiche['clienti_unici'].add(tokens[2].upper())
+                self.clienti_unici.add(tokens[2].upper())
             if len(tokens) >= 4:
-                statistiche['locations_visitate'].add(tokens[3].lower())
+                self.locations_visitate.add(tokens[3].lower())
                 
         elif operazione == "dropoff":
-            statistiche['discese'] += 1
+            self.discese += 1
             if len(tokens) >= 4:
-                statistiche['locations_visitate'].add(tokens[3].lower())
-    
-    statistiche['clienti_unici'] = len(statistiche['clienti_unici'])
-    statistiche['locations_visitate'] = len(statistiche['locations_visitate'])
+                self.locations_visitate.add(tokens[3].lower())
     
-    return statistiche
+    def risultato(self):
+        return {
+            'totale_azioni': self.totale_azioni,
+            'movimenti': self.movimenti,
+            'prelievi': self.prelievi,
+            'discese': self.discese,
+            'clienti_unici': len(self.clienti_unici),
+            'locations_visitate': len(self.locations_visitate)
+        }
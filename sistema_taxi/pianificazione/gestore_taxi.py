@@ -1,16 +1,28 @@
-from ..configurazione.costanti import STAZIONE, TAXI_SINGOLO, TAXI_CONDIVISO
+from ..configurazione.costanti import (
+    STAZIONE, TAXI_SINGOLO, TAXI_CONDIVISO, STRATEGIA_ACCOPPIAMENTO_DEFAULT
+)
 from ..configurazione.modelli import PianoTaxi, PianiMultiTaxi
-from ..algoritmi.ricerca_percorso import percorso_astar, distanza_manhattan
-from ..algoritmi.ottimizzazione import trova_coppie_clienti, ordina_clienti_per_distanza_stazione
+from ..diagnostica.strumentazione import strumentazione
+from ..algoritmi.ricerca_percorso import piu_vicina_raggiungibile
+from ..algoritmi.griglia import ottieni_griglia
+from ..algoritmi.tabella_percorsi import ottieni_tabella_percorsi
+from ..algoritmi.ottimizzazione import (
+    trova_coppie_clienti, ordina_clienti_per_distanza_stazione, distanza_manhattan_stazione,
+    distanze_dalla_stazione
+)
 
 
-def pianifica_taxi_singolo_per_distanza(lista_clienti, posizioni_clienti):
+def pianifica_taxi_singolo_per_distanza(lista_clienti, posizioni_clienti, distanza_stazione=None):
     # Pianifica taxi singolo ordinando clienti per distanza dalla stazione
     if not lista_clienti:
         return PianoTaxi([STAZIONE], {}, {})
     
     # Ordina clienti per distanza dalla stazione (più vicini prima)
-    clienti_ordinati = ordina_clienti_per_distanza_stazione(lista_clienti, posizioni_clienti)
+    clienti_ordinati = ordina_clienti_per_distanza_stazione(lista_clienti, posizioni_clienti,
+                                                            distanza_stazione)
+    
+    # Andate e ritorni letti tutti dallo stesso albero radicato nella stazione
+    campo_stazione = ottieni_tabella_percorsi().campo(STAZIONE)
     
     percorso_completo = [STAZIONE]
     eventi_prelievo = {}
@@ -21,7 +33,7 @@ def pianifica_taxi_singolo_per_distanza(lista_clienti, posizioni_clienti):
         
         # Vai dal cliente
         if STAZIONE != posizione_cliente:
-            segmento_andata = percorso_astar(STAZIONE, posizione_cliente)
+            segmento_andata = campo_stazione.percorso_da_origine(posizione_cliente)
             percorso_completo.extend(segmento_andata)
         
         percorso_completo.append(posizione_cliente)
@@ -30,7 +42,7 @@ def pianifica_taxi_singolo_per_distanza(lista_clienti, posizioni_clienti):
         
         # Torna alla stazione
         if posizione_cliente != STAZIONE:
-            segmento_ritorno = percorso_astar(posizione_cliente, STAZIONE)
+            segmento_ritorno = campo_stazione.percorso_verso_origine(posizione_cliente)
             percorso_completo.extend(segmento_ritorno)
         
         percorso_completo.append(STAZIONE)
@@ -40,32 +52,42 @@ def pianifica_taxi_singolo_per_distanza(lista_clienti, posizioni_clienti):
     return PianoTaxi(percorso_completo, eventi_prelievo, eventi_discesa)
 
 
-def pianifica_taxi_condiviso_coppie(coppie_clienti, clienti_singoli, posizioni_clienti):
+def pianifica_taxi_condiviso_coppie(coppie_clienti, clienti_singoli, posizioni_clienti,
+                                    distanza_stazione=None):
     percorso_completo = [STAZIONE]
     eventi_prelievo = {}
     eventi_discesa = {}
     
-    coppie_ordinate = ordina_coppie_per_distanza(coppie_clienti, posizioni_clienti)
+    coppie_ordinate = ordina_coppie_per_distanza(coppie_clienti, posizioni_clienti, distanza_stazione)
+    tabella = ottieni_tabella_percorsi()
     
     for cliente_a, cliente_b in coppie_ordinate:
         servi_coppia_clienti(cliente_a, cliente_b, posizioni_clienti, 
-                            percorso_completo, eventi_prelievo, eventi_discesa)
+                            percorso_completo, eventi_prelievo, eventi_discesa, tabella,
+                            distanza_stazione)
     
     for cliente in clienti_singoli:
         servi_cliente_singolo(cliente, posizioni_clienti, 
-                             percorso_completo, eventi_prelievo, eventi_discesa)
+                             percorso_completo, eventi_prelievo, eventi_discesa, tabella)
     
     return PianoTaxi(percorso_completo, eventi_prelievo, eventi_discesa)
 
 
 def servi_coppia_clienti(cliente_a, cliente_b, posizioni_clienti, 
-                        percorso_completo, eventi_prelievo, eventi_discesa):
+                        percorso_completo, eventi_prelievo, eventi_discesa, tabella=None,
+                        distanza_stazione=None):
+    if tabella is None:
+        tabella = ottieni_tabella_percorsi()
+    if distanza_stazione is None:
+        distanza_stazione = distanza_manhattan_stazione
+    campo_stazione = tabella.campo(STAZIONE)
+    
     pos_a = posizioni_clienti[cliente_a]
     pos_b = posizioni_clienti[cliente_b]
     
     # Ordina clienti per distanza dalla stazione (più vicino prima)
-    dist_a_stazione = distanza_manhattan(pos_a, STAZIONE)
-    dist_b_stazione = distanza_manhattan(pos_b, STAZIONE)
+    dist_a_stazione = distanza_stazione(pos_a)
+    dist_b_stazione = distanza_stazione(pos_b)
     
     if dist_a_stazione <= dist_b_stazione:
         primo_cliente, pos_primo = cliente_a, pos_a
@@ -76,7 +98,7 @@ def servi_coppia_clienti(cliente_a, cliente_b, posizioni_clienti,
     
     # Vai al primo cliente
     if STAZIONE != pos_primo:
-        segmento = percorso_astar(STAZIONE, pos_primo)
+        segmento = campo_stazione.percorso_da_origine(pos_primo)
         percorso_completo.extend(segmento)
     
     percorso_completo.append(pos_primo)
@@ -84,7 +106,7 @@ def servi_coppia_clienti(cliente_a, cliente_b, posizioni_clienti,
     
     # Vai al secondo cliente
     if pos_primo != pos_secondo:
-        segmento = percorso_astar(pos_primo, pos_secondo)
+        segmento = tabella.percorso(pos_primo, pos_secondo)
         percorso_completo.extend(segmento)
     
     percorso_completo.append(pos_secondo)
@@ -95,7 +117,7 @@ def servi_coppia_clienti(cliente_a, cliente_b, posizioni_clienti,
     
     # Torna alla stazione
     if pos_secondo != STAZIONE:
-        segmento = percorso_astar(pos_secondo, STAZIONE)
+        segmento = campo_stazione.percorso_verso_origine(pos_secondo)
         percorso_completo.extend(segmento)
     
     percorso_completo.append(STAZIONE)
@@ -103,12 +125,16 @@ def servi_coppia_clienti(cliente_a, cliente_b, posizioni_clienti,
 
 
 def servi_cliente_singolo(cliente, posizioni_clienti, 
-                         percorso_completo, eventi_prelievo, eventi_discesa):
+                         percorso_completo, eventi_prelievo, eventi_discesa, tabella=None):
+    if tabella is None:
+        tabella = ottieni_tabella_percorsi()
+    campo_stazione = tabella.campo(STAZIONE)
+    
     pos_cliente = posizioni_clienti[cliente]
     
     # Vai al cliente
     if STAZIONE != pos_cliente:
-        segmento = percorso_astar(STAZIONE, pos_cliente)
+        segmento = campo_stazione.percorso_da_origine(pos_cliente)
         percorso_completo.extend(segmento)
     
     percorso_completo.append(pos_cliente)
@@ -116,7 +142,7 @@ def servi_cliente_singolo(cliente, posizioni_clienti,
     
     # Torna alla stazione
     if pos_cliente != STAZIONE:
-        segmento = percorso_astar(pos_cliente, STAZIONE)
+        segmento = campo_stazione.percorso_verso_origine(pos_cliente)
         percorso_completo.extend(segmento)
     
     percorso_completo.append(STAZIONE)
@@ -126,7 +152,8 @@ def servi_cliente_singolo(cliente, posizioni_clienti,
     eventi_discesa[indice_discesa].append(cliente)
 
 
-def costruisci_piani_taxi_singolo_e_condiviso(mappa_pickup_clienti, posizioni, raggio_coppia=2):
+def estrai_posizioni_clienti(mappa_pickup_clienti, posizioni):
+    # Cliente -> cella di prelievo, ignorando le location non presenti nel JSON
     etichette_clienti = {}
     for cliente, location_label in mappa_pickup_clienti.items():
         if location_label in posizioni:
@@ -135,6 +162,38 @@ def costruisci_piani_taxi_singolo_e_condiviso(mappa_pickup_clienti, posizioni, r
             if isinstance(pos, list):
                 pos = tuple(pos)
             etichette_clienti[cliente] = pos
+    return etichette_clienti
+
+
+def separa_clienti_irraggiungibili(etichette_clienti):
+    # Clienti in una regione separata dalla stazione (o su un ostacolo): O(1) ciascuno
+    # con le componenti connesse della griglia, senza alcuna ricerca di percorso
+    griglia = ottieni_griglia()
+    raggiungibili = {}
+    irraggiungibili = {}
+    
+    for cliente, pos in etichette_clienti.items():
+        if griglia.raggiungibile(STAZIONE, pos):
+            raggiungibili[cliente] = pos
+        else:
+            irraggiungibili[cliente] = pos
+    
+    if irraggiungibili:
+        print(f"[WARNING] Clienti non raggiungibili dalla stazione: {sorted(irraggiungibili)}")
+    
+    return raggiungibili, irraggiungibili
+
+
+def costruisci_piani_taxi_singolo_e_condiviso(mappa_pickup_clienti, posizioni, raggio_coppia=2,
+                                              distanza_stazione=None,
+                                              strategia_accoppiamento=STRATEGIA_ACCOPPIAMENTO_DEFAULT,
+                                              distanza_coppia=None):
+    # distanza_stazione: metrica per gli ordinamenti (default Manhattan,
+    # distanza_stradale_stazione per la distanza reale con ostacoli)
+    # strategia_accoppiamento: greedy (default) oppure ottima
+    # distanza_coppia: distanza tra clienti per il raggio (default Manhattan, distanza_hub su strada)
+    etichette_clienti = estrai_posizioni_clienti(mappa_pickup_clienti, posizioni)
+    etichette_clienti, clienti_irraggiungibili = separa_clienti_irraggiungibili(etichette_clienti)
     
     if not etichette_clienti:
         piano_singolo = PianoTaxi([STAZIONE], {}, {})
@@ -142,45 +201,60 @@ def costruisci_piani_taxi_singolo_e_condiviso(mappa_pickup_clienti, posizioni, r
         return PianiMultiTaxi({
             TAXI_SINGOLO: piano_singolo,
             TAXI_CONDIVISO: piano_condiviso
-        }, etichette_clienti)
+        }, etichette_clienti, clienti_irraggiungibili)
     
-    coppie, clienti_singoli = trova_coppie_clienti(etichette_clienti, raggio_coppia)
+    with strumentazione.misura("accoppiamento"):
+        coppie, clienti_singoli = trova_coppie_clienti(etichette_clienti, raggio_coppia, distanza_stazione,
+                                                       strategia_accoppiamento, distanza_coppia)
     
-    piano_singolo = pianifica_taxi_singolo_per_distanza(clienti_singoli, etichette_clienti)
-    piano_condiviso = pianifica_taxi_condiviso_coppie(coppie, [], etichette_clienti)
+    with strumentazione.misura("piano_taxi_singolo"):
+        piano_singolo = pianifica_taxi_singolo_per_distanza(clienti_singoli, etichette_clienti,
+                                                           distanza_stazione)
+    with strumentazione.misura("piano_taxi_condiviso"):
+        piano_condiviso = pianifica_taxi_condiviso_coppie(coppie, [], etichette_clienti,
+                                                          distanza_stazione)
     
     return PianiMultiTaxi(
         piani_taxi={
             TAXI_SINGOLO: piano_singolo,
             TAXI_CONDIVISO: piano_condiviso
         },
-        etichette_clienti=etichette_clienti
+        etichette_clienti=etichette_clienti,
+        clienti_irraggiungibili=clienti_irraggiungibili
     )
 
 
 
 
-def trova_cliente_piu_vicino(posizione_corrente, clienti_rimanenti, posizioni_clienti):
-    # Trova cliente più vicino usando distanza Manhattan
-    cliente_piu_vicino = None
-    distanza_minima = float('inf')
+def trova_cliente_piu_vicino(posizione_corrente, clienti_rimanenti, posizioni_clienti, distanza=None):
+    # Trova il cliente raggiungibile più vicino su strada (ostacoli inclusi)
+    # Una sola espansione BFS per tutti i candidati invece di una ricerca per cliente
+    # distanza: oracolo di distanza esatta (es. distanza_hub), una query per cliente
+    clienti = list(clienti_rimanenti)
+    if distanza is not None:
+        distanze = [(distanza(posizione_corrente, posizioni_clienti[cliente]), cliente)
+                    for cliente in clienti]
+        distanze = [voce for voce in distanze if voce[0] != float('inf')]
+        return min(distanze)[1] if distanze else None
+    
+    destinazioni = [posizioni_clienti[cliente] for cliente in clienti]
     
-    for cliente in clienti_rimanenti:
-        distanza = distanza_manhattan(posizione_corrente, posizioni_clienti[cliente])
-        if distanza < distanza_minima:
-            distanza_minima = distanza
-            cliente_piu_vicino = cliente
+    posizione_piu_vicina, _ = piu_vicina_raggiungibile(posizione_corrente, destinazioni)
+    if posizione_piu_vicina is None:
+        return None
     
-    return cliente_piu_vicino
+    return clienti[destinazioni.index(posizione_piu_vicina)]
 
 
-def ordina_coppie_per_distanza(coppie_clienti, posizioni_clienti):
+def ordina_coppie_per_distanza(coppie_clienti, posizioni_clienti, distanza_stazione=None):
     # Ordina coppie per distanza totale dalla stazione
+    distanze_a = distanze_dalla_stazione([posizioni_clienti[coppia[0]] for coppia in coppie_clienti],
+                                         distanza_stazione)
+    distanze_b = distanze_dalla_stazione([posizioni_clienti[coppia[1]] for coppia in coppie_clienti],
+                                         distanza_stazione)
+    
     coppie_con_distanza = []
-    for coppia in coppie_clienti:
-        cliente_a, cliente_b = coppia
-        dist_a = distanza_manhattan(posizioni_clienti[cliente_a], STAZIONE)
-        dist_b = distanza_manhattan(posizioni_clienti[cliente_b], STAZIONE)
+    for coppia, dist_a, dist_b in zip(coppie_clienti, distanze_a, distanze_b):
         distanza_totale = dist_a + dist_b
         coppie_con_distanza.append((distanza_totale, coppia))
     
@@ -0,0 +1,167 @@
+import heapq
+from ..configurazione.costanti import (
+    STAZIONE, RAGGIO_ACCOPPIAMENTO_DEFAULT, STRATEGIA_ACCOPPIAMENTO_DEFAULT,
+    PREFISSO_TAXI_FLOTTA, NUMERO_TAXI_DEFAULT, CAPACITA_TAXI_DEFAULT
+)
+from ..configurazione.modelli import PianoTaxi, PianiMultiTaxi
+from ..algoritmi.tabella_percorsi import ottieni_tabella_percorsi
+from ..algoritmi.ottimizzazione import trova_coppie_clienti, distanza_manhattan_stazione
+from .gestore_taxi import (
+    estrai_posizioni_clienti, separa_clienti_irraggiungibili, servi_coppia_clienti, servi_cliente_singolo
+)
+
+
+def nomi_taxi_flotta(numero_taxi):
+    # Nomi come nei problemi PDDL: taxi1, taxi2, ...
+    return [f"{PREFISSO_TAXI_FLOTTA}{i}" for i in range(1, numero_taxi + 1)]
+
+
+def normalizza_capacita(capacita, numero_taxi):
+    # Capacità unica per tutta la flotta oppure una per veicolo
+    if isinstance(capacita, int):
+        capacita = [capacita] * numero_taxi
+    else:
+        capacita = list(capacita)
+        if len(capacita) != numero_taxi:
+            raise ValueError(
+                f"Capacità indicate per {len(capacita)} taxi, la flotta ne ha {numero_taxi}"
+            )
+
+    for posti in capacita:
+        if posti < 1:
+            raise ValueError(f"Capacità taxi non valida: {posti}")
+
+    return capacita
+
+
+def calcola_corse(coppie, clienti_singoli, posizioni_clienti, tabella, distanza_stazione):
+    # Ogni corsa parte e torna in stazione: la sua durata in passi è esatta
+    # Coppie: stesso ordine di prelievo di servi_coppia_clienti
+    campo_stazione = tabella.campo(STAZIONE)
+    corse = []
+
+    for coppia in coppie:
+        primo, secondo = ordina_prelievi_coppia(coppia, posizioni_clienti, distanza_stazione)
+        pos_primo, pos_secondo = posizioni_clienti[primo], posizioni_clienti[secondo]
+        durata = (campo_stazione.distanza(pos_primo) +
+                  tabella.distanza(pos_primo, pos_secondo) +
+                  campo_stazione.distanza(pos_secondo))
+        corse.append((durata, coppia))
+
+    for cliente in clienti_singoli:
+        durata = 2 * campo_stazione.distanza(posizioni_clienti[cliente])
+        corse.append((durata, (cliente,)))
+
+    return corse
+
+
+def ordina_prelievi_coppia(coppia, posizioni_clienti, distanza_stazione):
+    # Stesso ordine di servi_coppia_clienti: prima il cliente più vicino alla stazione
+    cliente_a, cliente_b = coppia
+    if distanza_stazione(posizioni_clienti[cliente_a]) <= distanza_stazione(posizioni_clienti[cliente_b]):
+        return cliente_a, cliente_b
+    return cliente_b, cliente_a
+
+
+def assegna_corse_lpt(corse, capacita, carichi_iniziali=None):
+    # LONGEST PROCESSING TIME: corse dalla più lunga, ognuna al taxi meno carico
+    # Due heap (tutti i taxi / taxi con almeno 2 posti) con cancellazione pigra:
+    # una voce è valida solo se il carico coincide con quello attuale del taxi
+    # carichi_iniziali: passi già dovuti da ogni taxi prima della prima corsa (default 0)
+    carichi = list(carichi_iniziali) if carichi_iniziali is not None else [0] * len(capacita)
+    assegnazioni = [[] for _ in capacita]
+
+    heap_tutti = [(carichi[i], i) for i in range(len(capacita))]
+    heap_condivisi = [(carichi[i], i) for i, posti in enumerate(capacita) if posti >= 2]
+    heapq.heapify(heap_tutti)
+    heapq.heapify(heap_condivisi)
+
+    for durata, clienti in sorted(corse, key=lambda corsa: (-corsa[0], corsa[1])):
+        heap = heap_condivisi if len(clienti) > 1 else heap_tutti
+
+        while heap[0][0] != carichi[heap[0][1]]:
+            heapq.heappop(heap)
+        carico, indice_taxi = heapq.heappop(heap)
+
+        carichi[indice_taxi] = carico + durata
+        assegnazioni[indice_taxi].append((durata, clienti))
+
+        heapq.heappush(heap_tutti, (carichi[indice_taxi], indice_taxi))
+        if capacita[indice_taxi] >= 2:
+            heapq.heappush(heap_condivisi, (carichi[indice_taxi], indice_taxi))
+
+    return assegnazioni, carichi
+
+
+def assegna_clienti_flotta(etichette_clienti, capacita, raggio_coppia, distanza_stazione,
+                           strategia_accoppiamento, tabella, distanza_coppia=None,
+                           carichi_iniziali=None):
+    # Accoppiamento + bilanciamento: per ogni taxi la lista di corse (durata, clienti)
+    # Le coppie servono solo se almeno un taxi ha due posti
+    if etichette_clienti and max(capacita) >= 2:
+        coppie, clienti_singoli = trova_coppie_clienti(etichette_clienti, raggio_coppia,
+                                                       distanza_stazione, strategia_accoppiamento,
+                                                       distanza_coppia)
+    else:
+        coppie, clienti_singoli = [], sorted(etichette_clienti)
+
+    corse = calcola_corse(coppie, clienti_singoli, etichette_clienti, tabella, distanza_stazione)
+    assegnazioni, _ = assegna_corse_lpt(corse, capacita, carichi_iniziali)
+    return assegnazioni
+
+
+def costruisci_piano_taxi_da_corse(corse_taxi, posizioni_clienti, tabella, distanza_stazione):
+    # Corse più brevi prima: a parità di makespan riduce l'attesa media dei clienti
+    percorso_completo = [STAZIONE]
+    eventi_prelievo = {}
+    eventi_discesa = {}
+
+    for _, clienti in sorted(corse_taxi):
+        if len(clienti) > 1:
+            servi_coppia_clienti(clienti[0], clienti[1], posizioni_clienti,
+                                 percorso_completo, eventi_prelievo, eventi_discesa, tabella,
+                                 distanza_stazione)
+        else:
+            servi_cliente_singolo(clienti[0], posizioni_clienti,
+                                  percorso_completo, eventi_prelievo, eventi_discesa, tabella)
+
+    return PianoTaxi(percorso_completo, eventi_prelievo, eventi_discesa)
+
+
+def costruisci_piani_flotta(mappa_pickup_clienti, posizioni, numero_taxi=NUMERO_TAXI_DEFAULT,
+                            capacita=CAPACITA_TAXI_DEFAULT,
+                            raggio_coppia=RAGGIO_ACCOPPIAMENTO_DEFAULT,
+                            distanza_stazione=None,
+                            strategia_accoppiamento=STRATEGIA_ACCOPPIAMENTO_DEFAULT,
+                            nomi_taxi=None, distanza_coppia=None):
+    # FLOTTA DI N TAXI: coppie e singoli distribuiti per minimizzare il makespan
+    # capacita: intero per tutta la flotta o lista con un valore per taxi
+    # nomi_taxi: nomi dei veicoli (default taxi1..taxiN come nei problemi PDDL)
+    # distanza_coppia: distanza tra clienti per il raggio (default Manhattan, distanza_hub su strada)
+    if nomi_taxi is None:
+        nomi_taxi = nomi_taxi_flotta(numero_taxi)
+    else:
+        nomi_taxi = list(nomi_taxi)
+        numero_taxi = len(nomi_taxi)
+
+    if numero_taxi < 1:
+        raise ValueError(f"Numero di taxi non valido: {numero_taxi}")
+
+    capacita = normalizza_capacita(capacita, numero_taxi)
+    if distanza_stazione is None:
+        distanza_stazione = distanza_manhattan_stazione
+
+    etichette_clienti = estrai_posizioni_clienti(mappa_pickup_clienti, posizioni)
+    etichette_clienti, clienti_irraggiungibili = separa_clienti_irraggiungibili(etichette_clienti)
+    tabella = ottieni_tabella_percorsi()
+    assegnazioni = assegna_clienti_flotta(etichette_clienti, capacita, raggio_coppia,
+                                          distanza_stazione, strategia_accoppiamento, tabella,
+                                          distanza_coppia)
+
+    piani_taxi = {}
+    for nome_taxi, corse_taxi in zip(nomi_taxi, assegnazioni):
+        piani_taxi[nome_taxi] = costruisci_piano_taxi_da_corse(corse_taxi, etichette_clienti,
+                                                               tabella, distanza_stazione)
+
+    return PianiMultiTaxi(piani_taxi=piani_taxi, etichette_clienti=etichette_clienti,
+                          clienti_irraggiungibili=clienti_irraggiungibili)
@@ -0,0 +1,98 @@
+from ..algoritmi.griglia import ottieni_griglia, blocca_cella, libera_cella
+from ..algoritmi.tabella_percorsi import ottieni_tabella_percorsi
+from ..simulazione.motore import ottieni_piani
+
+
+def chiudi_strada(pos, piani, indici_correnti=None):
+    # Chiusura a runtime: aggiorna la griglia e ripara solo i piani che passano da pos
+    # Restituisce i nomi dei taxi il cui percorso è stato modificato
+    if not blocca_cella(pos):
+        return []
+    return ripara_piani_taxi(piani, indici_correnti, aperture=False)
+
+
+def riapri_strada(pos, piani, indici_correnti=None):
+    # Riapertura a runtime: accorcia le tratte che ora possono passare da pos
+    if not libera_cella(pos):
+        return []
+    return ripara_piani_taxi(piani, indici_correnti, aperture=True)
+
+
+def ripara_piani_taxi(piani, indici_correnti=None, aperture=True):
+    # RIPARAZIONE INCREMENTALE: le tratte tra due tappe (partenza, prelievi, discese,
+    # posizione attuale del taxi) vengono sostituite solo se attraversano una cella chiusa
+    # o, con aperture=True, se ora esiste un percorso più corto
+    # I percorsi arrivano dalla tabella già riparata: nessuna nuova ricerca da zero
+    # indici_correnti: {nome taxi: indice raggiunto}, la parte già percorsa non cambia
+    tabella = ottieni_tabella_percorsi()
+    indici_correnti = indici_correnti or {}
+    riparati = []
+
+    for nome_taxi, piano in ottieni_piani(piani).items():
+        if ripara_piano_taxi(piano, tabella, indici_correnti.get(nome_taxi, 0), aperture):
+            riparati.append(nome_taxi)
+
+    return riparati
+
+
+def tappe_piano(piano, indice_corrente):
+    # Indici in cui il percorso è vincolato: da qui in avanti tra una tappa e l'altra
+    # il taxi è libero di scegliere la strada
+    ultimo = len(piano.percorso) - 1
+    tappe = {indice_corrente, ultimo}
+    tappe.update(indice for indice in piano.eventi_prelievo if indice > indice_corrente)
+    tappe.update(indice for indice in piano.eventi_discesa if indice > indice_corrente)
+    return sorted(indice for indice in tappe if indice <= ultimo)
+
+
+def tratta_da_riparare(percorso, inizio, fine, tabella, aperture):
+    # Nuovi nodi intermedi per la tratta, None se quella attuale va ancora bene
+    griglia = ottieni_griglia()
+    interrotta = any(not griglia.percorribile(pos) for pos in percorso[inizio + 1:fine])
+    if not interrotta and not aperture:
+        return None
+
+    start, end = percorso[inizio], percorso[fine]
+    distanza = tabella.distanza(start, end)
+    if distanza == float('inf'):
+        if interrotta:
+            print(f"[WARNING] Nessun percorso alternativo da {start} a {end}: tratta invariata")
+        return None
+    if not interrotta and distanza >= fine - inizio:
+        return None
+
+    return tabella.percorso(start, end)
+
+
+def ripara_piano_taxi(piano, tabella, indice_corrente=0, aperture=True):
+    # True se il piano è stato modificato; eventi spostati insieme al resto del percorso
+    percorso = piano.percorso
+    tappe = tappe_piano(piano, indice_corrente)
+
+    nuovo_percorso = percorso[:tappe[0] + 1]
+    nuovi_indici = {tappe[0]: tappe[0]}
+    modificato = False
+
+    for inizio, fine in zip(tappe, tappe[1:]):
+        intermedi = tratta_da_riparare(percorso, inizio, fine, tabella, aperture)
+        if intermedi is None:
+            nuovo_percorso.extend(percorso[inizio + 1:fine + 1])
+        else:
+            nuovo_percorso.extend(intermedi)
+            nuovo_percorso.append(percorso[fine])
+            modificato = True
+        nuovi_indici[fine] = len(nuovo_percorso) - 1
+
+    if not modificato:
+        return False
+
+    # Il percorso è modificato sul posto: chi ne tiene un riferimento (motore, GUI) lo vede
+    percorso[:] = nuovo_percorso
+    piano.eventi_prelievo = {
+        nuovi_indici.get(indice, indice): clienti for indice, clienti in piano.eventi_prelievo.items()
+    }
+    piano.eventi_discesa = {
+        nuovi_indici.get(indice, indice): clienti for indice, clienti in piano.eventi_discesa.items()
+    }
+    piano.aggiorna_occupazione()
+    return True
@@ -0,0 +1,122 @@
+from ..configurazione.costanti import (
+    STAZIONE, RAGGIO_ACCOPPIAMENTO_DEFAULT, STRATEGIA_ACCOPPIAMENTO_DEFAULT, CAPACITA_TAXI_DEFAULT
+)
+from ..algoritmi.griglia import ottieni_griglia
+from ..algoritmi.tabella_percorsi import ottieni_tabella_percorsi
+from ..algoritmi.ottimizzazione import distanza_manhattan_stazione
+from ..gestione_file.lettore_file import leggi_problema_pddl, carica_posizioni_da_json, scrivi_piano
+from .costruttore_rotte import ottieni_cella_da_label
+from .pianificatore_flotta import normalizza_capacita, assegna_clienti_flotta, ordina_prelievi_coppia
+
+
+def genera_piano_da_problema(percorso_problema, percorso_posizioni, percorso_piano=None, **opzioni):
+    # Dal file problema al piano senza planner esterno
+    # percorso_piano: se indicato il piano viene anche scritto su file (formato PDDL/plans)
+    problema = leggi_problema_pddl(percorso_problema)
+    posizioni = carica_posizioni_da_json(percorso_posizioni)
+    azioni = risolvi_problema_pddl(problema, posizioni, **opzioni)
+
+    if percorso_piano is not None:
+        scrivi_piano(azioni, percorso_piano)
+
+    return azioni
+
+
+def risolvi_problema_pddl(problema, posizioni_locations, capacita=CAPACITA_TAXI_DEFAULT,
+                          raggio_coppia=RAGGIO_ACCOPPIAMENTO_DEFAULT, distanza_stazione=None,
+                          strategia_accoppiamento=STRATEGIA_ACCOPPIAMENTO_DEFAULT,
+                          distanza_coppia=None):
+    # RISOLUTORE SPECIALIZZATO per il dominio taxi-planner
+    # Il dominio ha solo move/pickup/dropoff verso una stazione: invece di una ricerca
+    # generica nello spazio degli stati si usano accoppiamento e bilanciamento della
+    # flotta sulla tabella delle distanze, poi si traducono le corse in azioni
+    if not problema.taxi:
+        raise ValueError("Il problema non dichiara alcun taxi")
+    if distanza_stazione is None:
+        distanza_stazione = distanza_manhattan_stazione
+
+    capacita = normalizza_capacita(capacita, len(problema.taxi))
+    label_clienti, etichette_clienti, label_stazione = estrai_richieste(problema, posizioni_locations)
+
+    tabella = ottieni_tabella_percorsi()
+    carichi_iniziali = calcola_carichi_iniziali(problema, posizioni_locations, label_stazione, tabella)
+    assegnazioni = assegna_clienti_flotta(etichette_clienti, capacita, raggio_coppia,
+                                          distanza_stazione, strategia_accoppiamento, tabella,
+                                          distanza_coppia, carichi_iniziali)
+
+    azioni = []
+    for nome_taxi, corse_taxi in zip(problema.taxi, assegnazioni):
+        posizione = problema.posizioni_taxi.get(nome_taxi, label_stazione)
+
+        # Corse più brevi prima, come costruisci_piano_taxi_da_corse
+        for _, clienti in sorted(corse_taxi):
+            if len(clienti) > 1:
+                clienti = ordina_prelievi_coppia(clienti, etichette_clienti, distanza_stazione)
+
+            for cliente in clienti:
+                posizione = aggiungi_move(azioni, nome_taxi, posizione, label_clienti[cliente])
+                azioni.append(f"(pickup {nome_taxi} {cliente} {posizione})")
+
+            posizione = aggiungi_move(azioni, nome_taxi, posizione, label_stazione)
+            for cliente in clienti:
+                azioni.append(f"(dropoff {nome_taxi} {cliente} {posizione})")
+
+    return azioni
+
+
+def estrai_richieste(problema, posizioni_locations):
+    # Passeggeri da portare in stazione: {passeggero: label}, {passeggero: cella}, label stazione
+    # La griglia ha una sola stazione: ogni goal deve essere quella location
+    label_clienti = {}
+    etichette_clienti = {}
+    label_stazione = None
+    griglia = ottieni_griglia()
+
+    for passeggero, destinazione in problema.destinazioni_passeggeri.items():
+        if destinazione not in problema.stazioni:
+            raise ValueError(
+                f"Goal non raggiungibile nel dominio: {passeggero} deve scendere in "
+                f"{destinazione}, che non è una stazione"
+            )
+        if ottieni_cella_da_label(destinazione, posizioni_locations) != STAZIONE:
+            raise ValueError(f"La stazione {destinazione} non coincide con la stazione della griglia")
+        label_stazione = destinazione
+
+        partenza = problema.posizioni_passeggeri.get(passeggero)
+        if partenza is None:
+            raise ValueError(f"Posizione iniziale del passeggero {passeggero} non definita")
+        if partenza == destinazione:
+            continue
+
+        cella = ottieni_cella_da_label(partenza, posizioni_locations)
+        if not griglia.raggiungibile(STAZIONE, cella):
+            raise ValueError(
+                f"Passeggero {passeggero} in {partenza} {cella} non raggiungibile dalla stazione"
+            )
+        label_clienti[passeggero] = partenza
+        etichette_clienti[passeggero] = cella
+
+    if label_stazione is None:
+        label_stazione = min(problema.stazioni) if problema.stazioni else "st"
+
+    return label_clienti, etichette_clienti, label_stazione
+
+
+def calcola_carichi_iniziali(problema, posizioni_locations, label_stazione, tabella):
+    # Le corse partono e tornano in stazione: un taxi che parte altrove ha in più, al massimo,
+    # il tragitto fino alla stazione, e l'LPT lo conta come carico già assegnato
+    carichi = []
+    for nome_taxi in problema.taxi:
+        partenza = problema.posizioni_taxi.get(nome_taxi, label_stazione)
+        distanza = tabella.distanza(ottieni_cella_da_label(partenza, posizioni_locations), STAZIONE)
+        if distanza == float('inf'):
+            raise ValueError(f"Taxi {nome_taxi} in {partenza} non raggiungibile dalla stazione")
+        carichi.append(distanza)
+    return carichi
+
+
+def aggiungi_move(azioni, nome_taxi, posizione, destinazione):
+    # Move solo se il taxi non è già sul posto
+    if posizione != destinazione:
+        azioni.append(f"(move {nome_taxi} {posizione} {destinazione})")
+    return destinazione
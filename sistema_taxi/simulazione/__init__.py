@@ -0,0 +1,3 @@
+# Modulo simulazione sistema taxi
+from .motore import *
+from .cronologia import *
@@ -0,0 +1,143 @@
+# Cronologia precalcolata dell'animazione: lo stato a ogni step si legge senza replay
+# Costruita una volta al caricamento, in un solo passaggio lineare su ogni percorso
+from array import array
+
+from ..configurazione.costanti import COSTO_PER_STEP, STAZIONE
+from .motore import ottieni_piani
+
+
+class CronologiaTaxi:
+    # Array piatti indicizzati per step del percorso di un taxi:
+    #   xs, ys: posizione a ogni indice
+    #   indice_occupazione: posizione in occupazione.a_bordo dei clienti a bordo (-1 nessuno)
+    #   quota: costo per cliente dello step indice -> indice+1
+    #   quota_cumulata[i]: somma delle quote degli step < i (somme prefisse)
+    #   costo_cumulato[i]: costo del taxi dopo i step
+    # prelievi/consegne: {cliente: indice} con la stessa regola della GUI
+    # (prelievo a indice >= 1, consegna al primo arrivo in stazione con il cliente a bordo)
+
+    def __init__(self, piano, costo_per_step=COSTO_PER_STEP):
+        self.piano = piano
+        percorso = piano.percorso
+        occupazione = piano.occupazione
+        numero_indici = len(percorso)
+
+        self.xs = array('i', (pos[0] for pos in percorso))
+        self.ys = array('i', (pos[1] for pos in percorso))
+        self.indice_occupazione = array('i', [-1]) * numero_indici
+        self.quota = array('d', [0.0]) * numero_indici
+        self.quota_cumulata = array('d', [0.0]) * (numero_indici + 1)
+        self.costo_cumulato = array('d', [0.0]) * (numero_indici + 1)
+
+        self.prelievi = {}
+        for indice in sorted(piano.eventi_prelievo):
+            if indice >= 1:
+                for cliente in piano.eventi_prelievo[indice]:
+                    self.prelievi.setdefault(cliente, indice)
+
+        # Un solo passaggio: l'evento corrente avanza insieme all'indice
+        indici_eventi = occupazione.indici_eventi
+        evento = -1
+        self.consegne = {}
+        for indice in range(numero_indici):
+            while evento + 1 < len(indici_eventi) and indici_eventi[evento + 1] <= indice:
+                evento += 1
+            self.indice_occupazione[indice] = evento
+
+            a_bordo = occupazione.a_bordo[evento] if evento >= 0 else ()
+            if a_bordo:
+                self.quota[indice] = costo_per_step / len(a_bordo)
+            self.quota_cumulata[indice + 1] = self.quota_cumulata[indice] + self.quota[indice]
+            self.costo_cumulato[indice + 1] = self.costo_cumulato[indice] + (costo_per_step if a_bordo else 0.0)
+
+            if indice >= 1 and percorso[indice] == STAZIONE:
+                for cliente in self.clienti_a_bordo(indice - 1):
+                    prelievo = self.prelievi.get(cliente)
+                    if prelievo is not None and prelievo < indice and cliente not in self.consegne:
+                        self.consegne[cliente] = indice
+
+        # Intervalli [inizio, fine) in cui ogni cliente divide il costo degli step
+        ultimo = numero_indici - 1
+        self.intervalli_clienti = {
+            cliente: [(inizio, ultimo if fine is None else fine) for inizio, fine in intervalli]
+            for cliente, intervalli in occupazione.intervalli_clienti.items()
+        }
+
+    def ultimo_indice(self):
+        return max(0, len(self.xs) - 1)
+
+    def posizione(self, indice):
+        return (self.xs[indice], self.ys[indice])
+
+    def clienti_a_bordo(self, indice):
+        evento = self.indice_occupazione[indice]
+        return self.piano.occupazione.a_bordo[evento] if evento >= 0 else ()
+
+    def costo_taxi(self, indice):
+        return self.costo_cumulato[indice]
+
+    def costo_cliente(self, cliente, indice):
+        # Differenza di somme prefisse su ogni intervallo a bordo: O(numero di corse del cliente)
+        quota_cumulata = self.quota_cumulata
+        costo = 0.0
+        for inizio, fine in self.intervalli_clienti.get(cliente, ()):
+            if indice > inizio:
+                costo += quota_cumulata[min(indice, fine)] - quota_cumulata[inizio]
+        return costo
+
+
+class StatoCronologia:
+    # Stato completo dell'animazione a uno step globale
+    def __init__(self, passo, indici_taxi, prelevati, consegnati, costi_clienti, costi_taxi):
+        self.passo = passo
+        self.indici_taxi = indici_taxi  # {nome taxi: indice nel percorso}
+        self.prelevati = prelevati  # {cliente: (nome taxi, indice prelievo)}
+        self.consegnati = consegnati  # Set dei clienti già consegnati
+        self.costi_clienti = costi_clienti
+        self.costi_taxi = costi_taxi
+
+
+class CronologiaAnimazione:
+    # Tutti i taxi avanzano in parallelo: allo step globale t il taxi è all'indice min(t, ultimo)
+    # stato(t) costa O(taxi + clienti), indipendente da t
+
+    def __init__(self, piani, costo_per_step=COSTO_PER_STEP):
+        self.taxi = {
+            nome_taxi: CronologiaTaxi(piano, costo_per_step)
+            for nome_taxi, piano in ottieni_piani(piani).items()
+            if piano is not None
+        }
+        self.passi_totali = max((cronologia.ultimo_indice() for cronologia in self.taxi.values()), default=0)
+
+    def indice_taxi(self, nome_taxi, passo):
+        return min(max(0, passo), self.taxi[nome_taxi].ultimo_indice())
+
+    def stato(self, passo):
+        passo = min(max(0, passo), self.passi_totali)
+        indici_taxi = {}
+        prelevati = {}
+        consegnati = set()
+        costi_clienti = {}
+        costi_taxi = {}
+
+        for nome_taxi, cronologia in self.taxi.items():
+            indice = self.indice_taxi(nome_taxi, passo)
+            indici_taxi[nome_taxi] = indice
+            costi_taxi[nome_taxi] = cronologia.costo_taxi(indice)
+
+            for cliente, indice_prelievo in cronologia.prelievi.items():
+                if indice_prelievo <= indice:
+                    prelevati[cliente] = (nome_taxi, indice_prelievo)
+            for cliente, indice_consegna in cronologia.consegne.items():
+                if indice_consegna <= indice:
+                    consegnati.add(cliente)
+            for cliente in cronologia.intervalli_clienti:
+                costo = cronologia.costo_cliente(cliente, indice)
+                if costo:
+                    costi_clienti[cliente] = costi_clienti.get(cliente, 0.0) + costo
+
+        return StatoCronologia(passo, indici_taxi, prelevati, consegnati, costi_clienti, costi_taxi)
+
+
+def costruisci_cronologia(piani, costo_per_step=COSTO_PER_STEP):
+    return CronologiaAnimazione(piani, costo_per_step)
@@ -0,0 +1,118 @@
+# Motore di simulazione headless: avanzamento taxi, prelievi, consegne e costi
+# Nessuna dipendenza da Tkinter: la GUI si limita a osservare i passi prodotti
+from ..configurazione.costanti import COSTO_PER_STEP
+
+
+class PassoTaxi:
+    # Esito di un singolo step di un taxi, consumato dagli osservatori (GUI)
+    def __init__(self, nome_taxi, indice_precedente, indice, posizione,
+                 prelevati, consegnati, clienti_paganti, quota_per_cliente):
+        self.nome_taxi = nome_taxi
+        self.indice_precedente = indice_precedente
+        self.indice = indice
+        self.posizione = posizione
+        self.prelevati = prelevati  # Clienti saliti al nuovo indice
+        self.consegnati = consegnati  # Clienti scesi al nuovo indice
+        self.clienti_paganti = clienti_paganti  # A bordo durante lo step appena percorso
+        self.quota_per_cliente = quota_per_cliente
+
+
+class RisultatoSimulazione:
+    # Costi finali per cliente e per taxi, più la durata di ogni percorso
+    def __init__(self, costi_clienti, costi_taxi, passi_taxi):
+        self.costi_clienti = costi_clienti
+        self.costi_taxi = costi_taxi
+        self.passi_taxi = passi_taxi
+
+    def durata_totale(self):
+        # Makespan: i taxi si muovono in parallelo
+        return max(self.passi_taxi.values(), default=0)
+
+
+def ottieni_piani(piani):
+    # Accetta PianiMultiTaxi, dizionario {nome: piano} o singolo Viaggio/PianoTaxi
+    if hasattr(piani, 'piani'):
+        return piani.piani
+    if isinstance(piani, dict):
+        return piani
+    return {"singolo": piani}
+
+
+class MotoreSimulazione:
+    # Simulazione discreta dei piani taxi
+    # esegui(): un solo passaggio per eventi, senza tick per cella
+    # avanza_step(): un passo alla volta, per l'animazione
+
+    def __init__(self, piani, costo_per_step=COSTO_PER_STEP):
+        self.piani = ottieni_piani(piani)
+        self.costo_per_step = costo_per_step
+        self.reset()
+
+    def reset(self):
+        self.indici = {nome_taxi: 0 for nome_taxi in self.piani}
+        self.costi_clienti = {}
+        self.costi_taxi = {nome_taxi: 0.0 for nome_taxi in self.piani}
+
+    def imposta_stato(self, indici, costi_clienti, costi_taxi):
+        # Salto diretto a uno stato già calcolato (es. dalla cronologia precalcolata)
+        for nome_taxi, indice in indici.items():
+            if nome_taxi in self.indici:
+                self.indici[nome_taxi] = indice
+        self.costi_clienti = dict(costi_clienti)
+        self.costi_taxi.update(costi_taxi)
+
+    def completato(self):
+        return all(
+            self.indici[nome_taxi] >= len(piano.percorso) - 1
+            for nome_taxi, piano in self.piani.items()
+        )
+
+    def avanza_step(self):
+        # Avanza di uno step ogni taxi non ancora arrivato a fine percorso
+        # Il costo dello step (indice -> indice+1) è diviso tra chi era a bordo
+        passi = []
+
+        for nome_taxi, piano in self.piani.items():
+            indice_precedente = self.indici[nome_taxi]
+            if indice_precedente >= len(piano.percorso) - 1:
+                continue
+
+            nuovo_indice = indice_precedente + 1
+            self.indici[nome_taxi] = nuovo_indice
+
+            clienti_paganti = piano.clienti_a_bordo(indice_precedente)
+            quota = 0.0
+            if clienti_paganti:
+                quota = self.costo_per_step / len(clienti_paganti)
+                for cliente in clienti_paganti:
+                    self.costi_clienti[cliente] = self.costi_clienti.get(cliente, 0.0) + quota
+                self.costi_taxi[nome_taxi] += self.costo_per_step
+
+            passi.append(PassoTaxi(
+                nome_taxi, indice_precedente, nuovo_indice, piano.percorso[nuovo_indice],
+                piano.eventi_prelievo.get(nuovo_indice, []),
+                piano.eventi_discesa.get(nuovo_indice, []),
+                clienti_paganti, quota
+            ))
+
+        return passi
+
+    def esegui(self):
+        # Nessuno step simulato: ogni piano porta già le sue tariffe in forma chiusa
+        # (CostiPiano, calcolate dagli eventi alla costruzione del piano)
+        costi_clienti = {}
+        costi_taxi = {}
+        passi_taxi = {}
+
+        for nome_taxi, piano in self.piani.items():
+            passi_taxi[nome_taxi] = max(0, len(piano.percorso) - 1)
+            costi_taxi[nome_taxi] = piano.costi.costo_taxi(costo_per_step=self.costo_per_step)
+            for cliente, costo in piano.costi.costi_clienti(self.costo_per_step).items():
+                costi_clienti[cliente] = costi_clienti.get(cliente, 0.0) + costo
+
+        return RisultatoSimulazione(costi_clienti, costi_taxi, passi_taxi)
+
+
+def simula_piani(piani, costo_per_step=COSTO_PER_STEP):
+    # Valutazione batch di uno scenario: nessuna animazione, un solo passaggio
+    return MotoreSimulazione(piani, costo_per_step).esegui()
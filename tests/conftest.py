@@ -0,0 +1,21 @@
+import pytest
+
+from sistema_taxi.configurazione import costanti
+from sistema_taxi.algoritmi import griglia as modulo_griglia
+from sistema_taxi.algoritmi import tabella_percorsi as modulo_tabella
+
+
+@pytest.fixture
+def mappa(monkeypatch):
+    # Mappa di prova: dimensioni e ostacoli propri, griglia e tabella condivise azzerate
+    # Restituisce una funzione che imposta larghezza, altezza e ostacoli
+    def imposta(larghezza, altezza, ostacoli=()):
+        monkeypatch.setattr(costanti, "GRIGLIA_LARGHEZZA", larghezza)
+        monkeypatch.setattr(costanti, "GRIGLIA_ALTEZZA", altezza)
+        monkeypatch.setattr(costanti, "OSTACOLI", [tuple(ostacolo) for ostacolo in ostacoli])
+        monkeypatch.setattr(modulo_griglia, "_griglia_corrente", None)
+        monkeypatch.setattr(modulo_griglia, "_chiave_griglia", None)
+        monkeypatch.setattr(modulo_griglia, "_ostacoli_griglia", None)
+        monkeypatch.setattr(modulo_tabella, "_tabella_corrente", None)
+
+    return imposta
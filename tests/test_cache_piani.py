@@ -0,0 +1,20 @@
+from pathlib import Path
+
+from sistema_taxi.configurazione.costanti import STRATEGIA_ACCOPPIAMENTO_GREEDY, STRATEGIA_ACCOPPIAMENTO_OTTIMA
+from sistema_taxi.gestione_file.cache_piani import calcola_chiave_scenario
+
+CARTELLA_PDDL = Path(__file__).resolve().parent.parent / "PDDL"
+
+
+def test_chiave_dipende_da_strategia_e_capacita():
+    piano = CARTELLA_PDDL / "plans" / "plan3"
+    posizioni = CARTELLA_PDDL / "locations" / "location3.json"
+
+    def chiave(**opzioni):
+        return calcola_chiave_scenario(piano, posizioni, "flotta:taxi1,taxi2", 2, **opzioni)
+
+    base = chiave(strategia_accoppiamento=STRATEGIA_ACCOPPIAMENTO_GREEDY, capacita=2)
+    assert chiave(strategia_accoppiamento=STRATEGIA_ACCOPPIAMENTO_GREEDY, capacita=2) == base
+    assert chiave(strategia_accoppiamento=STRATEGIA_ACCOPPIAMENTO_OTTIMA, capacita=2) != base
+    assert chiave(strategia_accoppiamento=STRATEGIA_ACCOPPIAMENTO_GREEDY, capacita=1) != base
+    assert chiave(strategia_accoppiamento=STRATEGIA_ACCOPPIAMENTO_GREEDY, capacita=[2, 1]) != base
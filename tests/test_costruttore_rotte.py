@@ -0,0 +1,62 @@
+from pathlib import Path
+
+from sistema_taxi.configurazione.costanti import STAZIONE
+from sistema_taxi.gestione_file.lettore_file import carica_posizioni_da_json, itera_azioni_da_piano
+from sistema_taxi.pianificazione.costruttore_rotte import costruisci_rotte_da_azioni, costruisci_viaggio_da_azioni
+from sistema_taxi.simulazione.cronologia import costruisci_cronologia
+
+CARTELLA_PDDL = Path(__file__).resolve().parent.parent / "PDDL"
+
+
+def passi_unitari(percorso):
+    return all(abs(a[0] - b[0]) + abs(a[1] - b[1]) == 1 for a, b in zip(percorso, percorso[1:]))
+
+
+def test_piano_multi_taxi_parte_dalla_stazione(mappa):
+    # taxi2 inizia il piano lontano dalla stazione: tragitto anteposto ed eventi spostati
+    mappa(15, 10)
+    posizioni = {"st": STAZIONE, "l1": (0, 6), "l2": (4, 2), "l3": (7, 2)}
+    azioni = [
+        "(move taxi1 st l1)", "(pickup taxi1 p1 l1)", "(move taxi1 l1 st)", "(dropoff taxi1 p1 st)",
+        "(move taxi2 l3 l2)", "(pickup taxi2 p2 l2)", "(move taxi2 l2 st)", "(dropoff taxi2 p2 st)",
+    ]
+    piani, viaggio, etichette = costruisci_rotte_da_azioni(azioni, posizioni)
+    assert viaggio is None and etichette == {"P1": (0, 6), "P2": (4, 2)}
+
+    piano = piani.piani["taxi2"]
+    assert piano.percorso[0] == STAZIONE and passi_unitari(piano.percorso)
+    (indice_prelievo, clienti), = piano.eventi_prelievo.items()
+    (indice_discesa, _), = piano.eventi_discesa.items()
+    assert clienti == ["P2"] and piano.percorso[indice_prelievo] == (4, 2)
+    assert piano.percorso[14] == (7, 2) and indice_prelievo == 17
+    assert indice_discesa == len(piano.percorso) - 1
+    assert list(piano.clienti_a_bordo(indice_prelievo)) == ["P2"]
+    assert piano.costi.costo_cliente("P2") == indice_discesa - indice_prelievo
+
+    cronologia = costruisci_cronologia(piani)
+    assert cronologia.taxi["taxi2"].prelievi == {"P2": indice_prelievo}
+    assert cronologia.taxi["taxi2"].consegne == {"P2": indice_discesa}
+    stato = cronologia.stato(indice_prelievo - 1)
+    assert "P2" not in stato.prelevati and stato.costi_taxi["taxi2"] == 0
+
+
+def test_piano5_riprodotto_come_due_rotte_parallele():
+    # plan5 nomina taxi1 e taxi2: due percorsi dalla stazione, ogni prelievo nella sua location
+    posizioni = carica_posizioni_da_json(CARTELLA_PDDL / "locations" / "location5.json")
+    piani, viaggio, etichette = costruisci_rotte_da_azioni(itera_azioni_da_piano(CARTELLA_PDDL / "plans" / "plan5"), posizioni)
+    assert viaggio is None
+    assert sorted(piani.piani) == ["taxi1", "taxi2"]
+
+    for piano in piani.piani.values():
+        assert piano.percorso[0] == STAZIONE
+        assert all(abs(a[0] - b[0]) + abs(a[1] - b[1]) <= 1 for a, b in zip(piano.percorso, piano.percorso[1:]))
+        for indice, clienti in piano.eventi_prelievo.items():
+            assert all(piano.percorso[indice] == etichette[cliente] for cliente in clienti)
+        for indice in piano.eventi_discesa:
+            assert piano.percorso[indice] == STAZIONE
+
+    # In parallelo la flotta finisce prima del piano eseguito da un solo veicolo
+    serializzato, _ = costruisci_viaggio_da_azioni(itera_azioni_da_piano(CARTELLA_PDDL / "plans" / "plan5"), posizioni)
+    cronologia = costruisci_cronologia(piani)
+    assert cronologia.passi_totali == max(len(piano.percorso) - 1 for piano in piani.piani.values())
+    assert cronologia.passi_totali < len(serializzato.percorso) - 1
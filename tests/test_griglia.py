@@ -0,0 +1,31 @@
+from sistema_taxi.configurazione import costanti
+from sistema_taxi.algoritmi.griglia import ottieni_griglia, blocca_cella, libera_cella
+from sistema_taxi.algoritmi.tabella_percorsi import ottieni_tabella_percorsi
+
+
+def test_modifica_sul_posto_ricostruisce_la_griglia(mappa):
+    # OSTACOLI[i] = nuova cella: stessa lista, stessa lunghezza, griglia comunque ricostruita
+    mappa(7, 7, [(0, 0)])
+    griglia = ottieni_griglia()
+    assert ottieni_tabella_percorsi().percorso((3, 2), (3, 4)) == [(3, 3)]
+
+    costanti.OSTACOLI[0] = (3, 3)
+    assert ottieni_griglia() is not griglia
+    assert not ottieni_griglia().percorribile((3, 3))
+    assert ottieni_griglia().percorribile((0, 0))
+    intermedi = ottieni_tabella_percorsi().percorso((3, 2), (3, 4))
+    assert (3, 3) not in intermedi
+    assert len(intermedi) == 3
+
+
+def test_chiusure_a_runtime_mantengono_la_griglia(mappa):
+    # blocca_cella/libera_cella aggiornano OSTACOLI e la griglia corrente sul posto
+    mappa(5, 5)
+    griglia = ottieni_griglia()
+    assert blocca_cella((2, 2))
+    assert costanti.OSTACOLI == [(2, 2)]
+    assert ottieni_griglia() is griglia
+    assert libera_cella((2, 2))
+    assert costanti.OSTACOLI == []
+    assert ottieni_griglia() is griglia
+    assert griglia.percorribile((2, 2))
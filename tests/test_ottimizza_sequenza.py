@@ -0,0 +1,48 @@
+from pathlib import Path
+
+import pytest
+
+from sistema_taxi.gestione_file.lettore_file import carica_posizioni_da_json, itera_azioni_da_piano, tokenizza_azioni
+from sistema_taxi.pianificazione.costruttore_rotte import ottimizza_sequenza_azioni, costruisci_piani_da_azioni
+
+CARTELLA_PDDL = Path(__file__).resolve().parent.parent / "PDDL"
+
+
+def tappe_per_taxi(azioni):
+    # {taxi: (prelievi {cliente: location}, discese {cliente: location}, ultima destinazione)}
+    tappe = {}
+    for azione in tokenizza_azioni(azioni):
+        tokens = azione.tokens
+        if len(tokens) != 4:
+            continue
+        prelievi, discese, _ = tappe.setdefault(tokens[1], ({}, {}, None))
+        if azione.operazione == "pickup":
+            prelievi[tokens[2]] = tokens[3]
+        elif azione.operazione == "dropoff":
+            discese[tokens[2]] = tokens[3]
+        elif azione.operazione == "move":
+            tappe[tokens[1]] = (prelievi, discese, tokens[3])
+    return tappe
+
+
+@pytest.mark.parametrize("numero", [1, 2, 3, 4, 5])
+def test_piano_compattato_stesse_tappe_meno_passi(numero):
+    posizioni = carica_posizioni_da_json(CARTELLA_PDDL / "locations" / f"location{numero}.json")
+    originale = list(itera_azioni_da_piano(CARTELLA_PDDL / "plans" / f"plan{numero}"))
+    rapporto = {}
+    compattato = ottimizza_sequenza_azioni(originale, posizioni, rapporto)
+
+    assert tappe_per_taxi(compattato) == tappe_per_taxi(originale)
+    assert rapporto['passi_dopo'] <= rapporto['passi_prima']
+    if numero in (4, 5):
+        # Piani con giri di più prelievi: la compattazione deve guadagnare davvero
+        assert rapporto['passi_dopo'] < rapporto['passi_prima']
+    assert rapporto['azioni_dopo'] <= rapporto['azioni_prima']
+
+    # Percorsi ricostruiti: ogni taxi fa al più i passi del piano originale
+    prima = costruisci_piani_da_azioni(originale, posizioni).piani
+    dopo = costruisci_piani_da_azioni(compattato, posizioni).piani
+    assert sorted(dopo) == sorted(prima)
+    for nome_taxi, piano in dopo.items():
+        assert len(piano.percorso) <= len(prima[nome_taxi].percorso)
+        assert piano.percorso[-1] == prima[nome_taxi].percorso[-1]
@@ -0,0 +1,52 @@
+import random
+
+import pytest
+
+from sistema_taxi.algoritmi import distanze_vettoriali
+from sistema_taxi.algoritmi.ottimizzazione import (
+    trova_coppie_clienti, trova_coppie_vicine_forza_bruta, trova_coppie_vicine_indice_spaziale,
+    distanze_dalla_stazione, distanza_manhattan_stazione
+)
+from sistema_taxi.configurazione.costanti import STRATEGIA_ACCOPPIAMENTO_GREEDY, STRATEGIA_ACCOPPIAMENTO_OTTIMA
+
+CASI = [(seme, numero, raggio) for seme in range(4) for numero in (2, 40, 300) for raggio in (0, 1, 3, 7)]
+
+
+def clienti_casuali(seme, numero):
+    # Griglia piccola rispetto ai clienti: molte coppie, posizioni ripetute e x uguali
+    casuale = random.Random(seme)
+    lato = max(4, int(numero ** 0.5) * 2)
+    return {f"P{i}": (casuale.randrange(lato), casuale.randrange(lato)) for i in range(numero)}
+
+
+@pytest.mark.parametrize("seme, numero, raggio", CASI)
+def test_indice_spaziale_coincide_con_forza_bruta(seme, numero, raggio):
+    clienti = clienti_casuali(seme, numero)
+    lista_clienti = sorted(clienti)
+    assert (trova_coppie_vicine_indice_spaziale(clienti, lista_clienti, raggio) ==
+            trova_coppie_vicine_forza_bruta(clienti, lista_clienti, raggio))
+
+
+@pytest.mark.parametrize("seme, numero, raggio", CASI)
+def test_sweep_numpy_coincide_con_forza_bruta(seme, numero, raggio):
+    pytest.importorskip("numpy")
+    clienti = clienti_casuali(seme, numero)
+    lista_clienti = sorted(clienti)
+    attese = trova_coppie_vicine_forza_bruta(clienti, lista_clienti, raggio)
+    assert distanze_vettoriali.coppie_entro_raggio_vettoriale(clienti, lista_clienti, raggio) == attese
+    assert trova_coppie_vicine_indice_spaziale(clienti, lista_clienti, raggio) == attese
+
+
+@pytest.mark.parametrize("strategia", [STRATEGIA_ACCOPPIAMENTO_GREEDY, STRATEGIA_ACCOPPIAMENTO_OTTIMA])
+def test_accoppiamento_identico_con_e_senza_numpy(strategia, monkeypatch):
+    # Stesse coppie e stessi singoli dal backend NumPy e dal percorso Python puro
+    pytest.importorskip("numpy")
+    clienti = clienti_casuali(11, 500)
+    posizioni = list(clienti.values())
+    con_numpy = trova_coppie_clienti(clienti, 3, strategia=strategia)
+    distanze_numpy = distanze_dalla_stazione(posizioni)
+
+    monkeypatch.setattr(distanze_vettoriali, "NUMPY_DISPONIBILE", False)
+    assert trova_coppie_clienti(clienti, 3, strategia=strategia) == con_numpy
+    assert distanze_dalla_stazione(posizioni) == distanze_numpy
+    assert distanze_numpy == [distanza_manhattan_stazione(pos) for pos in posizioni]
@@ -0,0 +1,49 @@
+from pathlib import Path
+
+import pytest
+
+from sistema_taxi.configurazione.costanti import STAZIONE
+from sistema_taxi.configurazione.modelli import ProblemaPddl
+from sistema_taxi.gestione_file.lettore_file import tokenizza_azioni
+from sistema_taxi.pianificazione.costruttore_rotte import valida_sequenza_azioni
+from sistema_taxi.pianificazione.risolutore_pddl import genera_piano_da_problema, risolvi_problema_pddl
+
+CARTELLA_PDDL = Path(__file__).resolve().parent.parent / "PDDL"
+
+
+@pytest.mark.parametrize("numero", [1, 2, 3, 4, 5])
+def test_piano_generato_porta_tutti_in_stazione(numero, tmp_path):
+    percorso_piano = tmp_path / f"plan{numero}"
+    azioni = genera_piano_da_problema(CARTELLA_PDDL / "problem" / f"problem{numero}.pddl",
+                                      CARTELLA_PDDL / "locations" / f"location{numero}.json",
+                                      percorso_piano)
+    valido, errori = valida_sequenza_azioni(azioni)
+    assert valido, errori
+    assert percorso_piano.read_text(encoding="utf-8").splitlines()[:len(azioni)] == azioni
+
+
+def test_partenza_lontana_conta_nel_bilanciamento():
+    # Una sola corsa: va al taxi già in stazione, non a quello dall'altra parte della mappa
+    problema = ProblemaPddl(
+        nome="partenze", taxi=["taxi1", "taxi2"], passeggeri=["p1", "p2"],
+        locations=["st", "lontano", "l1", "l2"], stazioni={"st"},
+        posizioni_taxi={"taxi1": "lontano", "taxi2": "st"},
+        posizioni_passeggeri={"p1": "l1", "p2": "l2"},
+        destinazioni_passeggeri={"p1": "st", "p2": "st"},
+    )
+    posizioni = {"st": STAZIONE, "lontano": (14, 0), "l1": (1, 9), "l2": (2, 9)}
+    azioni = risolvi_problema_pddl(problema, posizioni)
+
+    assert {azione.tokens[1] for azione in tokenizza_azioni(azioni)} == {"taxi2"}
+    assert valida_sequenza_azioni(azioni)[0]
+
+
+def test_partenza_irraggiungibile_segnalata(mappa):
+    mappa(15, 10, [(13, 0), (14, 1)])
+    problema = ProblemaPddl(
+        nome="isolato", taxi=["taxi1"], passeggeri=["p1"], locations=["st", "angolo", "l1"],
+        stazioni={"st"}, posizioni_taxi={"taxi1": "angolo"},
+        posizioni_passeggeri={"p1": "l1"}, destinazioni_passeggeri={"p1": "st"},
+    )
+    with pytest.raises(ValueError):
+        risolvi_problema_pddl(problema, {"st": STAZIONE, "angolo": (14, 0), "l1": (1, 9)})
@@ -0,0 +1,124 @@
+import gc
+import random
+
+from sistema_taxi.configurazione import costanti
+from sistema_taxi.configurazione.modelli import PianoTaxi
+from sistema_taxi.algoritmi import tabella_percorsi as modulo_tabella
+from sistema_taxi.algoritmi.griglia import Griglia, ottieni_griglia, blocca_cella, libera_cella
+from sistema_taxi.algoritmi.tabella_percorsi import ottieni_tabella_percorsi, calcola_albero_verso
+from sistema_taxi.pianificazione.riparazione_rotte import chiudi_strada, riapri_strada, ripara_piani_taxi
+
+
+def percorso_valido(griglia, start, end, intermedi):
+    # Passi ortogonali unitari, solo celle percorribili
+    celle = [start] + intermedi + [end]
+    return (all(griglia.percorribile(pos) for pos in intermedi) and
+            all(abs(a[0] - b[0]) + abs(a[1] - b[1]) == 1 for a, b in zip(celle, celle[1:])))
+
+
+def test_registro_senza_lettori_non_perde_chiusure(mappa):
+    # Lettore raccolto dal garbage collector, modifica senza lettori, nuovo lettore:
+    # il registro ha un buco di versione e la chiusura successiva deve comunque arrivare
+    mappa(5, 2)
+    griglia = ottieni_griglia()
+    ottieni_tabella_percorsi()
+    blocca_cella((1, 1))
+
+    modulo_tabella._tabella_corrente = None
+    gc.collect()
+    blocca_cella((3, 1))
+
+    tabella = ottieni_tabella_percorsi()
+    assert tabella.percorso((4, 0), (0, 0)) == [(3, 0), (2, 0), (1, 0)]
+
+    blocca_cella((2, 0))
+    tabella = ottieni_tabella_percorsi()
+    assert ottieni_griglia() is griglia
+    assert tabella.percorso((4, 0), (0, 0)) == []
+    assert tabella.distanza((4, 0), (0, 0)) == float('inf')
+
+    libera_cella((1, 1))
+    tabella = ottieni_tabella_percorsi()
+    intermedi = tabella.percorso((2, 1), (0, 0))
+    assert (2, 0) not in intermedi
+    assert percorso_valido(griglia, (2, 1), (0, 0), intermedi)
+    assert len(griglia.modifiche) == 0
+
+
+def stessa_partizione(componenti, attese):
+    # Etichette diverse ammesse, purché le celle siano raggruppate allo stesso modo
+    corrispondenza = {}
+    for etichetta, attesa in zip(componenti, attese):
+        if (etichetta < 0) != (attesa < 0):
+            return False
+        if etichetta >= 0 and corrispondenza.setdefault(etichetta, attesa) != attesa:
+            return False
+    return len(set(corrispondenza.values())) == len(corrispondenza)
+
+
+def test_riparazione_incrementale_coincide_con_bfs_completa(mappa):
+    # Chiusure e riaperture casuali: righe riparate, componenti e piano confrontati
+    # con una griglia e delle BFS ricostruite da zero dopo ogni modifica
+    casuale = random.Random(19)
+    larghezza, altezza = 12, 9
+    tappe = [(0, 0), (10, 7), (11, 0)]
+    celle = [(x, y) for x in range(larghezza) for y in range(altezza) if (x, y) not in tappe]
+    mappa(larghezza, altezza, casuale.sample(celle, 15))
+
+    tabella = ottieni_tabella_percorsi()
+    griglia = tabella.griglia
+    destinazioni = tappe + casuale.sample([cella for cella in celle if griglia.percorribile(cella)], 6)
+    for destinazione in destinazioni:
+        tabella.riga(destinazione)
+
+    andata = tabella.percorso(tappe[0], tappe[1])
+    ritorno = tabella.percorso(tappe[1], tappe[2])
+    percorso = [tappe[0]] + andata + [tappe[1]] + ritorno + [tappe[2]]
+    indice_prelievo, indice_discesa = len(andata) + 1, len(percorso) - 1
+    piano = PianoTaxi(percorso, {indice_prelievo: ["A"]}, {indice_discesa: ["A"]})
+    piani = {"taxi1": piano}
+
+    for giro in range(300):
+        if giro % 100 == 50:
+            # Lettore raccolto con una modifica non ancora letta, poi una modifica senza
+            # lettori e un nuovo lettore: il registro resta con un buco di versione
+            for _ in range(2):
+                cella = casuale.choice(celle)
+                (libera_cella if not griglia.percorribile(cella) else blocca_cella)(cella)
+                modulo_tabella._tabella_corrente = tabella = None
+                gc.collect()
+            tabella = ottieni_tabella_percorsi()
+            for destinazione in destinazioni:
+                tabella.riga(destinazione)
+            ripara_piani_taxi(piani)
+        cella = casuale.choice(celle)
+        if griglia.percorribile(cella):
+            chiudi_strada(cella, piani)
+        else:
+            riapri_strada(cella, piani)
+
+        assert ottieni_tabella_percorsi() is tabella
+        attesa = Griglia(larghezza, altezza, costanti.OSTACOLI)
+        assert bytes(griglia.bloccate) == bytes(attesa.bloccate)
+        assert stessa_partizione(griglia.componenti, attesa.componenti)
+
+        for destinazione in destinazioni:
+            id_destinazione = griglia.id_cella(destinazione)
+            distanze, prossimi = tabella.riga(destinazione)
+            distanze_attese, _ = calcola_albero_verso(attesa, id_destinazione)
+            assert list(distanze) == list(distanze_attese)
+            for id_cella, distanza in enumerate(distanze):
+                if distanza > 0:
+                    assert prossimi[id_cella] in griglia.vicini[id_cella]
+                    assert distanze[prossimi[id_cella]] == distanza - 1
+
+        # Il piano tiene tappe e indici degli eventi e avanza di una cella per passo
+        prelievo = next(iter(piano.eventi_prelievo))
+        discesa = next(iter(piano.eventi_discesa))
+        assert piano.percorso[0] == tappe[0] and piano.percorso[prelievo] == tappe[1]
+        assert discesa == len(piano.percorso) - 1 and piano.percorso[discesa] == tappe[2]
+        assert percorso_valido(griglia, piano.percorso[0], piano.percorso[-1], piano.percorso[1:-1]) or \
+            not all(griglia.raggiungibile(a, b) for a, b in zip(tappe, tappe[1:]))
+        assert piano.costi.costo_taxi(len(piano.percorso) - 1) == len(piano.percorso) - 1 - prelievo
+
+    assert len(griglia.modifiche) == 0